@@ -0,0 +1,321 @@
+# coding: utf-8
+
+"""
+benchmarks.run
+~~~~~~~~~~~~~~
+
+Runs realistic workloads against the real :mod:`pyresto.apis.github` and
+:mod:`pyresto.apis.bugzilla` models using the local fake API server from
+:mod:`benchmarks.server` and reports the throughput, latency and memory usage
+of each. Every workload runs in a separate process so their peak RSS values
+do not affect each other. Python 2 has no allocation tracer, so the number of
+objects tracked by the garbage collector that are left behind by a workload
+is reported instead.
+
+Usage::
+
+    python -m benchmarks.run                          # run all workloads
+    python -m benchmarks.run --save-baseline base.json
+    python -m benchmarks.run --compare base.json      # exits 1 on regression
+
+"""
+
+import argparse
+import gc
+import json
+import resource
+import subprocess
+import sys
+import threading
+import time
+
+from .server import FakeAPIServer
+
+
+WORKLOADS = dict()
+
+
+def workload(func):
+    WORKLOADS[func.__name__] = func
+    return func
+
+
+@workload
+def github_commits_walk(github, bugzilla):
+    """Iterate over a lazy ``Repo.commits`` listing page by page."""
+    return sum(1 for _ in github.Repo(full_name='bench/repo').commits)
+
+
+@workload
+def github_commits_stream(github, bugzilla):
+    """Iterate over a lazy ``Repo.commits`` listing with streamed pages."""
+    github.GitHubModel._stream = True
+    try:
+        return sum(1 for _ in github.Repo(full_name='bench/repo').commits)
+    finally:
+        github.GitHubModel._stream = False
+
+
+@workload
+def github_commits_hold(github, bugzilla):
+    """Keep all the commits of a lazy ``Repo.commits`` listing in memory."""
+    return len(list(github.Repo(full_name='bench/repo').commits))
+
+
+@workload
+def github_commits_columns(github, bugzilla):
+    """Export the columns of a lazy ``Repo.commits`` listing."""
+    commits = github.Repo(full_name='bench/repo').commits
+    return len(commits.to_columns(['sha', 'commit.author.date'])['sha'])
+
+
+@workload
+def github_contributors(github, bugzilla):
+    """Load an eager ``Repo.contributors`` listing with all of its pages."""
+    return len(github.Repo(full_name='bench/repo').contributors)
+
+
+@workload
+def github_contributors_top(github, bugzilla):
+    """Get the first few items of an eager ``Repo.contributors`` listing."""
+    return len(github.Repo(full_name='bench/repo').contributors[:10])
+
+
+@workload
+def github_commit_authors(github, bugzilla):
+    """Read the embedded ``author`` of every commit in a listing."""
+    commits = github.Repo(full_name='bench/repo').commits
+    return len(set(commit.author.login for commit in commits))
+
+
+@workload
+def bugzilla_bug_many_fields(github, bugzilla):
+    """Fetch bugs and read every ``Many`` field of each."""
+    fields = ('attachments', 'blocks', 'cc', 'comments', 'depends_on',
+              'groups', 'history')
+    total = 0
+    for bug_id in xrange(1, 21):
+        bug = bugzilla.Bug.get(bug_id)
+        total += sum(len(getattr(bug, field)) for field in fields)
+    return total
+
+
+@workload
+def bugzilla_foreign_fanout(github, bugzilla):
+    """Read ``Attachment.bug`` for attachments one by one."""
+    attachments = [bugzilla.Attachment(id=i, bug_id=i + 1)
+                   for i in xrange(100)]
+    return len(set(attachment.bug.id for attachment in attachments))
+
+
+@workload
+def bugzilla_foreign_prefetch(github, bugzilla):
+    """Read ``Attachment.bug`` for attachments prefetched in bulk."""
+    from pyresto.core import WrappedList
+
+    attachments = WrappedList([dict(id=i, bug_id=i + 1) for i in xrange(100)],
+                              lambda data: bugzilla.Attachment(**data))
+    attachments.prefetch('bug')
+    return len(set(attachment.bug.id for attachment in attachments[:]))
+
+
+@workload
+def bugzilla_get_many(github, bugzilla):
+    """Load bugs in bulk by id with ``Bug.get_many``."""
+    return len(bugzilla.Bug.get_many(xrange(1, 501)))
+
+
+@workload
+def bugzilla_mirror_query(github, bugzilla):
+    """Query bugs in bulk loaded into a :class:`pyresto.mirror.Mirror`."""
+    from pyresto.mirror import Mirror
+
+    mirror = Mirror(':memory:')
+    mirror.register(bugzilla.Bug, indexes=('status', 'assigned_to.name'))
+    mirror.save(bugzilla.Bug.get_many(xrange(1, 501)))
+    return sum(len(mirror.query(bugzilla.Bug, {
+        'status': 'NEW', 'assigned_to.name': 'dev{0}'.format(i % 20)}))
+        for i in xrange(100))
+
+
+def _decode_commit_pages(loads):
+    """Decodes the same page of commits many times, keeping the results."""
+    from .server import Options, _commit
+
+    page = json.dumps([_commit(Options(payload_size=20), 'bench/repo', i)
+                       for i in xrange(100)])
+    return [loads(page) for _ in xrange(200)]
+
+
+@workload
+def decode_json(github, bugzilla):
+    """Decode commit listings with :func:`json.loads`."""
+    return len(_decode_commit_pages(json.loads))
+
+
+@workload
+def decode_interned(github, bugzilla):
+    """Decode commit listings with :class:`pyresto.decoders.JSONDecoder`."""
+    from pyresto.decoders import JSONDecoder
+
+    return len(_decode_commit_pages(JSONDecoder()))
+
+
+def _percentile(values, percent):
+    if not values:
+        return None
+    values = sorted(values)
+    index = min(len(values) - 1, int(round(percent / 100.0 * len(values))))
+    return values[index]
+
+
+def _measure_requests(latencies):
+    """Wraps :meth:`Model._request` to record the latency of each request."""
+    from pyresto.core import Model
+
+    request = Model._request.__func__
+    lock = threading.Lock()
+
+    def timed(cls, *args, **kwargs):
+        start = time.time()
+        try:
+            return request(cls, *args, **kwargs)
+        finally:
+            with lock:
+                latencies.append(time.time() - start)
+
+    Model._request = classmethod(timed)
+
+
+def run_workload(name, repeat, server_options):
+    """Runs the workload in the current process and returns its results."""
+    import pyresto.apis.github as github
+    from pyresto.apis.bugzilla import Service
+
+    latencies = list()
+    _measure_requests(latencies)
+
+    with FakeAPIServer(**server_options) as server:
+        github.GitHubModel._url_base = server.github_url
+        bugzilla = Service('bench', server.bugzilla_url)
+
+        func = WORKLOADS[name]
+        gc.collect()
+        objects_before = len(gc.get_objects())
+        durations = list()
+        for _ in xrange(repeat):
+            start = time.time()
+            func(github, bugzilla)
+            durations.append(time.time() - start)
+        gc.collect()
+        objects_after = len(gc.get_objects())
+        requests = server.request_count
+
+    total = sum(durations)
+    return dict(
+        workload=name,
+        runs=repeat,
+        requests=requests,
+        requests_per_second=requests / total if total else None,
+        run_seconds_p50=_percentile(durations, 50),
+        request_seconds_p50=_percentile(latencies, 50),
+        request_seconds_p99=_percentile(latencies, 99),
+        peak_rss_kb=resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        gc_objects_retained=objects_after - objects_before,
+    )
+
+
+def run_isolated(name, args):
+    command = [sys.executable, '-m', 'benchmarks.run', '--child', name,
+               '--repeat', str(args.repeat), '--pages', str(args.pages),
+               '--per-page', str(args.per_page), '--payload-size',
+               str(args.payload_size), '--latency', str(args.latency)]
+    return json.loads(subprocess.check_output(command))
+
+
+def compare(results, baseline, tolerance):
+    """
+    Returns a list of regression messages, comparing the throughput, the p99
+    latency and the peak RSS of each workload with the baseline.
+
+    """
+
+    regressions = list()
+    for name, result in sorted(results.iteritems()):
+        base = baseline.get(name)
+        if not base:
+            continue
+
+        checks = (('requests_per_second', -1), ('request_seconds_p99', 1),
+                  ('peak_rss_kb', 1), ('requests', 1))
+        for key, direction in checks:
+            old, new = base.get(key), result.get(key)
+            if not old or new is None:
+                continue
+
+            change = (new - old) / float(old) * direction
+            if change > tolerance:
+                regressions.append('{0}: {1} {2} -> {3} ({4:+.0%})'.format(
+                    name, key, old, new, change * direction))
+
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[1])
+    parser.add_argument('workloads', nargs='*', metavar='workload',
+                        help='the workloads to run, all by default: ' +
+                             ', '.join(sorted(WORKLOADS)))
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--pages', type=int, default=10)
+    parser.add_argument('--per-page', type=int, default=100)
+    parser.add_argument('--payload-size', type=int, default=200)
+    parser.add_argument('--latency', type=float, default=0.005,
+                        help='seconds of latency injected per response')
+    parser.add_argument('--save-baseline', metavar='PATH')
+    parser.add_argument('--compare', metavar='PATH')
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help='allowed relative regression for --compare')
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    unknown = set(args.workloads) - set(WORKLOADS)
+    if unknown:
+        parser.error('unknown workloads: ' + ', '.join(sorted(unknown)))
+
+    if args.child:
+        print json.dumps(run_workload(args.child, args.repeat, dict(
+            pages=args.pages, per_page=args.per_page,
+            payload_size=args.payload_size, latency=args.latency)))
+        return 0
+
+    results = dict()
+    row = '{workload:<28} {run_seconds_p50:>9.4f} {requests:>8} ' \
+          '{requests_per_second:>10.1f} {request_seconds_p50:>9.4f} ' \
+          '{request_seconds_p99:>9.4f} {peak_rss_kb:>10} ' \
+          '{gc_objects_retained:>8}'
+    print '{0:<28} {1:>9} {2:>8} {3:>10} {4:>9} {5:>9} {6:>10} {7:>8}'.format(
+        'workload', 'run (s)', 'requests', 'req/s', 'p50 (s)', 'p99 (s)',
+        'rss (kB)', 'objects')
+    for name in args.workloads or sorted(WORKLOADS):
+        result = results[name] = run_isolated(name, args)
+        print row.format(**dict((key, float('nan') if value is None else value)
+                                for key, value in result.iteritems()))
+
+    if args.save_baseline:
+        with open(args.save_baseline, 'w') as baseline_file:
+            json.dump(results, baseline_file, indent=2, sort_keys=True)
+
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            regressions = compare(results, json.load(baseline_file),
+                                  args.tolerance)
+        for regression in regressions:
+            print 'REGRESSION', regression
+        return 1 if regressions else 0
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
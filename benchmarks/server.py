@@ -0,0 +1,262 @@
+# coding: utf-8
+
+"""
+benchmarks.server
+~~~~~~~~~~~~~~~~~
+
+A local HTTP server serving synthetic GitHub and Bugzilla API data for the
+benchmarks. Listings are paginated with GitHub style ``Link`` headers and the
+number of pages, the size of the payloads and the latency of each response
+are configurable.
+
+"""
+
+import BaseHTTPServer
+import SocketServer
+import json
+import re
+import threading
+import time
+import urlparse
+
+
+__all__ = ('FakeAPIServer',)
+
+
+class Options(object):
+    def __init__(self, pages=10, per_page=100, payload_size=200, latency=0.0,
+                 bugs=1000):
+        self.pages = pages
+        self.per_page = per_page
+        self.payload_size = payload_size
+        self.latency = latency
+        self.bugs = bugs
+
+
+def _user(login):
+    return dict(login=login, id=abs(hash(login)) % 100000,
+                url='/users/' + login, type='User')
+
+
+def _commit(options, repo, index):
+    sha = '{0:040x}'.format(index)
+    author = _user('author{0}'.format(index % 50))
+    return dict(sha=sha, url='/repos/{0}/commits/{1}'.format(repo, sha),
+                commit=dict(message='x' * options.payload_size,
+                            author=dict(name=author['login'],
+                                        date='2012-01-01T00:00:00Z')),
+                author=author, committer=author)
+
+
+def _bug(options, bug_id):
+    return dict(id=bug_id, status='NEW', priority='P{0}'.format(bug_id % 5),
+                summary='s' * options.payload_size,
+                assigned_to=dict(name='dev{0}'.format(bug_id % 20)),
+                creator=dict(name='reporter{0}'.format(bug_id % 30)),
+                last_change_time='2012-01-01T00:00:00Z')
+
+
+_bug_many_fields = {
+    'attachments': lambda o, b: [dict(id=b * 10 + i, bug_id=b,
+                                      attacher=dict(name='a'))
+                                 for i in xrange(3)],
+    'blocks': lambda o, b: [b + 1, b + 2],
+    'cc': lambda o, b: [dict(name='cc{0}'.format(i)) for i in xrange(5)],
+    'comments': lambda o, b: [dict(id=b * 100 + i, text='c' * o.payload_size,
+                                   creator=dict(name='c'))
+                              for i in xrange(10)],
+    'depends_on': lambda o, b: [b - 1],
+    'groups': lambda o, b: [dict(name='core')],
+    'history': lambda o, b: [dict(changer=dict(name='h'), changes=[])
+                             for i in xrange(5)],
+}
+
+
+class _Handler(BaseHTTPServer.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep-alive
+    # send each response in one go to avoid Nagle and delayed ACK stalls
+    wbufsize = -1
+    disable_nagle_algorithm = True
+
+    routes = (
+        (r'^/repos/([^/]+/[^/]+)/commits/(\w+)$', 'commit'),
+        (r'^/repos/([^/]+/[^/]+)/commits$', 'commits'),
+        (r'^/repos/([^/]+/[^/]+)/contributors$', 'contributors'),
+        (r'^/repos/([^/]+/[^/]+)$', 'repo'),
+        (r'^/users/([^/]+)$', 'user'),
+        (r'^/bugzilla/bug/(\d+)$', 'bug'),
+        (r'^/bugzilla/bug/(\d+)/(comment|history)$', 'bug_field'),
+        (r'^/bugzilla/bug$', 'bugs'),
+        (r'^/bugzilla/attachment/(\d+)$', 'attachment'),
+    )
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.request_count += 1
+
+        if server.options.latency:
+            time.sleep(server.options.latency)
+
+        parts = urlparse.urlsplit(self.path)
+        self.query = dict(urlparse.parse_qsl(parts.query))
+        for pattern, name in self.routes:
+            match = re.match(pattern, parts.path)
+            if match:
+                return getattr(self, 'get_' + name)(*match.groups())
+
+        self.respond(404, dict(message='Not Found'))
+
+    def respond(self, status, data, links=None):
+        body = json.dumps(data)
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        if links:
+            self.send_header('Link', ', '.join(
+                '<{0}>; rel="{1}"'.format(url, rel)
+                for rel, url in links.iteritems()))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def paginate(self, make_item):
+        options = self.server.options
+        page = int(self.query.get('page', 1))
+        per_page = int(self.query.get('per_page', options.per_page))
+        start = (page - 1) * per_page
+        items = [make_item(start + i) for i in xrange(per_page)]
+
+        links = dict()
+        if page < options.pages:
+            base = 'http://{0}:{1}{2}'.format(
+                self.server.server_address[0], self.server.server_address[1],
+                urlparse.urlsplit(self.path).path)
+            query = dict(self.query, per_page=per_page)
+            links['next'] = base + '?' + '&'.join(
+                '{0}={1}'.format(k, v) for k, v in
+                sorted(dict(query, page=page + 1).iteritems()))
+            links['last'] = base + '?' + '&'.join(
+                '{0}={1}'.format(k, v) for k, v in
+                sorted(dict(query, page=options.pages).iteritems()))
+
+        self.respond(200, items if page <= options.pages else list(), links)
+
+    def get_repo(self, name):
+        self.respond(200, dict(full_name=name, name=name.split('/')[1],
+                               owner=_user(name.split('/')[0]),
+                               description='d' * self.server.options.
+                               payload_size))
+
+    def get_commits(self, repo):
+        self.paginate(lambda i: _commit(self.server.options, repo, i))
+
+    def get_commit(self, repo, sha):
+        commit = _commit(self.server.options, repo, int(sha, 16))
+        commit['stats'] = dict(additions=1, deletions=1, total=2)
+        self.respond(200, commit)
+
+    def get_contributors(self, repo):
+        self.paginate(lambda i: _user('user{0}'.format(i)))
+
+    def get_user(self, login):
+        self.respond(200, _user(login))
+
+    def get_bug(self, bug_id):
+        options = self.server.options
+        bug_id = int(bug_id)
+        if bug_id > options.bugs:
+            return self.respond(404, dict(error=True))
+
+        fields = self.query.get('include_fields', '_all').split(',')
+        if fields == ['_all']:
+            return self.respond(200, _bug(options, bug_id))
+
+        data = dict()
+        for field in fields:
+            if field in _bug_many_fields:
+                data[field] = _bug_many_fields[field](options, bug_id)
+            else:
+                data[field] = _bug(options, bug_id).get(field)
+        self.respond(200, data)
+
+    def get_bug_field(self, bug_id, endpoint):
+        options = self.server.options
+        bug_id = int(bug_id)
+        if bug_id > options.bugs:
+            return self.respond(404, dict(error=True))
+
+        field = 'comments' if endpoint == 'comment' else endpoint
+        self.respond(200, {field: _bug_many_fields[field](options, bug_id)})
+
+    def get_bugs(self):
+        options = self.server.options
+        ids = [int(bug_id) for bug_id in self.query.get('id', '').split(',')
+               if bug_id]
+        self.respond(200, dict(bugs=[_bug(options, bug_id) for bug_id in ids
+                                     if bug_id <= options.bugs]))
+
+    def get_attachment(self, attachment_id):
+        attachment_id = int(attachment_id)
+        self.respond(200, dict(id=attachment_id,
+                               bug_id=attachment_id % self.server.options.bugs
+                               + 1, attacher=dict(name='a'),
+                               file_name='patch.diff'))
+
+
+class _Server(SocketServer.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    daemon_threads = True
+
+
+class FakeAPIServer(object):
+    """
+    Runs the fake API server in a background thread::
+
+        with FakeAPIServer(pages=20, latency=0.01) as server:
+            print server.github_url, server.bugzilla_url
+
+    """
+
+    def __init__(self, **options):
+        self.options = Options(**options)
+        self.__server = None
+
+    @property
+    def url(self):
+        host, port = self.__server.server_address
+        return 'http://{0}:{1}'.format(host, port)
+
+    @property
+    def github_url(self):
+        return self.url
+
+    @property
+    def bugzilla_url(self):
+        return self.url + '/bugzilla/'
+
+    @property
+    def request_count(self):
+        return self.__server.request_count
+
+    def start(self):
+        server = self.__server = _Server(('127.0.0.1', 0), _Handler)
+        server.options = self.options
+        server.request_count = 0
+        server.lock = threading.Lock()
+
+        thread = threading.Thread(target=server.serve_forever)
+        thread.daemon = True
+        thread.start()
+
+    def stop(self):
+        self.__server.shutdown()
+        self.__server.server_close()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
@@ -3,11 +3,12 @@
 from operator import itemgetter  # built-in
 
 from ...auth import UserQSAuth, AuthList, enable_auth
-from ...core import Foreign, Many, Model
+from ...core import Delta, Foreign, Many, Model, RelationGroup
 
 
 class BugzillaModel(Model):
     _url_base = __service_url__  # NOQA
+    _projection_param = 'include_fields'
 
     def __repr__(self):
         if hasattr(self, 'ref'):
@@ -72,18 +73,42 @@ class Attachment(BugzillaModel):
 class Bug(BugzillaModel):
     _path = 'bug/{id}'
     _pk = 'id'
+    _batch_parser = staticmethod(itemgetter('bugs'))
+
+    # the many fields which can be synced incrementally, with the endpoints
+    # accepting the new_since parameter and the fields of their items to
+    # compare against it, see Delta
+    _delta_fields = dict(comments=('comment', 'creation_time'),
+                         history=('history', 'change_time'))
 
     @classmethod
     def init_many_fields(cls, many_fields):
+        # sibling fields are fetched together, see RelationGroup
+        cls._many_fields = RelationGroup(cls._path +
+                                         '?include_fields={fields}')
         for field, model in many_fields.iteritems():
             path = cls._path + '?include_fields=' + field
             if model is cls:
-                preprocessor = lambda d: list(dict(id=b) for b in d[field])
+                preprocessor = lambda d, field=field: list(dict(id=b)
+                                                           for b in d[field])
             else:
                 preprocessor = itemgetter(field)
-            setattr(cls, field, Many(model, path, preprocessor=preprocessor))
+
+            delta = None
+            if field in cls._delta_fields:
+                # new_since is ignored with include_fields, so only the syncs
+                # use the own endpoints of these fields
+                endpoint, mark = cls._delta_fields[field]
+                delta = Delta('new_since', mark,
+                              path=cls._path + '/' + endpoint)
+
+            setattr(cls, field, cls._many_fields.add(
+                field, Many(model, path, preprocessor=preprocessor,
+                            delta=delta)))
         cls._path = cls._path + '?include_fields=_all&exclude_fields=' + \
                    ','.join(many_fields.keys())
+        cls._batch_path = 'bug?id={ids}&include_fields=_all&exclude_fields=' + \
+                          ','.join(many_fields.keys())
 
         return cls
 
@@ -1,11 +1,13 @@
 # coding: utf-8
 
-from ...auth import HTTPBasicAuth, AppQSAuth, AuthList, enable_auth
-from ...core import Foreign, Many, Model
+from ...auth import HTTPBasicAuth, AppQSAuth, AuthPool, AuthList, enable_auth
+from ...core import Delta, Foreign, Many, Model
+from ...ratelimit import RateLimitScheduler
 
 
 class GitHubModel(Model):
     _url_base = 'https://api.github.com'
+    _scheduler = RateLimitScheduler()
 
     def __repr__(self):
         if hasattr(self, '_links'):
@@ -26,6 +28,8 @@ class Comment(GitHubModel):
 class Commit(GitHubModel):
     _path = '/repos/{repo_name}/commits/{sha}'
     _pk = ('repo_name', 'sha')
+    _fields = ('sha', 'node_id', 'url', 'html_url', 'comments_url', 'commit',
+               'parents')
     comments = Many(Comment, '{self._current_path}/comments?per_page=100')
 
 
@@ -51,7 +55,9 @@ class Key(GitHubModel):
 class Repo(GitHubModel):
     _path = '/repos/{full_name}'
     _pk = 'full_name'
-    commits = Many(Commit, '{self._current_path}/commits?per_page=100', lazy=True)
+    commits = Many(Commit, '{self._current_path}/commits?per_page=100', lazy=True,
+                   delta=Delta('since', 'commit.committer.date',
+                               newest_first=True))
     comments = Many(Comment, '{self._current_path}/comments?per_page=100')
     tags = Many(Tag, '{self._current_path}/tags?per_page=100')
     branches = Many(Branch, '{self._current_path}/branches?per_page=100')
@@ -86,7 +92,7 @@ User.follower_list = Many(User, '{self._current_path}/followers?per_page=100')
 User.watched = Many(Repo, '{self._current_path}/watched?per_page=100')
 
 # Define authentication methods
-auths = AuthList(basic=HTTPBasicAuth, app=AppQSAuth)
+auths = AuthList(basic=HTTPBasicAuth, app=AppQSAuth, pool=AuthPool)
 
 # Enable and publish global authentication
 auth = enable_auth(auths, GitHubModel, 'app')
@@ -1,7 +1,13 @@
+import threading
+import time
+import urlparse
+
 import requests.auth
 
 from abc import ABCMeta, abstractmethod
 
+from .ratelimit import RateBudget
+
 
 class InvalidAuthTypeException(ValueError):
     """
@@ -23,16 +29,23 @@ class Auth(requests.auth.AuthBase):
         return r
 
 
+def _add_query_params(req, params):
+    # Redirected requests are authenticated again, don't repeat the params
+    query = urlparse.parse_qs(urlparse.urlsplit(req.url).query)
+    if not any(name in query for name, value in params):
+        req.prepare_url(req.url, params)
+
+    return req
+
+
 class AppQSAuth(Auth):
     def __init__(self, client_id, client_secret):
         self.client_id = client_id
         self.client_secret = client_secret
 
     def __call__(self, req):
-        if not req.redirect:
-            req.params['client_id'] = self.client_id
-            req.params['client_secret'] = self.client_secret
-        return req
+        return _add_query_params(req, (('client_id', self.client_id),
+                                       ('client_secret', self.client_secret)))
 
 
 class UserQSAuth(Auth):
@@ -41,16 +54,116 @@ class UserQSAuth(Auth):
         self.password = password
 
     def __call__(self, req):
-        if not req.redirect:
-            req.params['username'] = self.username
-            req.params['password'] = self.password
-        return req
+        return _add_query_params(req, (('username', self.username),
+                                       ('password', self.password)))
 
 
-class HTTPBasicAuth(Auth, requests.auth.AuthBase):
+class HTTPBasicAuth(requests.auth.HTTPBasicAuth, Auth):
     pass
 
 
+class AuthPool(Auth):
+    """
+    An authentication type holding many credentials to spread the requests
+    over their separate rate limit budgets. Each request is made with the
+    credential having the most remaining budget, skipping the ones which are
+    exhausted or throttled until they are reset. See
+    :class:`pyresto.ratelimit.RateLimitScheduler` which waits for the pool as
+    a whole when all the credentials are exhausted.
+
+    """
+
+    def __init__(self, credentials):
+        """
+        :param credentials: The authentication instances to use, such as
+                            :class:`HTTPBasicAuth` or :class:`AppQSAuth`
+                            instances.
+        :type credentials: list
+
+        """
+
+        self.credentials = tuple(credentials)
+        self.__budgets = tuple(RateBudget() for _ in self.credentials)
+        self.__lock = threading.Lock()
+
+    def select(self):
+        """
+        Returns the index of the credential to make the next request with.
+        Credentials without any known budget are tried first.
+
+        """
+
+        def score(index):
+            budget = self.__budgets[index]
+            remaining = (float('inf') if budget.remaining is None
+                         else budget.remaining)
+            return -budget.delay(), remaining
+
+        with self.__lock:
+            index = max(xrange(len(self.credentials)), key=score)
+            self.__budgets[index].last_request = time.time()
+
+        return index
+
+    def __call__(self, req):
+        index = self.select()
+
+        def update(response, **kwargs):
+            with self.__lock:
+                self.__budgets[index].update(response)
+            return response
+
+        req.register_hook('response', update)
+        return self.credentials[index](req)
+
+    def rate_budget(self):
+        """
+        Returns a :class:`pyresto.ratelimit.RateBudget` summing up the budgets
+        of all the credentials, which allows a request right away as long as
+        any of the credentials does.
+
+        """
+
+        total = RateBudget()
+        with self.__lock:
+            budgets = self.__budgets
+            known = [budget for budget in budgets
+                     if budget.remaining is not None]
+            if len(known) == len(budgets):
+                total.limit = sum(budget.limit or 0 for budget in budgets)
+                total.remaining = sum(budget.remaining for budget in budgets)
+                total.reset = max(budget.reset for budget in budgets)
+            total.used = sum(budget.used for budget in budgets)
+            total.blocked_until = min(budget.blocked_until
+                                      for budget in budgets)
+            total.last_request = max(budget.last_request for budget in budgets)
+
+        return total
+
+    def cache_key(self):
+        """
+        All the credentials of the pool are assumed to see the same data, so
+        the responses are cached for the pool as a whole.
+
+        """
+
+        return ('AuthPool', tuple(sorted(
+            (credential.__class__.__name__,
+             sorted(getattr(credential, '__dict__', dict()).items()))
+            for credential in self.credentials)))
+
+    def usage(self):
+        """
+        Returns a list of dicts with the ``limit``, ``remaining``, ``reset``
+        and ``used`` values for each credential, in the same order with
+        :attr:`credentials`.
+
+        """
+
+        with self.__lock:
+            return [budget.as_dict() for budget in self.__budgets]
+
+
 class AuthList(dict):
     """
     An "attribute dict" which is basically a dict where item access can be done
@@ -61,7 +174,7 @@ class AuthList(dict):
     :data:`apis.github.auths` for example usage.
 
     .. literalinclude:: ../pyresto/apis/github/models.py
-        :lines: 102-103
+        :lines: 90-91
 
     """
     def __getattr__(self, attr):
@@ -77,7 +190,7 @@ def enable_auth(supported_types, base_model, default_type):
     :func:`apis.github.auth` for example usage.
 
     .. literalinclude:: ../pyresto/apis/github/models.py
-        :lines: 105-106
+        :lines: 93-94
 
     :param supported_types: A dict of supported types as ``"name": AuthClass``
                             pairs
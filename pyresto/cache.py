@@ -0,0 +1,341 @@
+# coding: utf-8
+
+"""
+pyresto.cache
+~~~~~~~~~~~~~
+
+This module contains the persistent HTTP response caches which can be plugged
+into :attr:`Model._response_cache <pyresto.core.Model._response_cache>`.
+Responses having an ``ETag`` or a ``Last-Modified`` header are stored, and
+are revalidated with ``If-None-Match`` and ``If-Modified-Since`` headers on
+the next request. If the server replies with ``304 Not Modified``, the stored
+response is used instead::
+
+    import pyresto.apis.github as GitHub
+    from pyresto.cache import SQLiteCache
+
+    GitHub.GitHubModel._response_cache = SQLiteCache('github.sqlite',
+                                                     max_size=256 << 20)
+
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import zlib
+
+from abc import ABCMeta, abstractmethod
+
+from requests.models import Response
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+
+__all__ = ('ResponseCache', 'SQLiteCache', 'FileCache')
+
+
+class ResponseCache(object):
+    """
+    Abstract base class for the persistent response caches. Subclasses only
+    need to implement the storage through the :meth:`_load`, :meth:`_save`
+    and :meth:`_evict` methods.
+
+    """
+
+    __metaclass__ = ABCMeta
+
+    #: Only these response headers are stored along with the body.
+    stored_headers = ('Content-Type', 'ETag', 'Last-Modified', 'Link')
+
+    def __init__(self, max_size=None, compress=True):
+        """
+        :param max_size: (optional) The maximum total size of the stored
+                         entries in bytes. The least recently used entries are
+                         evicted when this is exceeded.
+        :type max_size: int or None
+
+        :param compress: (optional) Whether to compress the stored entries
+                         with :mod:`zlib`.
+        :type compress: boolean
+
+        """
+
+        self.max_size = max_size
+        self.compress = compress
+
+        #: The number of responses served from the cache.
+        self.hits = 0
+
+        #: The number of full responses received for cacheable requests.
+        self.misses = 0
+
+    @staticmethod
+    def make_key(url, params=None, auth=None):
+        """
+        Creates the cache key for a request. Responses for different
+        credentials are stored separately, without keeping the credentials
+        themselves in the key. Auth types can define a ``cache_key`` method to
+        control this.
+
+        """
+
+        parts = [url, json.dumps(params, sort_keys=True)]
+        if auth is not None:
+            if hasattr(auth, 'cache_key'):
+                identity = auth.cache_key()
+            else:
+                identity = (auth.__class__.__name__,
+                            sorted(getattr(auth, '__dict__', dict()).items()))
+            parts.append(hashlib.sha1(repr(identity)).hexdigest())
+
+        return '\n'.join(parts)
+
+    def revalidation_headers(self, key):
+        """
+        Returns the conditional request headers for the stored response under
+        ``key`` or an empty dict if there isn't any.
+
+        """
+
+        entry = self.__read(key)
+        if entry is None:
+            return dict()
+
+        headers = entry[0]
+        conditions = dict()
+        if 'ETag' in headers:
+            conditions['If-None-Match'] = headers['ETag']
+        if 'Last-Modified' in headers:
+            conditions['If-Modified-Since'] = headers['Last-Modified']
+
+        return conditions
+
+    def get(self, key, not_modified=None):
+        """
+        Returns the stored response under ``key`` as a
+        :class:`requests.Response` or ``None`` if there isn't any.
+
+        :param not_modified: (optional) The ``304`` response received from the
+                             server, used to fill the request related fields
+                             of the returned response.
+        :type not_modified: :class:`requests.Response`
+
+        """
+
+        entry = self.__read(key)
+        if entry is None:
+            return None
+
+        self.hits += 1
+        headers, content, url = entry
+
+        response = Response()
+        response.status_code = 200
+        response.headers = CaseInsensitiveDict(headers)
+        response.encoding = get_encoding_from_headers(response.headers)
+        response.url = url
+        response._content = content
+        response._content_consumed = True  # iter_content reads _content
+        response.from_cache = True
+        if not_modified is not None:
+            response.request = not_modified.request
+            response.elapsed = not_modified.elapsed
+            response.connection = getattr(not_modified, 'connection', None)
+
+        return response
+
+    def set(self, key, response):
+        """
+        Stores the given response under ``key`` if it can be revalidated
+        later.
+
+        """
+
+        self.misses += 1
+        headers = dict((name, response.headers[name])
+                       for name in self.stored_headers
+                       if name in response.headers)
+        if 'ETag' not in headers and 'Last-Modified' not in headers:
+            return
+
+        value = json.dumps([headers, response.url]) + '\n' + response.content
+        if self.compress:
+            value = zlib.compress(value)
+
+        self._save(key, value)
+        if self.max_size is not None:
+            self._evict(self.max_size)
+
+    def __read(self, key):
+        value = self._load(key)
+        if value is None:
+            return None
+
+        if self.compress:
+            value = zlib.decompress(value)
+
+        meta, content = value.split('\n', 1)
+        headers, url = json.loads(meta)
+
+        return headers, content, url
+
+    @abstractmethod
+    def _load(self, key):
+        """Returns the stored bytes for ``key`` or ``None``."""
+
+    @abstractmethod
+    def _save(self, key, value):
+        """Stores ``value`` bytes under ``key``."""
+
+    @abstractmethod
+    def _evict(self, max_size):
+        """
+        Removes the least recently used entries until the total size of the
+        entries is not more than ``max_size``. Called after every
+        :meth:`_save`, so it should return quickly when there is nothing to
+        evict.
+
+        """
+
+
+class SQLiteCache(ResponseCache):
+    """A :class:`ResponseCache` storing all responses in a SQLite database."""
+
+    def __init__(self, path, **kwargs):
+        super(SQLiteCache, self).__init__(**kwargs)
+        self.__lock = threading.Lock()
+        self.__db = sqlite3.connect(path, check_same_thread=False)
+        with self.__lock, self.__db:
+            self.__db.execute('CREATE TABLE IF NOT EXISTS responses ('
+                              'key TEXT PRIMARY KEY, value BLOB, '
+                              'size INTEGER, accessed REAL)')
+            self.__db.execute('CREATE INDEX IF NOT EXISTS responses_accessed '
+                              'ON responses (accessed)')
+            self.__size = self.__total()
+
+    def __total(self):
+        return self.__db.execute('SELECT COALESCE(SUM(size), 0) '
+                                 'FROM responses').fetchone()[0]
+
+    def _load(self, key):
+        with self.__lock, self.__db:
+            row = self.__db.execute('SELECT value FROM responses WHERE key=?',
+                                    (key,)).fetchone()
+            if row is None:
+                return None
+
+            self.__db.execute('UPDATE responses SET accessed=? WHERE key=?',
+                              (time.time(), key))
+
+        return str(row[0])
+
+    def _save(self, key, value):
+        with self.__lock, self.__db:
+            row = self.__db.execute('SELECT size FROM responses WHERE key=?',
+                                    (key,)).fetchone()
+            self.__db.execute('INSERT OR REPLACE INTO responses '
+                              'VALUES (?, ?, ?, ?)',
+                              (key, sqlite3.Binary(value), len(value),
+                               time.time()))
+            self.__size += len(value) - (row[0] if row else 0)
+
+    def _evict(self, max_size):
+        with self.__lock, self.__db:
+            if self.__size <= max_size:
+                return
+
+            # other processes may share the database, count the rows again
+            total = self.__total()
+            evicted = list()
+            rows = self.__db.execute('SELECT key, size FROM responses '
+                                     'ORDER BY accessed')
+            for key, size in rows:
+                if total <= max_size:
+                    break
+                total -= size
+                evicted.append((key,))
+
+            self.__db.executemany('DELETE FROM responses WHERE key=?',
+                                  evicted)
+            self.__size = total
+
+
+class FileCache(ResponseCache):
+    """
+    A :class:`ResponseCache` storing each response in a separate file under
+    the given directory.
+
+    """
+
+    def __init__(self, directory, **kwargs):
+        super(FileCache, self).__init__(**kwargs)
+        self.directory = directory
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+
+        self.__lock = threading.Lock()
+        self.__size = sum(size for _, size, _ in self.__entries())
+
+    def __entries(self):
+        """Returns the modification time, size and name of each entry."""
+        entries = list()
+        for name in os.listdir(self.directory):
+            try:
+                stat = os.stat(os.path.join(self.directory, name))
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, name))
+
+        return entries
+
+    def __path(self, key):
+        return os.path.join(self.directory, hashlib.sha1(key).hexdigest())
+
+    def _load(self, key):
+        path = self.__path(key)
+        try:
+            with open(path, 'rb') as cache_file:
+                value = cache_file.read()
+        except IOError:
+            return None
+
+        os.utime(path, None)  # mark as recently used
+        return value
+
+    def _save(self, key, value):
+        # write to a temporary file first so readers never see partial data
+        handle, temp_path = tempfile.mkstemp(dir=self.directory)
+        with os.fdopen(handle, 'wb') as cache_file:
+            cache_file.write(value)
+
+        path = self.__path(key)
+        with self.__lock:
+            try:
+                replaced = os.path.getsize(path)
+            except OSError:
+                replaced = 0
+            os.rename(temp_path, path)
+            self.__size += len(value) - replaced
+
+    def _evict(self, max_size):
+        with self.__lock:
+            if self.__size <= max_size:
+                return
+
+            # other processes may share the directory, list it again
+            entries = sorted(self.__entries())
+            total = sum(size for _, size, _ in entries)
+            for mtime, size, name in entries:
+                if total <= max_size:
+                    break
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except OSError:
+                    continue
+                total -= size
+
+            self.__size = total
@@ -0,0 +1,133 @@
+# coding: utf-8
+
+"""
+pyresto.checkpoint
+~~~~~~~~~~~~~~~~~~
+
+This module contains the stores keeping the progress of long iterations over
+lazy :class:`Many <pyresto.core.Many>` relations, so they can be resumed
+where they were left after a restart instead of starting over. See
+:meth:`LazyList.resumable <pyresto.core.LazyList.resumable>`::
+
+    from pyresto.checkpoint import SQLiteCheckpointStore
+
+    store = SQLiteCheckpointStore('crawl.sqlite')
+    for commit in repo.commits.resumable(store, 'commits:BYK/pyresto'):
+        process(commit)
+
+"""
+
+import collections
+import hashlib
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+from abc import ABCMeta, abstractmethod
+
+
+__all__ = ('Checkpoint', 'CheckpointStore', 'SQLiteCheckpointStore',
+           'FileCheckpointStore')
+
+
+#: The position of an iteration over a paginated collection: the URL and the
+#: index of the page holding the next item, and the number of items of the
+#: page which are already consumed.
+Checkpoint = collections.namedtuple('Checkpoint', 'url page offset')
+
+
+class CheckpointStore(object):
+    """
+    Abstract base class for the checkpoint stores. Subclasses only need to
+    implement :meth:`load`, :meth:`save` and :meth:`delete`.
+
+    """
+
+    __metaclass__ = ABCMeta
+
+    @abstractmethod
+    def load(self, key):
+        """Returns the :class:`Checkpoint` saved under ``key`` or ``None``."""
+
+    @abstractmethod
+    def save(self, key, checkpoint):
+        """Saves the given :class:`Checkpoint` under ``key``."""
+
+    @abstractmethod
+    def delete(self, key):
+        """Removes the checkpoint saved under ``key``, if there is any."""
+
+
+class SQLiteCheckpointStore(CheckpointStore):
+    """
+    A :class:`CheckpointStore` keeping all the checkpoints in a SQLite
+    database.
+
+    """
+
+    def __init__(self, path):
+        self.__lock = threading.Lock()
+        self.__db = sqlite3.connect(path, check_same_thread=False)
+        with self.__lock, self.__db:
+            self.__db.execute('CREATE TABLE IF NOT EXISTS checkpoints ('
+                              'key TEXT PRIMARY KEY, url TEXT, '
+                              'page INTEGER, offset INTEGER, saved REAL)')
+
+    def load(self, key):
+        with self.__lock:
+            row = self.__db.execute('SELECT url, page, offset FROM '
+                                    'checkpoints WHERE key=?',
+                                    (key,)).fetchone()
+
+        return row and Checkpoint(*row)
+
+    def save(self, key, checkpoint):
+        with self.__lock, self.__db:
+            self.__db.execute('INSERT OR REPLACE INTO checkpoints '
+                              'VALUES (?, ?, ?, ?, ?)',
+                              (key,) + tuple(checkpoint) + (time.time(),))
+
+    def delete(self, key):
+        with self.__lock, self.__db:
+            self.__db.execute('DELETE FROM checkpoints WHERE key=?', (key,))
+
+
+class FileCheckpointStore(CheckpointStore):
+    """
+    A :class:`CheckpointStore` keeping each checkpoint in a separate JSON file
+    under the given directory.
+
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+
+    def __path(self, key):
+        return os.path.join(self.directory,
+                            hashlib.sha1(key).hexdigest() + '.json')
+
+    def load(self, key):
+        try:
+            with open(self.__path(key), 'rb') as checkpoint_file:
+                return Checkpoint(*json.load(checkpoint_file))
+        except IOError:
+            return None
+
+    def save(self, key, checkpoint):
+        # write to a temporary file first so a crash never leaves a partial
+        # checkpoint behind
+        handle, temp_path = tempfile.mkstemp(dir=self.directory)
+        with os.fdopen(handle, 'wb') as checkpoint_file:
+            json.dump(list(checkpoint), checkpoint_file)
+        os.rename(temp_path, self.__path(key))
+
+    def delete(self, key):
+        try:
+            os.remove(self.__path(key))
+        except OSError:
+            pass
@@ -0,0 +1,143 @@
+# coding: utf-8
+
+"""
+pyresto.columns
+~~~~~~~~~~~~~~~
+
+This module contains the columnar export used by
+:meth:`WrappedList.to_columns <pyresto.core.WrappedList.to_columns>` and
+:meth:`LazyList.to_columns <pyresto.core.LazyList.to_columns>`. Values are
+read straight from the parsed items, without creating :class:`Model
+<pyresto.core.Model>` instances, and collected into typed arrays::
+
+    columns = repo.commits.to_columns(['sha', 'commit.author.date'])
+    dates = columns['commit.author.date']
+
+NumPy arrays are built if NumPy is installed, :class:`array.array` objects
+otherwise.
+
+"""
+
+import array
+import collections
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+__all__ = ('to_columns',)
+
+_NoneType = type(None)
+_INTEGERS = frozenset((int, long))
+_NUMBERS = frozenset((int, long, float))
+
+
+def _getter(path):
+    """
+    Returns a function extracting the value at the dotted ``path`` from an
+    item, or ``None`` if any part of the path is missing. Numeric parts index
+    lists.
+
+    """
+
+    def get(item):
+        for part in parts:
+            if item is None:
+                return None
+            elif isinstance(item, dict):
+                item = item.get(part)
+            elif isinstance(item, (list, tuple)):
+                try:
+                    item = item[int(part)]
+                except (ValueError, IndexError):
+                    return None
+            elif hasattr(item.__class__, '_as_dict'):
+                # an already created model instance, read without fetching
+                # the missing fields
+                item = item._as_dict().get(part)
+            else:
+                return None
+
+        return item
+
+    parts = path.split('.')
+    return get
+
+
+def _typed(values):
+    """
+    Converts the list of ``values`` to the most specific array type holding
+    all of them. Integers become 64-bit integers, numbers become floats with
+    ``NaN`` for the missing values and booleans become booleans. Any other
+    column is kept as an object array with NumPy or as a list without it.
+
+    """
+
+    types = set(map(type, values))
+    missing = _NoneType in types
+    types.discard(_NoneType)
+
+    if types and not missing and types <= _INTEGERS:
+        try:
+            if numpy is not None:
+                return numpy.array(values, dtype=numpy.int64)
+            return array.array('l', values)
+        except OverflowError:
+            pass
+    elif types and types <= _NUMBERS:
+        values = [float('nan') if value is None else value
+                  for value in values]
+        if numpy is not None:
+            return numpy.array(values, dtype=numpy.float64)
+        return array.array('d', values)
+    elif types == set([bool]) and not missing:
+        if numpy is not None:
+            return numpy.array(values, dtype=numpy.bool_)
+        return array.array('b', values)
+    elif not types:  # an empty or completely missing column
+        if numpy is not None:
+            return numpy.array([float('nan')] * len(values))
+        return array.array('d', [float('nan')] * len(values))
+
+    if numpy is None:
+        return values
+
+    column = numpy.empty(len(values), dtype=object)
+    for index, value in enumerate(values):  # keeps nested lists intact
+        column[index] = value
+    return column
+
+
+def to_columns(items, paths):
+    """
+    Reads the values at the given dotted ``paths`` from the ``items`` and
+    returns an ordered dictionary mapping each path to an array of them.
+
+    :param items: The parsed JSON objects, or the :class:`Model
+                  <pyresto.core.Model>` instances, to read the values from.
+    :type items: iterable
+
+    :param paths: The dotted paths of the values, such as
+                  ``commit.author.date``. Numeric parts index lists, as in
+                  ``parents.0.sha``. Missing values are ``None``, or ``NaN``
+                  in numeric columns.
+    :type paths: iterable
+
+    :rtype: :class:`collections.OrderedDict`
+
+    """
+
+    paths = list(paths)
+    getters = [_getter(path) for path in paths]
+    values = [list() for _ in paths]
+    appends = [(getter, column.append)
+               for getter, column in zip(getters, values)]
+
+    for item in items:
+        for getter, append in appends:
+            append(getter(item))
+
+    return collections.OrderedDict((path, _typed(column))
+                                   for path, column in zip(paths, values))
@@ -0,0 +1,286 @@
+# coding: utf-8
+
+"""
+pyresto.concurrency
+~~~~~~~~~~~~~~~~~~~
+
+This module contains the small set of threading helpers pyresto uses to run
+HTTP requests concurrently, including the :class:`Executor` and
+:class:`Future` classes behind the asynchronous model API such as
+:meth:`Model.aget <pyresto.core.Model.aget>`.
+
+"""
+
+import Queue
+import sys
+import threading
+
+
+__all__ = ('TimeoutError', 'Future', 'Executor', 'SingleFlight', 'gather',
+           'map_concurrently')
+
+
+class TimeoutError(Exception):
+    """Raised when a :class:`Future` is not done in the given time."""
+
+
+class Future(object):
+    """
+    The result of an asynchronous call. It follows the interface of
+    ``concurrent.futures.Future`` so either can be used with pyresto.
+
+    """
+
+    def __init__(self):
+        self.__done = threading.Event()
+        self.__lock = threading.Lock()
+        self.__callbacks = list()
+        self.__result = None
+        self.__error = None
+
+    def done(self):
+        """Returns ``True`` if the call has finished."""
+        return self.__done.is_set()
+
+    def result(self, timeout=None):
+        """
+        Waits for the call to finish and returns its result, re-raising its
+        exception if it has failed.
+
+        :raises: :exc:`TimeoutError` if the call doesn't finish in
+                 ``timeout`` seconds.
+
+        """
+
+        if not self.__done.wait(timeout):
+            raise TimeoutError()
+
+        if self.__error:
+            raise self.__error[0], self.__error[1], self.__error[2]
+
+        return self.__result
+
+    def exception(self, timeout=None):
+        """
+        Waits for the call to finish and returns the exception it raised or
+        ``None`` if it has succeeded.
+
+        """
+
+        if not self.__done.wait(timeout):
+            raise TimeoutError()
+
+        return self.__error and self.__error[1]
+
+    def add_done_callback(self, callback):
+        """
+        Calls ``callback`` with the future when the call finishes, or right
+        away if it has already finished.
+
+        """
+
+        with self.__lock:
+            if not self.__done.is_set():
+                self.__callbacks.append(callback)
+                return
+
+        callback(self)
+
+    def set_result(self, result):
+        self.__result = result
+        self.__finish()
+
+    def set_exc_info(self, exc_info):
+        self.__error = exc_info
+        self.__finish()
+
+    def __finish(self):
+        with self.__lock:
+            self.__done.set()
+            callbacks, self.__callbacks = self.__callbacks, list()
+
+        for callback in callbacks:
+            callback(self)
+
+
+class Executor(object):
+    """
+    A bounded pool of daemon threads running the submitted calls. Threads are
+    started lazily, so creating an executor is cheap.
+
+    Never wait for a future from inside a call running on the same executor:
+    when all the threads are waiting, nothing is left to run the calls they
+    are waiting for.
+
+    """
+
+    def __init__(self, max_workers=8):
+        self.max_workers = max_workers
+        self.__queue = Queue.Queue()
+        self.__lock = threading.Lock()
+        self.__workers = 0
+
+    def submit(self, func, *args, **kwargs):
+        """
+        Schedules ``func(*args, **kwargs)`` and returns a :class:`Future` for
+        its result.
+
+        """
+
+        future = Future()
+        self.__queue.put((future, func, args, kwargs))
+
+        with self.__lock:
+            if self.__workers < self.max_workers:
+                self.__workers += 1
+                worker = threading.Thread(target=self.__work)
+                worker.daemon = True
+                worker.start()
+
+        return future
+
+    def map(self, func, iterable):
+        """
+        Calls ``func`` for every item in ``iterable`` concurrently and
+        returns the results in order.
+
+        """
+
+        return gather([self.submit(func, item) for item in iterable])
+
+    def __work(self):
+        while True:
+            future, func, args, kwargs = self.__queue.get()
+            try:
+                result = func(*args, **kwargs)
+            except Exception:
+                future.set_exc_info(sys.exc_info())
+            else:
+                future.set_result(result)
+
+
+class SingleFlight(object):
+    """
+    Runs only one call at a time for each key. The calls made with the same
+    key while one is running wait for it and share its result, or its
+    exception, instead of running again. Used to coalesce the concurrent
+    identical requests, see :attr:`Model._single_flight
+    <pyresto.core.Model._single_flight>`.
+
+    """
+
+    def __init__(self):
+        self.__lock = threading.Lock()
+        self.__calls = dict()
+
+        #: The number of calls which waited for another one with the same key
+        #: instead of running.
+        self.coalesced = 0
+
+    def do(self, key, func, *args, **kwargs):
+        """
+        Returns the result of ``func(*args, **kwargs)``, or of the call with
+        the same ``key`` already running, along with a boolean telling if the
+        result is shared with other calls. A shared result must be copied
+        before it is modified, since the other calls get the same object.
+
+        """
+
+        with self.__lock:
+            call = self.__calls.get(key)
+            if call is None:
+                call = self.__calls[key] = [Future(), 0]
+                leader = True
+            else:
+                call[1] += 1
+                self.coalesced += 1
+                leader = False
+
+        future = call[0]
+        if not leader:
+            return future.result(), True
+
+        try:
+            result = func(*args, **kwargs)
+        except Exception:
+            error = sys.exc_info()
+            self.__forget(key)
+            future.set_exc_info(error)
+            raise error[0], error[1], error[2]
+
+        shared = self.__forget(key) > 0
+        future.set_result(result)
+        return result, shared
+
+    def __forget(self, key):
+        """
+        Makes the later calls with ``key`` start over and returns the number
+        of the calls waiting for the current one.
+
+        """
+
+        with self.__lock:
+            return self.__calls.pop(key)[1]
+
+
+def gather(futures, timeout=None):
+    """
+    Waits for all the given futures and returns their results in order. The
+    first exception raised by any of the calls is re-raised.
+
+    :rtype: list
+
+    """
+
+    return [future.result(timeout) for future in futures]
+
+
+def map_concurrently(func, iterable, max_workers):
+    """
+    Works like the built-in :func:`map` but calls ``func`` from a bounded
+    number of threads. The results are returned in the same order with the
+    items in ``iterable`` and the first exception raised by ``func``, if any,
+    is re-raised in the calling thread.
+
+    :param max_workers: The maximum number of threads to use. The items are
+                        processed in the calling thread when this is less than
+                        2 or when there is only one item.
+    :type max_workers: int
+
+    :rtype: list
+
+    """
+
+    items = list(iterable)
+    if max_workers < 2 or len(items) < 2:
+        return map(func, items)
+
+    results = [None] * len(items)
+    errors = list()
+    indexes = iter(xrange(len(items)))
+    lock = threading.Lock()
+
+    def work():
+        while not errors:  # stop picking up new items after a failure
+            with lock:
+                index = next(indexes, None)
+            if index is None:
+                return
+
+            try:
+                results[index] = func(items[index])
+            except Exception:
+                errors.append(sys.exc_info())
+
+    workers = [threading.Thread(target=work)
+               for _ in xrange(min(max_workers, len(items)))]
+    for worker in workers:
+        worker.daemon = True
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    if errors:
+        raise errors[0][0], errors[0][1], errors[0][2]
+
+    return results
@@ -9,42 +9,439 @@ classes.
 
 """
 
+import Queue
 import collections
+import copy
 import json
 import logging
 import re
+import sys
+import threading
+import time
+import urllib
 import urlparse
+import warnings
+import weakref
 
 import requests
 
 from abc import ABCMeta, abstractproperty
+from requests.adapters import HTTPAdapter
 from urllib import quote
 
+from . import columns, metrics, streaming
+from .checkpoint import Checkpoint
+from .concurrency import Executor, SingleFlight, map_concurrently
+
 
 __all__ = ('ServerResponseException',
            'InvalidRestMethodException',
+           'ImplicitFetchException', 'ImplicitFetchWarning',
+           'SessionPool', 'IdentityMap', 'ImplicitFetchDetector',
+           'Projection', 'RelationCache', 'RelationGroup', 'Delta',
            'Relation', 'Model', 'Many', 'Foreign')
 
 ALLOWED_HTTP_METHODS = frozenset(('GET', 'POST', 'PUT', 'DELETE', 'PATCH'))
 
+_missing = object()  # sentinel for cache misses where None is a valid value
+
+_IDENTIFIER = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*$')
+
+# the instance variables of Model with their defaults which get slots on
+# models declaring Model._fields
+_INSTANCE_SLOTS = (('_fetched', False), ('_loaded_fields', None),
+                   ('_pyresto_owner', None), ('_pk_prefix', None),
+                   ('_Model__pk_vals', None),
+                   ('_Model__footprint', None))
+
+# the instance variables of Model which are not fields
+_INSTANCE_VARIABLES = frozenset([name for name, _ in _INSTANCE_SLOTS] +
+                                ['_auth'])
+
 
 class ServerResponseException(Exception):
     """Server response error class for pyresto."""
 
+    #: The HTTP status code of the response.
+    status_code = None
+
 
 class InvalidRestMethodException(ValueError):
     """A valid HTTP method is required to make a request."""
 
 
+class ImplicitFetchException(Exception):
+    """
+    Raised by an :class:`ImplicitFetchDetector` when too many implicit fetches
+    are made.
+
+    """
+
+
+class ImplicitFetchWarning(UserWarning):
+    """
+    Issued by an :class:`ImplicitFetchDetector` when too many implicit fetches
+    are made.
+
+    """
+
+
+class SessionPool(object):
+    """
+    A thread-safe pool of keep-alive :class:`requests.Session` objects. All
+    sessions handed out by a pool share a single :class:`HTTPAdapter`, and so a
+    single set of underlying connection pools, while every thread gets its own
+    :class:`requests.Session` instance since sessions themselves are not safe
+    to share between threads.
+
+    Pools are registered per :attr:`Model._url_base` through
+    :meth:`SessionPool.for_base` so all models talking to the same host reuse
+    the same connections.
+
+    """
+
+    __registry = dict()
+    __registry_lock = threading.Lock()
+
+    def __init__(self, pool_connections=10, pool_maxsize=10, pool_block=False,
+                 max_retries=0, keep_alive=True):
+        """
+        Constructor for session pools.
+
+        :param pool_connections: (optional) The number of per-host connection
+                                 pools to keep around.
+        :type pool_connections: int
+
+        :param pool_maxsize: (optional) The maximum number of connections to
+                             keep open to a single host.
+        :type pool_maxsize: int
+
+        :param pool_block: (optional) Whether to block and wait for a free
+                           connection instead of opening a throw-away one when
+                           ``pool_maxsize`` connections are already in use.
+        :type pool_block: boolean
+
+        :param max_retries: (optional) Passed to :class:`HTTPAdapter` as is.
+        :type max_retries: int
+
+        :param keep_alive: (optional) Set this to ``False`` to send
+                           ``Connection: close`` with every request.
+        :type keep_alive: boolean
+
+        """
+
+        self.__adapter = HTTPAdapter(pool_connections=pool_connections,
+                                     pool_maxsize=pool_maxsize,
+                                     pool_block=pool_block,
+                                     max_retries=max_retries)
+        self.__keep_alive = keep_alive
+        self.__local = threading.local()
+
+    @property
+    def session(self):
+        """The :class:`requests.Session` instance for the current thread."""
+        session = getattr(self.__local, 'session', None)
+        if session is None:
+            session = requests.Session()
+            session.mount('http://', self.__adapter)
+            session.mount('https://', self.__adapter)
+            if not self.__keep_alive:
+                session.headers['Connection'] = 'close'
+            self.__local.session = session
+
+        return session
+
+    def close(self):
+        """Closes all the connections held by the pool."""
+        self.__adapter.close()
+
+    @classmethod
+    def for_base(cls, url_base, **options):
+        """
+        Returns the pool registered for the given ``url_base``, creating it
+        with the given ``options`` if there isn't one yet. Note that the
+        options are only used when the pool is first created.
+
+        """
+
+        registry = cls.__registry
+        if url_base not in registry:
+            with cls.__registry_lock:
+                if url_base not in registry:
+                    registry[url_base] = cls(**options)
+
+        return registry[url_base]
+
+    @classmethod
+    def configure(cls, url_base, **options):
+        """
+        Replaces the pool registered for the given ``url_base`` with a new one
+        created using the given ``options`` and closes the old one.
+
+        """
+
+        with cls.__registry_lock:
+            old_pool = cls.__registry.get(url_base)
+            cls.__registry[url_base] = cls(**options)
+
+        if old_pool:
+            old_pool.close()
+
+
+class IdentityMap(object):
+    """
+    An identity map which makes sure the same resource is represented by a
+    single :class:`Model` instance. Instances are keyed by their class and
+    :attr:`Model._pk_vals`. Identity maps are opt-in and are activated for
+    the current thread using the ``with`` statement::
+
+        with IdentityMap():
+            user = User.get('octocat')
+            owner = Repo.get('octocat/Hello-World').owner
+            assert user is owner
+
+    While an identity map is active :meth:`Model.get` returns the already
+    fetched instance without making a request, and the :class:`Many` and
+    :class:`Foreign` relations return the already loaded instances. An
+    instance created from a listing that is not fetched yet is upgraded in
+    place when the full data arrives.
+
+    """
+
+    __local = threading.local()
+
+    def __init__(self):
+        self.__instances = dict()
+        self.__lock = threading.Lock()
+
+    def __enter__(self):
+        stack = self.__local.__dict__.setdefault('stack', list())
+        stack.append(self)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.__local.stack.pop()
+
+    def __len__(self):
+        return len(self.__instances)
+
+    @classmethod
+    def current(cls):
+        """
+        Returns the innermost active identity map for the current thread or
+        ``None`` if there isn't any.
+
+        """
+
+        stack = getattr(cls.__local, 'stack', None)
+        return stack[-1] if stack else None
+
+    def get(self, model, pk_vals):
+        """
+        Returns the registered instance of ``model`` with the given primary
+        key values or ``None``.
+
+        """
+
+        return self.__instances.get((model, tuple(pk_vals)))
+
+    def add(self, instance):
+        """
+        Registers the given ``instance`` if there is no registered instance
+        with the same key, and returns the registered instance.
+
+        """
+
+        key = (instance.__class__, tuple(instance._pk_vals))
+        with self.__lock:
+            return self.__instances.setdefault(key, instance)
+
+    def clear(self):
+        """Removes all registered instances."""
+        with self.__lock:
+            self.__instances.clear()
+
+
+class ImplicitFetchDetector(object):
+    """
+    A context manager counting the implicit fetches made when an attribute
+    missing from a partially loaded :class:`Model` instance, such as one
+    created from a listing, is read. These are grouped by the model, the
+    attribute and the line of code reading it::
+
+        with ImplicitFetchDetector(threshold=10, action='raise') as detector:
+            for commit in repo.commits:
+                print commit.stats  # not in the listing, one GET per commit
+
+        for group in detector.report():
+            print group['model'], group['attribute'], group['count']
+
+    Detectors only see the fetches made in the thread they are entered in.
+    When detectors are nested, all of them count the fetches.
+
+    """
+
+    __local = threading.local()
+
+    def __init__(self, threshold=None, action='warn'):
+        """
+        :param threshold: (optional) The number of implicit fetches allowed
+                          for each model and attribute. No limit is applied
+                          when it is ``None``.
+        :type threshold: int
+
+        :param action: (optional) ``'warn'`` to issue an
+                       :exc:`ImplicitFetchWarning` once a threshold is
+                       crossed or ``'raise'`` to raise an
+                       :exc:`ImplicitFetchException` instead of making any
+                       fetch past it.
+        :type action: string
+
+        """
+
+        if action not in ('warn', 'raise'):
+            raise ValueError('action must be "warn" or "raise"')
+
+        self.threshold = threshold
+        self.action = action
+        self.__fetches = collections.defaultdict(collections.Counter)
+        self.__lock = threading.Lock()
+
+    def __enter__(self):
+        stack = self.__local.__dict__.setdefault('stack', list())
+        stack.append(self)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.__local.stack.pop()
+
+    def __len__(self):
+        return sum(sum(sites.itervalues())
+                   for sites in self.__fetches.itervalues())
+
+    @classmethod
+    def active(cls):
+        """
+        Returns the list of active detectors for the current thread, the
+        innermost one being the last.
+
+        """
+
+        return getattr(cls.__local, 'stack', None) or list()
+
+    def record(self, model, attribute, frame):
+        """
+        Counts an implicit fetch of ``model`` triggered by reading
+        ``attribute`` in the given stack ``frame``.
+
+        :raises: :exc:`ImplicitFetchException` for every fetch crossing the
+                 threshold if the action is ``'raise'``. These fetches are
+                 not made, so they are not counted.
+
+        """
+
+        code = frame.f_code
+        site = '{0}:{1} in {2}'.format(code.co_filename, frame.f_lineno,
+                                       code.co_name)
+        threshold, refuse = self.threshold, self.action == 'raise'
+        with self.__lock:
+            sites = self.__fetches[(model, attribute)]
+            count = sum(sites.itervalues()) + 1
+            if not (refuse and threshold is not None and count > threshold):
+                sites[site] += 1
+
+        if threshold is None or count <= threshold:
+            return
+
+        msg = ('{0}.{1} triggered more than {2} implicit fetches, last at {3}.'
+               ' Consider including it in the listing or prefetching it.'
+               .format(model.__name__, attribute, threshold, site))
+        if refuse:
+            raise ImplicitFetchException(msg)
+
+        if count == threshold + 1:  # only warn once
+            warnings.warn(msg, ImplicitFetchWarning, stacklevel=3)
+
+    def report(self):
+        """
+        Returns a list of dicts with the ``model``, ``attribute``, ``count``
+        and the ``sites`` of the implicit fetches, ordered by the count.
+        ``sites`` is a dict of code locations to the number of fetches made
+        there.
+
+        """
+
+        with self.__lock:
+            groups = [dict(model=model, attribute=attribute,
+                           count=sum(sites.itervalues()), sites=dict(sites))
+                      for (model, attribute), sites
+                      in self.__fetches.iteritems()]
+
+        return sorted(groups, key=lambda group: -group['count'])
+
+    def clear(self):
+        """Drops all the counted fetches."""
+        with self.__lock:
+            self.__fetches.clear()
+
+
+class Projection(object):
+    """
+    A context manager limiting the resources fetched by :meth:`Model.get`,
+    :meth:`Model._fetch_batch` and the implicit fetches of partially loaded
+    instances in the current thread to the given fields, for models with a
+    :attr:`Model._projection_param`::
+
+        with Projection('status', 'priority'):
+            bugs = [Bug.get(bug_id) for bug_id in bug_ids]
+
+    Reading a field that is not loaded on such an instance fetches only that
+    field. The same can be done for a single call with
+    ``Bug.get(123, only=('status', 'priority'))``.
+
+    """
+
+    __local = threading.local()
+
+    def __init__(self, *fields):
+        self.fields = frozenset(fields)
+
+    def __enter__(self):
+        stack = self.__local.__dict__.setdefault('stack', list())
+        stack.append(self)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.__local.stack.pop()
+
+    @classmethod
+    def current(cls):
+        """
+        Returns the innermost active projection for the current thread or
+        ``None`` if there isn't any.
+
+        """
+
+        stack = getattr(cls.__local, 'stack', None)
+        return stack[-1] if stack else None
+
+
 class ModelBase(ABCMeta):
     """
     Meta class for :class:`Model` class. This class automagically creates the
     necessary :attr:`Model._path` class variable if it is not already
     defined. The default path pattern is ``/modelname/{id}``.
 
+    It also generates the ``__slots__`` of the models declaring their fields
+    in :attr:`Model._fields`.
+
     """
 
     def __new__(mcs, name, bases, attrs):
+        fields = attrs.get('_fields')
+        if fields is not None and '__slots__' not in attrs:
+            attrs = mcs.__slotted(bases, attrs, fields)
+
         new_class = super(ModelBase, mcs).__new__(mcs, name, bases, attrs)
 
         if name == 'Model':  # prevent unnecessary base work
@@ -59,6 +456,91 @@ class ModelBase(ABCMeta):
 
         return new_class
 
+    @staticmethod
+    def __slotted(bases, attrs, fields):
+        if isinstance(fields, dict):  # a sample payload
+            fields = fields.keys()
+        fields = tuple(fields)
+
+        attrs = dict(attrs, _fields=fields)
+        inherited = any(base._slot_defaults for base in bases
+                        if isinstance(base, ModelBase))
+        slots = [] if inherited else [name for name, _ in _INSTANCE_SLOTS]
+        # fields clashing with class attributes, such as relations, and the
+        # ones which would be name mangled are kept in the instance dict
+        field_slots = [field for field in fields
+                       if _IDENTIFIER.match(field) and
+                       not field.startswith('__') and field not in attrs and
+                       not any(hasattr(base, field) for base in bases)]
+
+        attrs['__slots__'] = tuple(slots + field_slots)
+        attrs['_field_slots'] = frozenset(field_slots).union(
+            *(base._field_slots for base in bases
+              if isinstance(base, ModelBase)))
+        attrs['_slot_defaults'] = _INSTANCE_SLOTS
+        return attrs
+
+    def __setattr__(cls, name, value):
+        # a relation bound after the class is created hides the slot of the
+        # field with the same name
+        if name in cls._field_slots:
+            super(ModelBase, cls).__setattr__(
+                '_field_slots', cls._field_slots.difference((name,)))
+
+        super(ModelBase, cls).__setattr__(name, value)
+
+
+def _prefetch(instances, names):
+    for name in names:
+        by_class = collections.defaultdict(list)
+        for instance in instances:
+            by_class[instance.__class__].append(instance)
+
+        for model, members in by_class.iteritems():
+            model._get_relation(name).prefetch(members)
+
+
+def _freeze(value):
+    """Returns a hashable equivalent of ``value`` to use in keys."""
+    if isinstance(value, dict):
+        return tuple(sorted((key, _freeze(item))
+                            for key, item in value.iteritems()))
+    elif isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+
+    try:
+        hash(value)
+    except TypeError:
+        return repr(value)
+    return value
+
+
+def _owner_prefix(owner, model):
+    """
+    Returns the primary key values of ``owner`` the primary key values of the
+    related ``model`` instances start with.
+
+    """
+
+    size = len(model._pk) - 1
+    return tuple(owner._pk_vals[:size]) if size > 0 else ()
+
+
+def _set_query_param(url, name, value):
+    """Returns ``url`` with the query string parameter ``name`` replaced."""
+    parts = urlparse.urlsplit(url)
+    query = [(k, v) for k, v in
+             urlparse.parse_qsl(parts.query, keep_blank_values=True)
+             if k != name]
+    query.append((name, value))
+    return urlparse.urlunsplit(parts._replace(query=urllib.urlencode(query)))
+
+
+class _Result(collections.namedtuple('result', 'data continuation_url')):
+    # The result of Model._rest_call. page_urls holds the URLs of the
+    # remaining pages when asked for with paged=True and they are known.
+    page_urls = None
+
 
 class WrappedList(list):
     """
@@ -106,6 +588,40 @@ class WrappedList(list):
         # for the in operator.
         return item in iter(self)
 
+    def prefetch(self, *names):
+        """
+        Loads the given relations of all the items in the list at once instead
+        of making a request per item when they are first accessed. See
+        :meth:`Foreign.prefetch` for how this is done.
+
+        :param names: The names of the relation attributes on the models.
+        :type names: string
+
+        :returns: The list itself so the call can be chained.
+        :rtype: :class:`WrappedList`
+
+        """
+
+        _prefetch(self[:], names)  # wraps and caches all the items
+        return self
+
+    def to_columns(self, paths):
+        """
+        Returns the values at the given dotted ``paths`` of all the items as
+        typed arrays, read from the parsed data without creating the models.
+        See :func:`pyresto.columns.to_columns`.
+
+        :param paths: The dotted paths of the values, such as
+                      ``commit.author.date``.
+        :type paths: iterable
+
+        :rtype: :class:`collections.OrderedDict`
+
+        """
+
+        return columns.to_columns(super(self.__class__, self).__iter__(),
+                                  paths)
+
 
 class LazyList(object):
     """
@@ -114,25 +630,768 @@ class LazyList(object):
     structured generator. No caching and memoization at all since the intended
     usage is for small number of iterations.
 
-    """
+    When created with a positive ``prefetch`` value, the next pages are fetched
+    in a background thread while the current page is being consumed. At most
+    ``prefetch`` pages are buffered and the background thread stops as soon
+    as the iteration is finished or abandoned.
+
+    Long iterations can be resumed after a restart, see :meth:`resumable`.
+    This needs the ``fetcher_for`` function creating the fetcher of the page
+    at a given URL and index, and the fetchers having the ``url`` and
+    ``page`` attributes, which is the case for the lazy :class:`Many`
+    relations.
+
+    """
+
+    def __init__(self, wrapper, fetcher, prefetch=0, fetcher_for=None):
+        self.__wrapper = wrapper
+        self.__fetcher = fetcher
+        self.__prefetch = prefetch
+        self.__fetcher_for = fetcher_for
+
+    def __iter__(self):
+        for fetcher, data in self.__iter_pages():
+            for item in data:
+                yield self.__wrapper(item)
+
+    def resumable(self, store=None, key=None, checkpoint=None, every=None):
+        """
+        Returns a :class:`ResumableIterator` over the items, starting from
+        the given ``checkpoint``, or from the one saved in the ``store`` under
+        ``key``, or from the beginning if there is none. While iterating, the
+        position is saved in the ``store`` at the start of each page, or
+        every ``every`` items if given, and removed once the iteration is
+        finished::
+
+            store = FileCheckpointStore('checkpoints')
+            for commit in repo.commits.resumable(store, 'commits'):
+                ...
+
+        :param store: (optional) The store to save the checkpoints in.
+        :type store: :class:`pyresto.checkpoint.CheckpointStore`
+
+        :param key: (optional) The name of the iteration in the ``store``,
+                    required when a ``store`` is given.
+        :type key: string
+
+        :param checkpoint: (optional) The position to start from.
+        :type checkpoint: :class:`pyresto.checkpoint.Checkpoint`
+
+        :param every: (optional) The number of items to save a checkpoint
+                      after.
+        :type every: int
+
+        :rtype: :class:`ResumableIterator`
+
+        """
+
+        if store is not None and key is None:
+            raise ValueError('A key is required to save the checkpoints')
+
+        if checkpoint is None and store is not None:
+            checkpoint = store.load(key)
+
+        fetcher = self.__fetcher
+        if checkpoint is not None:
+            if self.__fetcher_for is None:
+                raise ValueError('This list cannot be resumed')
+            fetcher = self.__fetcher_for(checkpoint.url, checkpoint.page)
+
+        return ResumableIterator(
+            self.__wrapper, self.__iter_pages(fetcher),
+            checkpoint.offset if checkpoint else 0, store, key, every)
+
+    def to_columns(self, paths):
+        """
+        Fetches all the pages and returns the values at the given dotted
+        ``paths`` of all the items as typed arrays, read from the parsed data
+        without creating the models. See :func:`pyresto.columns.to_columns`.
+
+        :param paths: The dotted paths of the values, such as
+                      ``commit.author.date``.
+        :type paths: iterable
+
+        :rtype: :class:`collections.OrderedDict`
+
+        """
+
+        return columns.to_columns((item for fetcher, data in
+                                   self.__iter_pages() for item in data),
+                                  paths)
+
+    def __iter_pages(self, fetcher=None):
+        """
+        Yields the fetcher of each page along with the data it has fetched.
+
+        """
+
+        fetcher = fetcher or self.__fetcher
+        return (self.__prefetched_pages(fetcher) if self.__prefetch
+                else self.__pages(fetcher))
+
+    def __pages(self, fetcher):
+        while fetcher:
+            # fetcher is stored locally to prevent interference between
+            # possible multiple iterations going at once
+            current = fetcher
+            data, fetcher = fetcher()  # this part never gets hit if the
+            # consumer of the generator is not exhausted.
+            yield current, data
+
+    def __prefetched_pages(self, fetcher):
+        pages = Queue.Queue(self.__prefetch)
+        stopped = threading.Event()
+        done = object()
+
+        def put(item):
+            # Never block forever so the thread can notice an abandoned
+            # iteration even when the buffer is full.
+            while not stopped.is_set():
+                try:
+                    pages.put(item, timeout=0.1)
+                    return True
+                except Queue.Full:
+                    pass
+            return False
+
+        def produce():
+            try:
+                for page in self.__pages(fetcher):
+                    # streamed pages are read here rather than while consumed
+                    if not isinstance(page[1], (list, tuple)):
+                        page = page[0], list(page[1])
+                    if not put((page, None)):
+                        return
+            except Exception:
+                put((None, sys.exc_info()))
+            else:
+                put((done, None))
+
+        producer = threading.Thread(target=produce)
+        producer.daemon = True
+        producer.start()
+
+        try:
+            while True:
+                data, error = pages.get()
+                if error:
+                    raise error[0], error[1], error[2]
+                elif data is done:
+                    break
+                yield data
+        finally:
+            # Called when the generator is exhausted, closed or collected
+            stopped.set()
+
+
+class ResumableIterator(object):
+    """
+    An iterator over the items of a :class:`LazyList` which keeps track of
+    its position, so the iteration can be resumed from it later. Created by
+    :meth:`LazyList.resumable`.
+
+    An item is only considered consumed when the next one is asked for, so
+    the item being processed when a crash happens is returned again after
+    resuming.
+
+    """
+
+    def __init__(self, wrapper, pages, offset=0, store=None, key=None,
+                 every=None):
+        self.__wrapper = wrapper
+        self.__store = store
+        self.__key = key
+        self.__every = every
+        self.__fetcher = None
+        self.__offset = offset
+        self.__finished = False
+        self.__items = self.__iterate(pages, offset)
+
+    @property
+    def checkpoint(self):
+        """
+        The :class:`pyresto.checkpoint.Checkpoint` of the next item to be
+        consumed, or ``None`` once the iteration is finished or if it is not
+        started yet.
+
+        """
+
+        fetcher = self.__fetcher
+        if fetcher is None or self.__finished:
+            return None
+
+        return Checkpoint(getattr(fetcher, 'url', None),
+                          getattr(fetcher, 'page', None), self.__offset)
+
+    def save(self):
+        """Saves the current checkpoint in the store."""
+        checkpoint = self.checkpoint
+        if self.__store is not None and checkpoint is not None:
+            self.__store.save(self.__key, checkpoint)
+
+    def __iter__(self):
+        return self
+
+    def next(self):
+        return next(self.__items)
+
+    def __iterate(self, pages, skip):
+        every = self.__every
+        count = 0
+        for fetcher, data in pages:
+            self.__fetcher, self.__offset = fetcher, skip
+            if not every:
+                self.save()
+
+            for offset, item in enumerate(data):
+                if offset < skip:
+                    continue
+
+                self.__offset = offset
+                if every:
+                    if count >= every:
+                        self.save()
+                        count = 0
+                    count += 1
+
+                yield self.__wrapper(item)
+
+            skip = 0
+
+        self.__finished = True
+        if self.__store is not None:
+            self.__store.delete(self.__key)
+
+
+class PagedList(collections.Sequence):
+    """
+    A read-only list of the items of a paginated collection which fetches
+    its pages on demand, used by the eager :class:`Many` relations. Getting
+    an item or a slice only fetches the pages up to it, so getting the first
+    few items of a large collection costs a single request. Fetched pages
+    are kept and their items are wrapped on access as in
+    :class:`WrappedList`.
+
+    If the URLs of all the pages are known upfront, see
+    :meth:`Model._page_urls`, the pages are accessed directly instead of
+    one after another, and iterating reads ahead the next ``workers`` pages
+    at once. The length is then worked out from the size of the
+    first and the last pages, and the negative indexes only need the last
+    page. Otherwise all the pages are fetched to find out the length.
+
+    """
+
+    def __init__(self, wrapper, data, fetcher=None, page_fetchers=None,
+                 workers=1):
+        """
+        :param wrapper: The function creating the models from the items.
+        :type wrapper: callable
+
+        :param data: The items of the first page.
+        :type data: list
+
+        :param fetcher: (optional) The function returning the items of the
+                        next page and the fetcher of the page after it, as
+                        for :class:`LazyList`.
+        :type fetcher: callable
+
+        :param page_fetchers: (optional) The fetchers of all the remaining
+                              pages, if they are known upfront.
+        :type page_fetchers: list
+
+        :param workers: (optional) The maximum number of pages fetched
+                        concurrently when all of them are needed.
+        :type workers: int
+
+        """
+
+        self.__wrapper = wrapper
+        self.__known = bool(page_fetchers)
+        self.__fetcher = None if page_fetchers else fetcher
+        self.__page_fetchers = [None] + list(page_fetchers or ())
+        self.__pages = [self.__wrap(data)] + [None] * (
+            len(self.__page_fetchers) - 1)
+        self.__workers = workers
+        self.__lock = threading.RLock()
+
+    def __wrap(self, data):
+        if not isinstance(data, (list, tuple)):
+            data = list(data)  # a streamed page
+        return WrappedList(data, self.__wrapper)
+
+    @property
+    def _loaded_pages(self):
+        """The number of pages fetched so far."""
+        return sum(1 for page in self.__pages if page is not None)
+
+    def __page(self, index):
+        """
+        Returns the page at ``index``, fetching it if necessary, or ``None``
+        if there is no such page.
+
+        """
+
+        with self.__lock:
+            pages = self.__pages
+            while index >= len(pages) and self.__fetcher:
+                data, self.__fetcher = self.__fetcher()
+                pages.append(self.__wrap(data))
+
+            if index >= len(pages):
+                return None
+
+            if pages[index] is None:
+                pages[index] = self.__wrap(self.__page_fetchers[index]()[0])
+            return pages[index]
+
+    def __load(self, indexes):
+        """Fetches the known pages at ``indexes`` concurrently."""
+        with self.__lock:
+            missing = [index for index in indexes
+                       if self.__pages[index] is None]
+            fetchers = self.__page_fetchers
+            captured = metrics.current_labels()  # the labels are per thread
+
+            def fetch(index):
+                with metrics.labels(**captured):
+                    return fetchers[index]()[0]
+
+            for index, data in zip(missing, map_concurrently(
+                    fetch, missing, self.__workers)):
+                self.__pages[index] = self.__wrap(data)
+
+    def __load_all(self):
+        with self.__lock:
+            self.__load(xrange(len(self.__pages)))
+            while self.__page(len(self.__pages)) is not None:
+                pass  # pages which can only be fetched one after another
+
+            return self.__pages
+
+    def __locate(self, index):
+        """
+        Returns the page holding the item at the non-negative ``index`` and
+        the position of the item in it.
+
+        """
+
+        first = self.__pages[0]
+        if self.__known and len(first):
+            # all pages are known and the full ones are as large as the first
+            number, offset = divmod(index, len(first))
+            page = self.__page(number) if number < len(self.__pages) else None
+            if page is not None and offset < len(page):
+                return page, offset
+            raise IndexError('list index out of range')
+
+        number = 0
+        while True:
+            page = self.__page(number)
+            if page is None:
+                raise IndexError('list index out of range')
+            if index < len(page):
+                return page, index
+            index -= len(page)
+            number += 1
+
+    def __len__(self):
+        pages = self.__pages
+        if self.__known:
+            return (len(pages[0]) * (len(pages) - 1) +
+                    len(self.__page(len(pages) - 1)))
+
+        return sum(len(page) for page in self.__load_all())
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            start, stop, step = key.start, key.stop, key.step or 1
+            if (step > 0 and stop is not None and stop >= 0 and
+                    (start or 0) >= 0):
+                # don't fetch the pages after the slice to find the length
+                items = list()
+                for index in xrange(start or 0, stop, step):
+                    try:
+                        items.append(self[index])
+                    except IndexError:
+                        break
+                return items
+
+            return [self[index] for index in xrange(*key.indices(len(self)))]
+
+        if key < 0:
+            key += len(self)
+            if key < 0:
+                raise IndexError('list index out of range')
+
+        page, offset = self.__locate(key)
+        return page[offset]
+
+    def __iter__(self):
+        number = 0
+        while True:
+            pages = self.__pages
+            if self.__known and number < len(pages) and pages[number] is None:
+                # read ahead as many known pages as can be fetched at once
+                self.__load(xrange(number, min(number + self.__workers,
+                                               len(pages))))
+            page = self.__page(number)
+            if page is None:
+                return
+            for item in page:
+                yield item
+            number += 1
+
+    def __contains__(self, item):
+        return item in iter(self)
+
+    def prefetch(self, *names):
+        """
+        Fetches all the pages and loads the given relations of all the items
+        at once. See :meth:`WrappedList.prefetch`.
+
+        """
+
+        _prefetch([item for page in self.__load_all() for item in page[:]],
+                  names)
+        return self
+
+    def to_columns(self, paths):
+        """
+        Fetches all the pages and returns the values at the given dotted
+        ``paths`` of all the items as typed arrays. See
+        :meth:`WrappedList.to_columns`.
+
+        """
+
+        return columns.to_columns((item for page in self.__load_all()
+                                   for item in list.__iter__(page)), paths)
+
+
+class RelationCache(object):
+    """
+    The cache used by :class:`Relation` instances to store the related
+    resources of each owner :class:`Model` instance. Owners are only weakly
+    referenced so their entries go away with them. Optionally, the number of
+    entries can be bounded, evicting the least recently used entry first,
+    and entries can expire after a given number of seconds.
+
+    The class attributes :attr:`maxsize` and :attr:`ttl` are the global
+    defaults for all caches that do not override them, so to bound all the
+    relation caches at once, simply do::
+
+        RelationCache.maxsize = 1000
+
+    """
+
+    #: The default maximum number of entries for a cache. ``None`` means no
+    #: limit.
+    maxsize = None
+
+    #: The default number of seconds before an entry expires. ``None`` means
+    #: entries never expire.
+    ttl = None
+
+    def __init__(self, maxsize=None, ttl=None):
+        if maxsize is not None:
+            self.maxsize = maxsize
+        if ttl is not None:
+            self.ttl = ttl
+
+        # id(owner) -> (weak reference to owner, value, time stored)
+        self.__entries = collections.OrderedDict()
+        self.__lock = threading.RLock()
+
+    def __len__(self):
+        return len(self.__entries)
+
+    def __contains__(self, owner):
+        return self.get(owner, _missing) is not _missing
+
+    def __getitem__(self, owner):
+        value = self.get(owner, _missing)
+        if value is _missing:
+            raise KeyError(owner)
+        return value
+
+    def __setitem__(self, owner, value):
+        key = id(owner)
+        ref = weakref.ref(owner, lambda ref: self.__discard(key, ref))
+        with self.__lock:
+            self.__entries.pop(key, None)
+            self.__entries[key] = (ref, value, time.time())
+
+            maxsize = self.maxsize
+            while maxsize is not None and len(self.__entries) > maxsize:
+                self.__entries.popitem(last=False)
+
+    def __discard(self, key, ref):
+        with self.__lock:
+            entry = self.__entries.get(key)
+            if entry and entry[0] is ref:
+                del self.__entries[key]
+
+    def get(self, owner, default=None):
+        """
+        Returns the cached value for the given ``owner`` or ``default`` if
+        there isn't any or if it has expired.
+
+        """
+
+        key = id(owner)
+        with self.__lock:
+            entry = self.__entries.get(key)
+            if entry is None or entry[0]() is not owner:
+                return default
+
+            ttl = self.ttl
+            if ttl is not None and time.time() - entry[2] > ttl:
+                del self.__entries[key]
+                return default
+
+            if self.maxsize is not None:  # mark as recently used
+                del self.__entries[key]
+                self.__entries[key] = entry
+
+            return entry[1]
+
+    def pop(self, owner, default=None):
+        """
+        Removes and returns the cached value for the given ``owner`` or
+        ``default`` if there isn't any.
+
+        """
+
+        with self.__lock:
+            value = self.get(owner, _missing)
+            if value is _missing:
+                return default
+            del self.__entries[id(owner)]
+            return value
+
+    def clear(self):
+        """Removes all the entries."""
+        with self.__lock:
+            self.__entries.clear()
+
+
+class Relation(object):
+    """Base class for all relation types."""
+
+    def __init__(self, cache=None):
+        """
+        :param cache: (optional) The cache to keep the related resources of
+                      each owner in. A new :class:`RelationCache` with the
+                      global defaults is used if not provided.
+        :type cache: :class:`RelationCache`
+
+        """
+
+        self._cache = cache if cache is not None else RelationCache()
+
+    def invalidate(self, instance):
+        """
+        Removes the cached related resources for the given owner ``instance``
+        so they are fetched again on next access.
+
+        """
+
+        self._cache.pop(instance)
+
+
+class RelationGroup(object):
+    """
+    Loads sibling eager :class:`Many` relations, which are different fields of
+    the same resource, with a single request. When a member of the group is
+    accessed, the fields of all the other members declared with
+    :meth:`declare` or accessed before on any instance are requested along
+    with it, and the result is split into the cache of each member::
+
+        group = RelationGroup('bug/{id}?include_fields={fields}')
+
+        class Bug(Model):
+            comments = group.add('comments', Many(Comment, preprocessor=
+                                                  itemgetter('comments')))
+            cc = group.add('cc', Many(User, preprocessor=itemgetter('cc')))
+
+    """
+
+    def __init__(self, path, separator=','):
+        """
+        :param path: The path to fetch the fields from. It is formatted with
+                     the owner's primary key values and the ``separator``
+                     joined field names under the name ``fields``.
+        :type path: string
+
+        :param separator: (optional) The string to join the field names with.
+        :type separator: string
+
+        """
+
+        self.path = path
+        self.separator = separator
+        self.__members = collections.OrderedDict()
+        self.__used = set()
+
+    def add(self, name, relation):
+        """
+        Adds the :class:`Many` ``relation`` to the group as the field ``name``
+        and returns the relation.
+
+        """
+
+        self.__members[name] = relation
+        relation._group = self
+        return relation
+
+    def declare(self, *names):
+        """
+        Marks the fields with the given ``names`` to be loaded whenever any
+        member of the group is accessed.
+
+        """
+
+        unknown = set(names) - set(self.__members)
+        if unknown:
+            raise KeyError('Unknown fields: ' + ', '.join(sorted(unknown)))
+
+        self.__used.update(names)
+
+    def load(self, relation, instance):
+        """
+        Fetches the field of ``relation`` for the owner ``instance`` together
+        with the other used fields which are not cached for it, fills their
+        caches, and returns the items of ``relation``.
+
+        """
+
+        names = [name for name, member in self.__members.iteritems()
+                 if member is relation or name in self.__used and
+                 instance not in member._cache]
+        self.__used.update(name for name in names
+                           if self.__members[name] is relation)
+
+        path = self.path.format(fields=self.separator.join(names),
+                                **instance._footprint)
+        with metrics.labels(template=self.path):
+            data = instance._rest_call(url=path, auth=instance._auth).data
+
+        for name in names:
+            member = self.__members[name]
+            items = member._fill(instance, data)
+            if member is relation:
+                result = items
+
+        return result
+
+
+class Delta(object):
+    """
+    Describes how the items of a :class:`Many` relation which are new or
+    changed since the last sync can be requested, so :meth:`Many.sync` only
+    transfers them and merges them into a stored copy of the collection::
+
+        class Repo(Model):
+            commits = Many(Commit, '/repos/{full_name}/commits', delta=Delta(
+                'since', 'commit.committer.date', newest_first=True))
+
+    The largest value of the ``field`` of the items seen so far is the high
+    water mark of a collection, which is sent in the ``param`` query string
+    parameter on the next sync. It can be a timestamp, such as an ISO 8601
+    date, or an increasing ID.
+
+    """
+
+    def __init__(self, param, field, key=None, newest_first=False,
+                 store=None, path=None):
+        """
+        :param param: The name of the query string parameter the API accepts
+                      to return only the items changed after a given value.
+        :type param: string
+
+        :param field: The dotted path of the field of the items compared
+                      against the ``param``, such as ``updated_at``.
+        :type field: string
+
+        :param key: (optional) The dotted path of the field identifying the
+                    items, to replace the changed ones. The last primary key
+                    field of the model is used if not provided, or the whole
+                    item if the model has none.
+        :type key: string
+
+        :param newest_first: (optional) Whether the API lists the newest
+                             items first, so the new items are put before
+                             the stored ones instead of after them.
+        :type newest_first: boolean
+
+        :param store: (optional) The mapping to keep the high water mark and
+                      the items of each collection in, such as a
+                      :class:`shelve.Shelf` to keep them across runs. A new
+                      dictionary is used if not provided.
+        :type store: mapping
+
+        :param path: (optional) The path of the collection to sync from, if
+                     the ``param`` is only accepted on a different path than
+                     the one of the relation. The same fields of the owner
+                     can be used in it.
+        :type path: string
+
+        """
+
+        self.param = param
+        self.field = field
+        self.key = key
+        self.newest_first = newest_first
+        self.store = store if store is not None else dict()
+        self.path = path
+
+    @staticmethod
+    def _lookup(item, path):
+        for part in path.split('.'):
+            if not isinstance(item, dict):
+                return None
+            item = item.get(part)
+        return item
 
-    def __init__(self, wrapper, fetcher):
-        self.__wrapper = wrapper
-        self.__fetcher = fetcher
+    def url(self, path, mark):
+        """
+        Returns the collection ``path`` changed to request the items changed
+        after the high water ``mark`` only, or ``path`` if there is no mark.
 
-    def __iter__(self):
-        fetcher = self.__fetcher
-        while fetcher:
-            # fetcher is stored locally to prevent interference between
-            # possible multiple iterations going at once
-            data, fetcher = fetcher()  # this part never gets hit if the below
-            # loop is not exhausted.
-            for item in data:
-                yield self.__wrapper(item)
+        """
 
+        if mark is None:
+            return path
+        return _set_query_param(path, self.param, unicode(mark).encode('utf8'))
 
-class Relation(object):
-    """Base class for all relation types."""
+    def merge(self, items, changes, key=None):
+        """
+        Returns the stored ``items`` updated with the ``changes``, replacing
+        the items with the same key in place and adding the new ones, along
+        with the new high water mark.
+
+        """
+
+        key = self.key or key
+        if key:
+            identify = lambda item: self._lookup(item, key)
+        else:
+            identify = lambda item: json.dumps(item, sort_keys=True)
+
+        merged = collections.OrderedDict((identify(item), item)
+                                         for item in items)
+        added = list()
+        for item in changes:
+            item_key = identify(item)
+            if item_key in merged:
+                merged[item_key] = item
+            else:
+                added.append(item)
+
+        items = (added + merged.values() if self.newest_first
+                 else merged.values() + added)
+        marks = [mark for mark in (self._lookup(item, self.field)
+                                   for item in items) if mark is not None]
+        return items, max(marks) if marks else None
 
 
 class Many(Relation):
@@ -144,7 +1403,11 @@ class Many(Relation):
 
     """
 
-    def __init__(self, model, path=None, lazy=False, preprocessor=None):
+    #: The :class:`RelationGroup` the relation is a member of, if any.
+    _group = None
+
+    def __init__(self, model, path=None, lazy=False, preprocessor=None,
+                 prefetch=0, cache=None, delta=None):
         """
         Constructor for Many relation instances.
 
@@ -157,20 +1420,35 @@ class Many(Relation):
 
         :param lazy: (optional) A boolean indicator to determine the type of
                      the :class:`Many` field. Normally, it will be a
-                     :class:`WrappedList` which is essentially a list. Use
+                     :class:`PagedList` which is essentially a read-only list
+                     fetching its pages as they are needed. Use
                      ``lazy=True`` if the number of items in the collection
                      will be uncertain or very large which will result in a
                      :class:`LazyList` property which is practically a
                      generator.
         :type lazy: boolean
 
+        :param prefetch: (optional) The number of pages to fetch ahead in a
+                         background thread while iterating over a lazy
+                         :class:`Many` field. See :class:`LazyList`.
+        :type prefetch: int
+
+        :param cache: (optional) See :class:`Relation`.
+        :type cache: :class:`RelationCache`
+
+        :param delta: (optional) How to fetch only the changed items of the
+                      collection for :meth:`sync`.
+        :type delta: :class:`Delta`
+
         """
 
+        super(Many, self).__init__(cache)
         self.__model = model
         self.__path = path or model._path
         self.__lazy = lazy
         self.__preprocessor = preprocessor
-        self.__cache = dict()
+        self.__prefetch = prefetch
+        self.__delta = delta
 
     def _with_owner(self, owner):
         """
@@ -184,11 +1462,17 @@ class Many(Relation):
 
         """
 
+        # the collection is cached for the owner, so it must not keep the
+        # owner alive, only the values its items' primary keys start with
+        prefix = _owner_prefix(owner, self.__model)
+        owner = weakref.proxy(owner)
+
         def mapper(data):
             if isinstance(data, dict):
                 instance = self.__model(**data)
                 instance._pyresto_owner = owner
-                return instance
+                instance._pk_prefix = prefix
+                return instance._identified(data)
             elif isinstance(data, self.__model):
                 return data
             else:
@@ -196,6 +1480,59 @@ class Many(Relation):
 
         return mapper
 
+    def _fill(self, instance, data):
+        """
+        Caches and returns the items in the given response ``data`` as the
+        collection of the owner ``instance``. Used by
+        :class:`RelationGroup`.
+
+        """
+
+        items = WrappedList(self.__sanitize_data(data),
+                            self._with_owner(instance))
+        self._cache[instance] = items
+        return items
+
+    def sync(self, instance, store=None):
+        """
+        Fetches the items of the collection of the owner ``instance`` which
+        are new or changed since the last sync, as described by the
+        :class:`Delta` of the relation, and merges them into the stored copy
+        of the collection. The whole collection is fetched on the first sync.
+        The merged collection is cached for the eager relations and returned.
+
+        :param store: (optional) The mapping to keep the collection in,
+                      instead of the store of the :class:`Delta`.
+        :type store: mapping
+
+        :rtype: :class:`WrappedList`
+
+        """
+
+        delta = self.__delta
+        if delta is None:
+            raise ValueError('The relation has no delta to sync with')
+
+        model = self.__model
+        store = delta.store if store is None else store
+        template = delta.path or self.__path
+        path = template.format(**instance._footprint)
+        key = path.encode('utf8')  # shelves only accept byte string keys
+        mark, items = store.get(key, (None, list()))
+
+        with metrics.labels(template=template):
+            data = model._rest_call(url=delta.url(path, mark),
+                                    auth=instance._auth).data
+
+        items, new_mark = delta.merge(items, self.__sanitize_data(data),
+                                      model._pk[-1] if model._pk else None)
+        store[key] = (new_mark if new_mark is not None else mark, items)
+
+        result = WrappedList(list(items), self._with_owner(instance))
+        if not self.__lazy:
+            self._cache[instance] = result
+        return result
+
     def __sanitize_data(self, data):
         if not data:
             return list()
@@ -203,7 +1540,7 @@ class Many(Relation):
             return self.__preprocessor(data)
         return data
 
-    def __make_fetcher(self, url, instance):
+    def __make_fetcher(self, url, auth, page=0):
         """
         A function factory method which creates a simple fetcher function for
         the :class:`Many` relation, that is used internally. The
@@ -216,20 +1553,27 @@ class Many(Relation):
         :param url: The url which the fetcher function will be bound to.
         :type url: unicode
 
+        :param auth: The authentication of the owner instance.
+
+        :param page: (optional) The index of the page at ``url``, reported
+                     to the :mod:`pyresto.metrics` sinks.
+        :type page: int
+
         """
 
         def fetcher():
-            data, new_url = self.__model._rest_call(url=url,
-                                                    auth=instance._auth,
-                                                    fetch_all=False)
+            with metrics.labels(template=self.__path, page=page):
+                data, new_url = self.__model._rest_call(url=url, auth=auth,
+                                                        fetch_all=False)
             # Note the fetch_all=False in the call above, since this method is
             # intended for iterative LazyList calls.
             data = self.__sanitize_data(data)
 
-            new_fetcher = self.__make_fetcher(new_url,
-                                              instance) if new_url else None
+            new_fetcher = self.__make_fetcher(
+                new_url, auth, page + 1) if new_url else None
             return data, new_fetcher
 
+        fetcher.url, fetcher.page = url, page  # for the checkpoints
         return fetcher
 
     def __get__(self, instance, owner):
@@ -239,21 +1583,35 @@ class Many(Relation):
         if not instance:
             return self.__model
 
-        cache = self.__cache
-        if instance not in cache:
+        items = self._cache.get(instance, _missing)
+        if items is _missing:
             model = self.__model
 
             path = self.__path.format(**instance._footprint)
+            auth = instance._auth
 
             if self.__lazy:
-                cache[instance] = LazyList(self._with_owner(instance),
-                                           self.__make_fetcher(path, instance))
+                items = LazyList(
+                    self._with_owner(instance),
+                    self.__make_fetcher(path, auth), self.__prefetch,
+                    lambda url, page: self.__make_fetcher(url, auth, page))
+            elif self._group is not None:
+                return self._group.load(self, instance)
             else:
-                data, next_url = model._rest_call(url=path,
-                                                  auth=instance._auth)
-                cache[instance] = WrappedList(self.__sanitize_data(data),
-                                              self._with_owner(instance))
-        return cache[instance]
+                with metrics.labels(template=self.__path):
+                    result = model._rest_call(url=path, auth=auth,
+                                              fetch_all=False, paged=True)
+                data, next_url = result
+                page_urls = getattr(result, 'page_urls', None)
+                items = PagedList(
+                    self._with_owner(instance), self.__sanitize_data(data),
+                    next_url and self.__make_fetcher(next_url, auth, 1),
+                    page_urls and [self.__make_fetcher(url, auth, page)
+                                   for page, url in enumerate(page_urls, 1)],
+                    model._page_workers)
+            self._cache[instance] = items
+
+        return items
 
 
 class Foreign(Relation):
@@ -265,7 +1623,7 @@ class Foreign(Relation):
     """
 
     def __init__(self, model, key_property=None, key_extractor=None,
-                 embedded=False):
+                 embedded=False, cache=None):
         """
         Constructor for the :class:`Foreign` relations.
 
@@ -284,10 +1642,13 @@ class Foreign(Relation):
                               extraction operations for foreign fields.
         :type key_extractor: function(model)
 
+        :param cache: (optional) See :class:`Relation`.
+        :type cache: :class:`RelationCache`
+
         """
 
+        super(Foreign, self).__init__(cache)
         self.__model = model
-        self.__cache = dict()
         self.__embedded = embedded and not key_extractor
 
         self.__key_property = key_property or '__' + model.__name__.lower()
@@ -317,18 +1678,63 @@ class Foreign(Relation):
         if not instance:
             return self.__model
 
-        if instance not in self.__cache:
+        model = self._cache.get(instance, _missing)
+        if model is _missing:
             if self.__embedded:
                 properties = getattr(instance, self.__key_property)
-                self.__cache[instance] = self.__model(**properties) if properties else None
-                self.__cache[instance]._auth = instance._auth
+                model = None
+                if properties:
+                    model = self.__model(**properties)
+                    model._auth = instance._auth
+                    model._pyresto_owner = weakref.proxy(instance)
+                    model._pk_prefix = _owner_prefix(instance, self.__model)
+                    model = model._identified(properties)
             else:
-                self.__cache[instance] = self.__model.get(
-                    *self.__key_extractor(instance), auth=instance._auth)
+                model = self.__model.get(*self.__key_extractor(instance),
+                                         auth=instance._auth)
+
+            if model is not None:
+                # the model is cached for the owner, so it must not keep the
+                # owner alive
+                model._pyresto_owner = weakref.proxy(instance)
+            self._cache[instance] = model
+
+        return model
+
+    def prefetch(self, instances):
+        """
+        Fills the relation for all the given owner ``instances`` in bulk. The
+        keys produced by the key extractor are de-duplicated and all the
+        foreign models are fetched at once using :meth:`Model._fetch_batch`.
+
+        :param instances: The owner model instances.
+        :type instances: list of :class:`Model`
+
+        """
+
+        cache = self._cache
+        pending = [instance for instance in instances
+                   if instance not in cache]
 
-            self.__cache[instance]._pyresto_owner = instance
+        if self.__embedded:  # nothing to fetch, simply fill the cache
+            for instance in pending:
+                self.__get__(instance, instance.__class__)
+            return
 
-        return self.__cache[instance]
+        by_auth = collections.defaultdict(
+            lambda: collections.defaultdict(list))
+        for instance in pending:
+            key = self.__key_extractor(instance)
+            by_auth[instance._auth][key].append(instance)
+
+        for auth, owners in by_auth.iteritems():
+            found = self.__model._fetch_batch(owners.iterkeys(), auth=auth)
+            for key, instances in owners.iteritems():
+                model = found.get(key)
+                for instance in instances:
+                    cache[instance] = model
+                    if model is not None:
+                        model._pyresto_owner = weakref.proxy(instance)
 
 
 class Model(object):
@@ -363,6 +1769,91 @@ class Model(object):
     #: level for convenience.
     _auth = None
 
+    #: The class variable that holds the keyword arguments passed to
+    #: :class:`SessionPool` when the first request is made to
+    #: :attr:`_url_base`. Models sharing the same :attr:`_url_base` share the
+    #: same pool, so define this on the base model of an API.
+    _session_options = dict()
+
+    #: The name of the query string parameter which holds the page number in
+    #: paginated URLs. Used by :meth:`_page_urls`.
+    _page_param = 'page'
+
+    #: The maximum number of pages fetched concurrently when the URLs of all
+    #: the pages of a paginated resource are known upfront. Use ``1`` to fetch
+    #: the pages sequentially.
+    _page_workers = 4
+
+    #: The class variable that holds the path to fetch many instances of the
+    #: :class:`Model` with a single request, if the API provides such an
+    #: endpoint. The comma separated last primary key values are available
+    #: under the name ``ids`` and the other primary key values under their
+    #: own names for formatting. See :meth:`_fetch_batch`.
+    _batch_path = None
+
+    #: The class variable that holds the name of the query string parameter
+    #: the API accepts to return only the listed fields of a resource, such as
+    #: ``include_fields`` for Bugzilla. Projections are not supported when
+    #: this is ``None``. See :class:`Projection` and :meth:`_project`.
+    _projection_param = None
+
+    #: The maximum length of the URLs built from :attr:`_batch_path`. Longer
+    #: batches are split into multiple requests.
+    _batch_max_url_length = 2000
+
+    #: The maximum number of concurrent requests made by :meth:`_fetch_batch`.
+    _batch_workers = 8
+
+    #: The class variable that holds the executor running the calls made
+    #: through the asynchronous API, such as :meth:`aget`. The number of its
+    #: workers bounds the number of concurrent requests. Any object having a
+    #: ``submit`` method compatible with ``concurrent.futures.Executor`` can
+    #: be used instead.
+    _executor = Executor(max_workers=16)
+
+    #: The class variable that holds the request scheduler, such as a
+    #: :class:`pyresto.ratelimit.RateLimitScheduler`, which decides when each
+    #: request can be made. Requests are made right away when this is
+    #: ``None``.
+    _scheduler = None
+
+    #: The class variable that holds the persistent HTTP response cache for
+    #: ``GET`` requests, such as a :class:`pyresto.cache.SQLiteCache`. No
+    #: responses are cached when this is ``None``. Streamed requests, see
+    #: :attr:`_stream`, skip the cache since storing them would read their
+    #: whole bodies into memory.
+    _response_cache = None
+
+    #: The class variable that determines if the pages fetched one by one,
+    #: such as the ones of a lazy :class:`Many` relation, are streamed. The
+    #: items of a page which is a JSON array are then parsed one at a time
+    #: while iterating over them, using :attr:`_stream_decoder`, so the whole
+    #: page is never held in memory. Other responses are parsed as usual.
+    _stream = False
+
+    #: The JSON decoder used to parse the items of streamed pages.
+    _stream_decoder = json.JSONDecoder()
+
+    #: The :class:`pyresto.concurrency.SingleFlight` coalescing the
+    #: concurrent identical ``GET`` requests made through :meth:`_rest_call`
+    #: for the same URL, parameters and authentication. Only one of them is
+    #: sent and the others wait for its result. Each of the callers, the one
+    #: which sent the request too, then gets its own copy of the result. Its
+    #: ``coalesced`` attribute holds the number of requests saved.
+    #: Requests are never coalesced when this is ``None``.
+    _single_flight = SingleFlight()
+
+    @classmethod
+    def _get_session(cls):
+        """
+        Returns the keep-alive :class:`requests.Session` to be used for the
+        requests made by this :class:`Model` in the current thread.
+
+        """
+
+        return SessionPool.for_base(cls._url_base,
+                                    **cls._session_options).session
+
     @classmethod
     def _continuator(cls, response):
         """
@@ -391,7 +1882,9 @@ class Model(object):
     #: the server response to be parsed. It is expected to return a
     #: dictionary object having the properties of the related model. Defaults
     #: to a "staticazed" version of :func:`json.loads` so it is not necessary
-    #: to override it if the response type is valid JSON.
+    #: to override it if the response type is valid JSON. Use a
+    #: :class:`pyresto.decoders.JSONDecoder` to decode faster and to share the
+    #: repeated strings in large responses.
     _parser = staticmethod(json.loads)
 
     @abstractproperty
@@ -412,12 +1905,43 @@ class Model(object):
     #: :exc:`AttributeError`.
     _fetched = False
 
+    #: The instance variable which holds the set of field names loaded on an
+    #: instance fetched through a :class:`Projection`, or ``None`` if the
+    #: instance is not fetched or fetched in full.
+    _loaded_fields = None
+
     #: The instance variable which holds the additional named get parameters
     #: provided to the :meth:`Model.get` to fetch the instance. It is used
     #: internally by the :class:`Relation` classes to get more info about the
     #: current :class:`Model` instance while fetching its related resources.
     _get_params = dict()
 
+    #: The instance variable which holds a weak proxy to the :class:`Model`
+    #: instance this instance is fetched through as a part of a
+    #: :class:`Relation`, if any.
+    _pyresto_owner = None
+
+    #: The instance variable which holds the primary key values of the owner
+    #: of the instance its own primary key values start with, kept apart
+    #: from the owner which may be collected before them.
+    _pk_prefix = None
+
+    #: The class variable that holds the names of the known fields of the
+    #: :class:`Model`, or a sample payload to take them from, to store the
+    #: instances compactly. :class:`ModelBase` generates ``__slots__`` for
+    #: these fields and the instance variables, which saves the memory of a
+    #: dictionary per instance when many instances are held. The other
+    #: fields are kept in the instance dictionary which is only created when
+    #: there are such fields. Fetching the missing fields on first access
+    #: works the same. ``None`` means no slots.
+    _fields = None
+
+    #: The names of the fields stored in slots. See :attr:`_fields`.
+    _field_slots = frozenset()
+
+    #: The instance variables stored in slots and their initial values.
+    _slot_defaults = ()
+
     def __init__(self, **kwargs):
         """
         Constructor for model instances. All named parameters passed to this
@@ -436,9 +1960,75 @@ class Model(object):
 
         """
 
+        for name, value in self._slot_defaults:
+            setattr(self, name, value)
+
         self.__update_data(kwargs)
 
 
+    @classmethod
+    def _get_relation(cls, name):
+        """
+        Returns the :class:`Relation` instance defined on the :class:`Model`
+        under the given ``name``.
+
+        """
+
+        for klass in cls.__mro__:
+            relation = klass.__dict__.get(name)
+            if isinstance(relation, Relation):
+                return relation
+
+        raise AttributeError('{0} has no relation named "{1}"'
+                             .format(cls.__name__, name))
+
+    def _invalidate(self, *names):
+        """
+        Drops the cached related resources of the instance for the relations
+        with the given ``names`` or for all of its relations if no names are
+        given, so they are fetched again on next access.
+
+        """
+
+        if not names:
+            names = set(name for klass in self.__class__.__mro__
+                        for name, value in klass.__dict__.iteritems()
+                        if isinstance(value, Relation))
+
+        for name in names:
+            self._get_relation(name).invalidate(self)
+
+    def _as_dict(self):
+        """
+        Returns a dictionary of the fields of the instance, as they are
+        received from the server, without fetching the missing ones.
+
+        """
+
+        data = dict()
+        for name, value in object.__getattribute__(self,
+                                                   '__dict__').iteritems():
+            field = self._field_name(name)
+            if field and name not in _INSTANCE_VARIABLES:
+                data[field] = value
+
+        for name in self._field_slots:
+            try:
+                data[name] = object.__getattribute__(self, name)
+            except AttributeError:  # not set
+                pass
+
+        return data
+
+    def _sync(self, name, store=None):
+        """
+        Syncs the collection of the :class:`Many` relation ``name`` of the
+        instance incrementally and returns it. See :meth:`Many.sync`.
+
+        """
+
+        return self._get_relation(name).sync(self, store)
+
     @property
     def _id(self):
         """A property that returns the instance's primary key value."""
@@ -450,11 +2040,10 @@ class Model(object):
     @property
     def _pk_vals(self):
         if not self.__pk_vals:
-            if hasattr(self, '_pyresto_owner'):
-                self.__pk_vals = self.\
-                    _pyresto_owner._pk_vals[:len(self._pk) - 1] + (self._id,)
-            else:
-                self.__pk_vals = (None,) * (len(self._pk) - 1) + (self._id,)
+            prefix = self._pk_prefix
+            if prefix is None:
+                prefix = (None,) * (len(self._pk) - 1)
+            self.__pk_vals = prefix + (self._id,)
 
         return self.__pk_vals
 
@@ -477,6 +2066,36 @@ class Model(object):
     def _current_path(self):
         return self._path.format(**self._footprint)
 
+    @classmethod
+    def _project(cls, url, fields):
+        """
+        Returns ``url`` changed to request only the given ``fields`` and the
+        primary key fields using :attr:`Model._projection_param`, or ``None``
+        if the model doesn't support projections.
+
+        """
+
+        param = cls._projection_param
+        if not param:
+            return None
+
+        return _set_query_param(url, param,
+                                ','.join(sorted(set(fields) | set(cls._pk))))
+
+    @staticmethod
+    def _field_name(name):
+        """
+        Returns the name of the field stored under the attribute ``name`` or
+        ``None`` for special attributes.
+
+        """
+
+        if name.startswith('__'):
+            # names interfering with relations are stored with a __ prefix
+            return None if name.endswith('__') else name[2:]
+
+        return name
+
     @classmethod
     def _get_sanitized_url(cls, url):
         return urlparse.urljoin(cls._url_base, url)
@@ -491,12 +2110,18 @@ class Model(object):
         All undocumented keyword arguments are passed to the HTTP request as
         keyword arguments such as method, url etc.
 
-        :param fetch_all: (optional) Determines if the function should
-                          recursively fetch any "paginated" resource or simply
+        :param fetch_all: (optional) Determines if the function should fetch
+                          all pages of any "paginated" resource or simply
                           return the downloaded and parsed data along with a
-                          continuation URL.
+                          continuation URL. See :meth:`Model._page_urls` for
+                          how the pages are fetched concurrently.
         :type fetch_all: boolean
 
+        :param paged: (optional) When not fetching all pages, also provide
+                      the URLs of the remaining pages, if they are known, as
+                      the ``page_urls`` attribute of the result.
+        :type paged: boolean
+
         :returns: Returns a tuple where the first part is the parsed data from
                   the server using :attr:`Model._parser`, and the second half
                   is the continuation URL extracted using
@@ -508,63 +2133,353 @@ class Model(object):
         url = cls._get_sanitized_url(url)
 
         if cls._auth is not None and 'auth' not in kwargs:
-            kwargs['auth'] = cls.auth
+            kwargs['auth'] = cls._auth
 
-        if method in ALLOWED_HTTP_METHODS:
-            response = requests.request(method.lower(), url, verify=True,
-                                        **kwargs)
-        else:
+        if method not in ALLOWED_HTTP_METHODS:
             raise InvalidRestMethodException(
                 'Invalid method "{0:s}" is used for the HTTP request. Can only'
                 'use the following: {1!s}'.format(method, ALLOWED_HTTP_METHODS)
             )
 
-        result = collections.namedtuple('result', 'data continuation_url')
-        if 200 <= response.status_code < 300:
-            continuation_url = cls._continuator(response)
-            response_data = response.text
-            data = cls._parser(response_data) if response_data else None
-            if continuation_url:
-                logging.debug('Found more at: %s', continuation_url)
-                if fetch_all:
-                    kwargs['url'] = continuation_url
-                    data += cls._rest_call(**kwargs).data
-                else:
-                    return result(data, continuation_url)
-            return result(data, None)
+        paged = kwargs.pop('paged', False)
+        stream = cls._stream and not fetch_all
+
+        flight = cls._single_flight
+        if flight is None or method != 'GET' or stream:
+            return cls.__exchange(url, method, fetch_all, paged, stream,
+                                  kwargs)
+
+        key = (cls, url, fetch_all, paged, _freeze(kwargs))
+        result, shared = flight.do(key, cls.__exchange, url, method,
+                                   fetch_all, paged, stream, kwargs)
+        if shared:  # every caller, the leader too, gets a copy to modify
+            page_urls = result.page_urls
+            result = _Result(copy.deepcopy(result.data),
+                             result.continuation_url)
+            result.page_urls = page_urls
+
+        return result
+
+    @classmethod
+    def __exchange(cls, url, method, fetch_all, paged, stream, kwargs):
+        result = _Result
+
+        if stream:
+            kwargs['stream'] = True
+
+        response = cls._send(method, url, **kwargs)
+        data, continuation_url = cls._read_response(response, stream=stream)
+
+        if not (fetch_all and continuation_url):
+            result = result(data, continuation_url)
+            if paged and continuation_url:
+                result.page_urls = cls._page_urls(response, continuation_url)
+            return result
+
+        # Pages are fetched iteratively rather than recursively so very long
+        # listings cannot hit the recursion limit. If all the remaining page
+        # URLs can be worked out upfront, they are fetched concurrently.
+        page_urls = cls._page_urls(response, continuation_url)
+        if page_urls:
+            captured = metrics.current_labels()  # the labels are per thread
+
+            def fetch_page(args):
+                index, page_url = args
+                with metrics.labels(**captured):
+                    response = cls._send(method, page_url, **kwargs)
+                    return cls._read_response(response, index)[0]
+
+            pages = map_concurrently(fetch_page, enumerate(page_urls, 1),
+                                     cls._page_workers)
+        else:
+            pages = list()
+            while continuation_url:
+                page, continuation_url = cls._read_response(
+                    cls._send(method, continuation_url, **kwargs),
+                    len(pages) + 1)
+                pages.append(page)
+
+        for page in pages:
+            if page:
+                data += page
+
+        return result(data, None)
+
+    @classmethod
+    def _send(cls, method, url, **kwargs):
+        """
+        Makes the actual HTTP request using the pooled session and returns the
+        :class:`requests.Response` object. ``GET`` requests are revalidated
+        against and stored in :attr:`Model._response_cache` if there is one.
+
+        """
+
+        cache = cls._response_cache
+        if cache is None or method != 'GET' or kwargs.get('stream'):
+            return cls._request(method, url, **kwargs)
+
+        key = cache.make_key(url, kwargs.get('params'), kwargs.get('auth'))
+        conditions = cache.revalidation_headers(key)
+        if conditions:
+            conditional = dict(kwargs)
+            conditional['headers'] = dict(kwargs.get('headers') or dict(),
+                                          **conditions)
+            response = cls._request(method, url, **conditional)
+            if response.status_code == 304:
+                cached = cache.get(key, response)
+                if cached is not None:
+                    return cached
+
+                # evicted since the headers were read, ask for all of it
+                response = cls._request(method, url, **kwargs)
         else:
-            msg = '%s returned HTTP %d: %s\nResponse\nHeaders: %s\nBody: %s'
-            logging.error(msg, url, response.status_code, kwargs,
+            response = cls._request(method, url, **kwargs)
+
+        if response.status_code == 200:
+            cache.set(key, response)
+
+        return response
+
+    @classmethod
+    def _request(cls, method, url, **kwargs):
+        """
+        Sends the request over the pooled session. If there is a
+        :attr:`Model._scheduler`, the request waits for its turn, and is
+        queued and retried if it is rejected because of the rate limit.
+
+        """
+
+        session = cls._get_session()
+        scheduler = cls._scheduler
+        if scheduler is None:
+            return session.request(method.lower(), url, verify=True, **kwargs)
+
+        auth = kwargs.get('auth')
+        attempt = 0
+        while True:
+            scheduler.acquire(auth)
+            response = session.request(method.lower(), url, verify=True,
+                                       **kwargs)
+            scheduler.update(auth, response)
+
+            if not scheduler.should_retry(response, attempt):
+                return response
+
+            response.close()  # release the connection of a streamed response
+            attempt += 1
+            logging.warning('%s is rejected due to the rate limit, retrying',
+                            url)
+
+    @classmethod
+    def _read_response(cls, response, page=0, stream=False):
+        """
+        Checks the status of the ``response`` and returns a tuple of the data
+        parsed by :attr:`Model._parser` and the continuation URL extracted by
+        :meth:`Model._continuator`. The response is reported to the
+        :mod:`pyresto.metrics` sinks, if there are any, with the given
+        ``page`` index.
+
+        If ``stream`` is ``True`` and the body of the streamed ``response`` is
+        a JSON array, the data is an iterator parsing its items one by one
+        instead. See :attr:`Model._stream`.
+
+        :raises: :exc:`ServerResponseException` if the response status is not
+                 2xx.
+
+        """
+
+        measure = bool(metrics.sinks)
+
+        if not 200 <= response.status_code < 300:
+            if measure:
+                metrics.emit(cls, response, page, None)
+
+            msg = '%s returned HTTP %d\nResponse\nHeaders: %s\nBody: %s'
+            logging.error(msg, response.url, response.status_code,
                           response.headers, response.text)
 
-            raise ServerResponseException('Server response not OK. '
-                                          'Response code: {0:d}'
-                                          .format(response.status_code))
+            error = ServerResponseException('Server response not OK. '
+                                            'Response code: {0:d}'
+                                            .format(response.status_code))
+            error.status_code = response.status_code
+            raise error
+
+        continuation_url = cls._continuator(response)
+        if continuation_url:
+            logging.debug('Found more at: %s', continuation_url)
+
+        if stream:
+            reader = streaming.JSONStream(streaming.iter_text(response),
+                                          cls._stream_decoder)
+            if reader.peek() == '[':
+                if measure:  # the body isn't read yet
+                    length = response.headers.get('Content-Length')
+                    metrics.emit(cls, response, page, None,
+                                 size=int(length) if length else None)
+
+                return cls.__iter_stream(reader, response), continuation_url
+
+        started = time.time() if measure else None
+        response_data = reader.read() if stream else response.text
+        data = cls._parser(response_data) if response_data else None
+
+        if measure:
+            metrics.emit(cls, response, page, time.time() - started)
+
+        return data, continuation_url
+
+    @staticmethod
+    def __iter_stream(reader, response):
+        try:
+            for item in reader:
+                yield item
+        finally:  # release the connection even if the iteration is abandoned
+            response.close()
+
+    @classmethod
+    def _page_urls(cls, response, continuation_url):
+        """
+        The class method which receives the first page's response and its
+        continuation URL, and returns the URLs for all the remaining pages of
+        the resource or ``None`` if they cannot be determined without fetching
+        the pages one by one. The default implementation uses the "last" label
+        in the standard HTTP link header and the :attr:`Model._page_param`
+        query string parameter in it, as used by the GitHub API.
+
+        :param response: The response for the first page.
+        :type response: :class:`requests.Response`
+
+        :param continuation_url: The URL of the second page.
+        :type continuation_url: string
+
+        :rtype: list or None
+
+        """
+
+        last_url = response.links.get('last', None)
+        if last_url and isinstance(last_url, dict):
+            last_url = last_url.get('url')
+
+        if not last_url:
+            return None
+
+        param = cls._page_param
+        next_parts = urlparse.urlsplit(continuation_url)
+        next_query = urlparse.parse_qsl(next_parts.query,
+                                        keep_blank_values=True)
+        next_page = dict(next_query).get(param)
+        last_page = dict(urlparse.parse_qsl(
+            urlparse.urlsplit(last_url).query)).get(param)
+
+        if not (next_page and last_page and
+                next_page.isdigit() and last_page.isdigit()):
+            return None
+
+        def page_url(page):
+            query = urllib.urlencode([(k, page if k == param else v)
+                                      for k, v in next_query])
+            return urlparse.urlunsplit(next_parts._replace(query=query))
+
+        return [page_url(page) for page in
+                xrange(int(next_page), int(last_page) + 1)]
 
     def __update_data(self, data):
         cls = self.__class__
+        slots = cls._field_slots
         overlaps = set(cls.__dict__) & set(data)
 
-        for item in overlaps:
+        for item in overlaps - slots:
             if issubclass(getattr(cls, item), Model):
                 self.__dict__['__' + item] = data.pop(item)
 
-        self.__dict__.update(data)
+        if slots:
+            overflow = dict()
+            for key, value in data.iteritems():
+                if key in slots:
+                    setattr(self, key, value)
+                else:
+                    overflow[key] = value
+            data = overflow
+
+        if data:  # don't create the dictionary of a slotted instance
+            self.__dict__.update(data)
+
+
+    def _identified(self, data, fetched=False):
+        """
+        Returns the instance in the current :class:`IdentityMap` with the same
+        class and primary key values, registering this instance if there is
+        none. If the registered instance is not fetched yet, it is upgraded in
+        place with the given ``data``. Returns the instance itself when no
+        identity map is active, or when the instance cannot be identified
+        without fetching it since the model has no primary key or the
+        instance lacks its value.
+
+        """
+
+        identity_map = IdentityMap.current()
+        if identity_map is None or not self._pk:
+            return self
+        if self.__pk_vals is None:
+            try:  # without fetching the missing key through __getattr__
+                object.__getattribute__(self, self._pk[-1])
+            except AttributeError:
+                return self
+
+        instance = identity_map.add(self)
+        if instance is not self and (not instance._fetched or
+                                     instance._loaded_fields is not None):
+            instance.__update_data(dict(data))
+            if fetched:
+                loaded = self._loaded_fields
+                if loaded is not None and instance._fetched:
+                    loaded |= instance._loaded_fields
+                instance._loaded_fields = loaded
+                instance._fetched = True
 
+        return instance
 
-    def __fetch(self):
-        data, next_url = self._rest_call(url=self._current_path,
+    def __fetch(self, field=None):
+        loaded = self._loaded_fields
+        if loaded is not None:  # a narrow follow-up fetch
+            fields = set([field])
+        else:
+            projection = Projection.current()
+            fields = projection and set(projection.fields)
+            if fields and field:
+                fields.add(field)
+
+        path = self._current_path
+        projected = fields and self._project(path, fields)
+        data, next_url = self._rest_call(url=projected or path,
                                          auth=self._auth)
 
+        if projected:
+            self._loaded_fields = frozenset(fields).union(
+                data or (), loaded or ())
+        else:
+            self._loaded_fields = None
+
         if data:
             self.__update_data(data)
 
         self._fetched = True
 
     def __getattr__(self, name):
-        if self._fetched:  # if we fetched and still don't have it, no luck!
+        field = self._field_name(name)
+        if self._loaded_fields is not None:
+            if field is None or field in self._loaded_fields:
+                raise AttributeError(name)
+        elif self._fetched:  # if we fetched and still don't have it, no luck!
             raise AttributeError
-        self.__fetch()
+
+        detectors = ImplicitFetchDetector.active()
+        if detectors:
+            frame = sys._getframe(1)
+            for detector in detectors:
+                detector.record(self.__class__, name, frame)
+
+        self.__fetch(field)
         return getattr(self, name)  # try again after fetching
 
     def __eq__(self, other):
@@ -589,15 +2504,30 @@ class Model(object):
         :param pk: The primary key value for the requested resource.
         :type pk: string
 
+        :param only: (optional) The names of the fields to fetch, overriding
+                     the active :class:`Projection`. Ignored if the model
+                     doesn't support projections.
+        :type only: iterable
+
         :rtype: :class:`Model` or None
 
         """
 
         auth = kwargs.pop('auth', cls._auth)
+        fields = cls.__projected_fields(kwargs.pop('only', None))
+
+        identity_map = IdentityMap.current()
+        if identity_map is not None:
+            instance = identity_map.get(cls, args)
+            if instance is not None and instance._fetched and (
+                    instance._loaded_fields is None or
+                    fields and fields <= instance._loaded_fields):
+                return instance
 
         ids = dict(zip(cls._pk, args))
         path = cls._path.format(**ids)
-        data = cls._rest_call(url=path, auth=auth).data
+        projected = fields and cls._project(path, fields)
+        data = cls._rest_call(url=projected or path, auth=auth).data
 
         if not data:
             return None
@@ -605,7 +2535,265 @@ class Model(object):
         instance = cls(**data)
         instance._pk_vals = args
         instance._fetched = True
+        if projected:
+            instance._loaded_fields = fields.union(data)
         if auth:
             instance._auth = auth
 
-        return instance
+        return instance._identified(data, fetched=True)
+
+    @classmethod
+    def get_many(cls, keys, auth=None, only=None):
+        """
+        Fetches the resources for all the given primary keys in bulk using
+        :meth:`Model._fetch_batch`. A failure to fetch some of the resources
+        does not affect the others::
+
+            for bug in Bug.get_many(bug_ids):
+                if isinstance(bug, Exception):
+                    ...
+
+        :param keys: An iterable of primary key value tuples, or of single
+                     values for models with a single primary key field.
+        :type keys: iterable
+
+        :param only: (optional) See :meth:`Model.get`.
+        :type only: iterable
+
+        :returns: A list with an item for each key in the same order: the
+                  :class:`Model` instance, ``None`` if the resource is not
+                  found, or the exception raised while fetching it.
+        :rtype: list
+
+        """
+
+        keys = [key if isinstance(key, tuple) else (key,) for key in keys]
+        found = cls._fetch_batch(keys, auth=auth or cls._auth, only=only,
+                                 errors=True)
+        return [found[key] for key in keys]
+
+    @classmethod
+    def __projected_fields(cls, only):
+        if only is None:
+            projection = Projection.current()
+            only = projection and projection.fields
+
+        return frozenset(only) if only else None
+
+    @classmethod
+    def _batch_parser(cls, data):
+        """
+        The class method which receives the parsed data returned from
+        :attr:`Model._batch_path` and returns the list of items in it. The
+        default implementation expects a plain list.
+
+        """
+
+        return data
+
+    @classmethod
+    def _fetch_batch(cls, keys, auth=None, only=None, errors=False):
+        """
+        Fetches the resources for all the given primary key tuples. Uses
+        :attr:`Model._batch_path` if it is defined, splitting the keys into
+        requests with URLs shorter than :attr:`Model._batch_max_url_length`,
+        and falls back to making concurrent :meth:`Model.get` calls otherwise.
+
+        :param keys: An iterable of primary key value tuples.
+        :type keys: iterable
+
+        :param only: (optional) See :meth:`Model.get`.
+        :type only: iterable
+
+        :param errors: (optional) If ``True``, the exception raised while
+                       fetching a resource is returned as its value instead
+                       of being raised.
+        :type errors: boolean
+
+        :returns: A dict of primary key tuples to :class:`Model` instances or
+                  ``None`` for the resources that are not returned or not
+                  found.
+        :rtype: dict
+
+        """
+
+        keys = set(tuple(key) for key in keys)
+        found = dict()
+        fields = cls.__projected_fields(only)
+
+        identity_map = IdentityMap.current()
+        if identity_map is not None:
+            for key in list(keys):
+                instance = identity_map.get(cls, key)
+                if instance is not None and instance._fetched and (
+                        instance._loaded_fields is None or
+                        fields and fields <= instance._loaded_fields):
+                    found[key] = instance
+                    keys.remove(key)
+
+        def scoped(func):
+            def call(arg):
+                try:
+                    if identity_map is None:
+                        return func(arg)
+                    with identity_map:  # identity maps are scoped per thread
+                        return func(arg)
+                except Exception:
+                    if not errors:
+                        raise
+                    return sys.exc_info()[1]
+
+            return call
+
+        if not cls._batch_path:
+            options = dict(auth=auth)
+            if fields:  # projections are scoped per thread too
+                options['only'] = fields
+
+            def get(key):
+                try:
+                    return cls.get(*key, **options)
+                except ServerResponseException as error:
+                    if error.status_code != 404:
+                        raise
+                    return None  # not found, as with the batch requests
+
+            found.update(zip(keys, map_concurrently(
+                scoped(get), keys, cls._batch_workers)))
+            return found
+
+        found.update(dict.fromkeys(keys))
+        by_prefix = collections.defaultdict(dict)
+        for key in keys:
+            # ids can come back as a different type, compare them as strings
+            by_prefix[key[:-1]][unicode(key[-1])] = key
+
+        chunks = list()
+        for prefix, ids in by_prefix.iteritems():
+            path_args = dict(zip(cls._pk[:-1], prefix))
+            chunks.extend((path_args, ids, chunk) for chunk in
+                          cls.__chunk_ids(path_args, sorted(ids), fields))
+
+        def fetch_chunk(args):
+            path_args, ids, chunk = args
+            url = cls._batch_path.format(
+                ids=','.join(quote(id.encode('utf8')) for id in chunk),
+                **path_args)
+            projected = fields and cls._project(url, fields)
+            with metrics.labels(template=cls._batch_path):
+                data = cls._rest_call(url=projected or url, auth=auth).data
+
+            chunk_found = dict()
+            for item in cls._batch_parser(data) or list():
+                instance = cls(**item)
+                key = ids.get(unicode(instance._id))
+                if key is None:
+                    continue
+
+                instance._pk_vals = key
+                instance._fetched = True
+                if projected:
+                    instance._loaded_fields = fields.union(item)
+                if auth:
+                    instance._auth = auth
+                chunk_found[key] = instance._identified(item, fetched=True)
+
+            return chunk_found
+
+        results = map_concurrently(scoped(fetch_chunk), chunks,
+                                   cls._batch_workers)
+        for (path_args, ids, chunk), result in zip(chunks, results):
+            if isinstance(result, Exception):
+                found.update((ids[id], result) for id in chunk)
+            else:
+                found.update(result)
+
+        return found
+
+    @classmethod
+    def __chunk_ids(cls, path_args, ids, fields):
+        """
+        Yields lists of the ``ids`` which fit in a
+        :attr:`Model._batch_path` URL no longer than
+        :attr:`Model._batch_max_url_length`.
+
+        """
+
+        url = cls._get_sanitized_url(cls._batch_path.format(ids='',
+                                                            **path_args))
+        base_length = len(url) + (len(','.join(fields | set(cls._pk))) * 3 +
+                                  len(cls._projection_param) + 2
+                                  if fields else 0)
+
+        chunk, length = list(), base_length
+        for id in ids:
+            quoted = quote(id.encode('utf8'))
+            # leave room for the ids to be encoded again by a projection
+            id_length = (len(quote(quoted)) + 3 if fields
+                         else len(quoted) + 1)
+            if chunk and length + id_length > cls._batch_max_url_length:
+                yield chunk
+                chunk, length = list(), base_length
+            chunk.append(id)
+            length += id_length
+
+        if chunk:
+            yield chunk
+
+    @classmethod
+    def _submit(cls, func, *args, **kwargs):
+        """
+        Runs ``func(*args, **kwargs)`` on :attr:`Model._executor` within the
+        caller's :class:`IdentityMap` and :class:`Projection`, if any, and
+        returns the future.
+
+        """
+
+        contexts = [context for context in (IdentityMap.current(),
+                                            Projection.current())
+                    if context is not None]
+        if not contexts:
+            return cls._executor.submit(func, *args, **kwargs)
+
+        def call(index=0):
+            if index == len(contexts):
+                return func(*args, **kwargs)
+            with contexts[index]:
+                return call(index + 1)
+
+        return cls._executor.submit(call)
+
+    @classmethod
+    def aget(cls, *args, **kwargs):
+        """
+        The asynchronous version of :meth:`Model.get`. Returns a future whose
+        ``result()`` is the fetched :class:`Model` instance or ``None``::
+
+            futures = [Repo.aget(name) for name in repo_names]
+            repos = pyresto.concurrency.gather(futures)
+
+        """
+
+        return cls._submit(cls.get, *args, **kwargs)
+
+    @classmethod
+    def _arest_call(cls, *args, **kwargs):
+        """
+        The asynchronous version of :meth:`Model._rest_call`. Returns a future
+        for the same result tuple.
+
+        """
+
+        return cls._submit(cls._rest_call, *args, **kwargs)
+
+    def _aload(self, name):
+        """
+        Returns a future for the value of the attribute with the given
+        ``name``, such as a :class:`Foreign` or a :class:`Many` relation,
+        loading it in the background if it is not loaded yet. Iterating over
+        a lazy :class:`Many` relation can also be done in the background using
+        the ``prefetch`` option.
+
+        """
+
+        return self._submit(getattr, self, name)
@@ -0,0 +1,149 @@
+# coding: utf-8
+
+"""
+pyresto.decoders
+~~~~~~~~~~~~~~~~
+
+This module contains the JSON decoder which can be used as
+:attr:`Model._parser <pyresto.core.Model._parser>` and
+:attr:`Model._stream_decoder <pyresto.core.Model._stream_decoder>`. It uses
+the fastest JSON library installed and shares a single copy of each key and
+of short repeated values, such as logins and states, between all the decoded
+objects instead of allocating new strings for every item::
+
+    class GitHubModel(Model):
+        _parser = _stream_decoder = JSONDecoder()
+
+It is not used by default: with the standard library alone the sharing
+slows decoding down, so it pays off when a faster library is installed or
+when many decoded items are held in memory.
+
+"""
+
+import json
+
+
+__all__ = ('JSONDecoder', 'BACKENDS')
+
+
+def _import(name):
+    try:
+        return __import__(name)
+    except ImportError:
+        return None
+
+
+#: The supported decoding libraries in the order of preference when no
+#: backend is specified. Only the installed ones are listed.
+BACKENDS = tuple(name for name in ('simplejson', 'ujson', 'json')
+                 if _import(name) is not None)
+
+
+class JSONDecoder(object):
+    """
+    A callable decoding JSON text, with the same interface as
+    :func:`json.loads`, and a ``raw_decode`` method as
+    :class:`json.JSONDecoder` for :class:`pyresto.streaming.JSONStream`.
+
+    """
+
+    def __init__(self, backend=None, intern_keys=True, intern_values=True,
+                 max_length=32, max_strings=100000):
+        """
+        :param backend: (optional) The name of the library to decode with,
+                        one of :data:`BACKENDS`. The first one of them is used
+                        if not provided.
+        :type backend: string
+
+        :param intern_keys: (optional) Share the object keys.
+        :type intern_keys: boolean
+
+        :param intern_values: (optional) Share the string values not longer
+                              than ``max_length``.
+        :type intern_values: boolean
+
+        :param max_strings: (optional) The maximum number of distinct strings
+                            to keep. Strings seen after that are not shared.
+        :type max_strings: int
+
+        """
+
+        backend = backend or BACKENDS[0]
+        if backend not in BACKENDS:
+            raise ValueError('JSON backend {0!r} is not available'.format(
+                backend))
+
+        self.backend = backend
+        self.max_length = max_length
+        self.max_strings = max_strings
+        self.__strings = dict()
+        self.__intern_keys = intern_keys
+        self.__intern_values = intern_values
+
+        hook = self.__make_hook() if intern_keys or intern_values else None
+        if backend == 'ujson':
+            # ujson has neither hooks nor raw_decode, so its results are
+            # walked afterwards and the standard library is used to stream
+            self.__loads = _import('ujson').loads
+            self.__post = hook and self.__make_walker(hook)
+            self.__decoder = json.JSONDecoder(object_pairs_hook=hook)
+        else:
+            self.__decoder = _import(backend).JSONDecoder(
+                object_pairs_hook=hook)
+            self.__loads = self.__decoder.decode
+            self.__post = None
+
+    def __len__(self):
+        return len(self.__strings)
+
+    def __call__(self, text):
+        data = self.__loads(text)
+        return self.__post(data) if self.__post else data
+
+    def raw_decode(self, text, idx=0):
+        """
+        Decodes the JSON value starting at ``idx`` in ``text`` and returns it
+        with the index where it ends.
+
+        """
+
+        return self.__decoder.raw_decode(text, idx)
+
+    def __make_hook(self):
+        # This runs for every decoded object so it avoids Python level calls
+        strings = self.__strings
+        share, find = strings.setdefault, strings.get
+        limit = self.max_strings
+        max_length = self.max_length
+        string_types = (str, unicode)
+
+        if not self.__intern_values:
+            def hook(pairs):
+                intern = share if len(strings) < limit else find
+                return dict([(intern(k, k), v) for k, v in pairs])
+        elif not self.__intern_keys:
+            def hook(pairs):
+                intern = share if len(strings) < limit else find
+                return dict([(k, intern(v, v) if v.__class__ in string_types
+                              and len(v) <= max_length else v)
+                             for k, v in pairs])
+        else:
+            def hook(pairs):
+                intern = share if len(strings) < limit else find
+                return dict([(intern(k, k), intern(v, v)
+                              if v.__class__ in string_types and
+                              len(v) <= max_length else v)
+                             for k, v in pairs])
+
+        return hook
+
+    @staticmethod
+    def __make_walker(hook):
+        def walk(data):
+            if isinstance(data, dict):
+                return hook((k, walk(v)) for k, v in data.iteritems())
+            elif isinstance(data, list):
+                return [walk(item) for item in data]
+            return data
+
+        return walk
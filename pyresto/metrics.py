@@ -0,0 +1,231 @@
+# coding: utf-8
+
+"""
+pyresto.metrics
+~~~~~~~~~~~~~~~
+
+This module contains the instrumentation hooks of the request path. Every page
+fetched by :meth:`Model._rest_call <pyresto.core.Model._rest_call>` is
+reported to the registered sinks as a :class:`RequestEvent`. A sink is any
+callable taking the event, so exporting to another metrics system is simply::
+
+    from pyresto import metrics
+
+    metrics.add_sink(lambda event: statsd.timing(event.template, event.ttfb))
+
+Use :class:`MetricsAggregator` to collect the events in-process. When there
+are no sinks, nothing is measured at all.
+
+"""
+
+import bisect
+import collections
+import contextlib
+import threading
+
+
+__all__ = ('RequestEvent', 'Histogram', 'MetricsAggregator', 'add_sink',
+           'remove_sink', 'labels', 'current_labels', 'emit')
+
+
+#: The fields of a request event:
+#:
+#: - ``model``: The :class:`Model` class making the request.
+#: - ``template``: The path template the URL is formatted from, such as a
+#:   :class:`Many` path or :attr:`Model._path`.
+#: - ``url``, ``method`` and ``status``: As they are.
+#: - ``bytes``: The size of the response body, or ``None`` if it is unknown
+#:   for a streamed response.
+#: - ``ttfb``: Seconds from sending the request until the headers arrived.
+#: - ``parse_time``: Seconds spent parsing the response body, or ``None`` if
+#:   it is not parsed upfront.
+#: - ``page``: The index of the page for paginated resources, starting at 0.
+#: - ``cache_hit``: ``True`` if the response was served from the response
+#:   cache.
+RequestEvent = collections.namedtuple(
+    'RequestEvent', 'model template url method status bytes ttfb parse_time '
+                    'page cache_hit')
+
+#: The registered sinks. Use :func:`add_sink` and :func:`remove_sink`.
+sinks = list()
+
+_context = threading.local()
+
+_missing = object()
+
+
+def add_sink(sink):
+    """Registers a callable to be called with every :class:`RequestEvent`."""
+    sinks.append(sink)
+
+
+def remove_sink(sink):
+    """Unregisters a sink registered with :func:`add_sink`."""
+    sinks.remove(sink)
+
+
+@contextlib.contextmanager
+def labels(**values):
+    """
+    Sets the ``template`` and ``page`` values reported for the requests made
+    in the current thread within the ``with`` block.
+
+    """
+
+    if not sinks:
+        yield
+        return
+
+    previous = getattr(_context, 'labels', None)
+    _context.labels = dict(previous or dict(), **values)
+    try:
+        yield
+    finally:
+        _context.labels = previous
+
+
+def current_labels():
+    """
+    Returns the values set with :func:`labels` for the current thread, to
+    set them again in the threads making requests on its behalf::
+
+        captured = current_labels()
+
+        def fetch(url):
+            with labels(**captured):
+                ...
+
+    """
+
+    return dict(getattr(_context, 'labels', None) or dict())
+
+
+def emit(model, response, page, parse_time, size=_missing):
+    """
+    Reports a :class:`RequestEvent` for the given response to all sinks. The
+    size of the body is read from the response unless ``size`` is given.
+
+    """
+
+    current = getattr(_context, 'labels', None) or dict()
+    request = response.request
+    elapsed = response.elapsed
+
+    event = RequestEvent(
+        model=model,
+        template=current.get('template', model._path),
+        url=response.url,
+        method=request.method if request is not None else None,
+        status=response.status_code,
+        bytes=len(response.content or '') if size is _missing else size,
+        ttfb=elapsed.total_seconds() if elapsed is not None else None,
+        parse_time=parse_time,
+        page=current.get('page', 0) + page,
+        cache_hit=getattr(response, 'from_cache', False),
+    )
+
+    for sink in list(sinks):
+        sink(event)
+
+
+class Histogram(object):
+    """
+    A histogram of values with exponentially growing buckets, which is cheap
+    to update and gives approximate percentiles.
+
+    """
+
+    #: The upper bounds of the buckets, doubling from 1ms to about 9 minutes.
+    bounds = tuple(0.001 * 2 ** i for i in xrange(20))
+
+    def __init__(self):
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+
+    def percentile(self, percent):
+        """
+        Returns the upper bound of the bucket containing the given percentile
+        or ``None`` if there are no values.
+
+        """
+
+        if not self.count:
+            return None
+
+        rank = percent / 100.0 * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank and count:
+                return (self.bounds[index] if index < len(self.bounds)
+                        else float('inf'))
+
+
+class MetricsAggregator(object):
+    """
+    A sink collecting the request counts, transferred bytes, cache hits and
+    latency histograms per model and path template::
+
+        aggregator = MetricsAggregator()
+        metrics.add_sink(aggregator)
+        ...
+        for row in aggregator.summary():
+            print row['template'], row['requests'], row['ttfb_p99']
+
+    """
+
+    def __init__(self):
+        self.__stats = dict()
+        self.__lock = threading.Lock()
+
+    def __call__(self, event):
+        key = (event.model.__name__, event.template, event.method)
+        with self.__lock:
+            stats = self.__stats.get(key)
+            if stats is None:
+                stats = self.__stats[key] = dict(
+                    requests=0, errors=0, bytes=0, cache_hits=0,
+                    ttfb=Histogram(), parse_time=Histogram())
+
+            stats['requests'] += 1
+            stats['bytes'] += event.bytes or 0
+            if not 200 <= event.status < 300:
+                stats['errors'] += 1
+            if event.cache_hit:
+                stats['cache_hits'] += 1
+            if event.ttfb is not None:
+                stats['ttfb'].observe(event.ttfb)
+            if event.parse_time is not None:
+                stats['parse_time'].observe(event.parse_time)
+
+    def summary(self):
+        """
+        Returns a list of dicts, one for each model, template and method,
+        ordered by the number of requests.
+
+        """
+
+        rows = list()
+        with self.__lock:
+            for (model, template, method), stats in self.__stats.iteritems():
+                rows.append(dict(
+                    model=model, template=template, method=method,
+                    requests=stats['requests'], errors=stats['errors'],
+                    bytes=stats['bytes'], cache_hits=stats['cache_hits'],
+                    ttfb_p50=stats['ttfb'].percentile(50),
+                    ttfb_p99=stats['ttfb'].percentile(99),
+                    parse_time_p50=stats['parse_time'].percentile(50),
+                    parse_time_p99=stats['parse_time'].percentile(99)))
+
+        return sorted(rows, key=lambda row: -row['requests'])
+
+    def reset(self):
+        """Drops all the collected values."""
+        with self.__lock:
+            self.__stats.clear()
@@ -0,0 +1,299 @@
+# coding: utf-8
+
+"""
+pyresto.mirror
+~~~~~~~~~~~~~~
+
+This module contains a local SQLite mirror of the fetched models, which
+answers the repeated queries over them without any requests. Each model is
+stored in its own table keyed on its primary key values, and the fields
+declared as indexes get an indexed column to filter and sort on::
+
+    from pyresto.mirror import Mirror
+
+    mirror = Mirror('bugzilla.sqlite', ttl=3600)
+    mirror.register(Bug, indexes=('status', 'assigned_to.name'))
+    mirror.save(Bug.get_many(bug_ids))
+
+    bugs = mirror.query(Bug, {'status': 'NEW', 'assigned_to.name': 'dev1'})
+
+Rows older than the ``ttl`` are fetched again on access.
+
+"""
+
+import json
+import sqlite3
+import threading
+import time
+
+
+__all__ = ('Mirror',)
+
+
+def _quote(name):
+    return '"{0}"'.format(name.replace('"', '""'))
+
+
+def _lookup(data, path):
+    for part in path.split('.'):
+        if not isinstance(data, dict):
+            return None
+        data = data.get(part)
+
+    # only scalars can be compared in SQL
+    return None if isinstance(data, (dict, list)) else data
+
+
+class _Table(object):
+    """The schema of the table of a registered model."""
+
+    def __init__(self, model, name, indexes):
+        self.model = model
+        self.name = _quote(name)
+        self.indexes = tuple(indexes)
+        self.keys = tuple(_quote('pk:' + field) for field in model._pk)
+        self.columns = self.keys + tuple(_quote(path) for path in indexes)
+
+    def row(self, instance):
+        data = instance._as_dict()
+        return (tuple(instance._pk_vals) +
+                tuple(_lookup(data, path) for path in self.indexes) +
+                (json.dumps(data), int(bool(instance._fetched)), time.time()))
+
+    def instance(self, row):
+        keys, (data, fetched) = row[:len(self.keys)], row[len(self.keys):]
+        instance = self.model(**json.loads(data))
+        instance._pk_vals = keys
+        instance._fetched = bool(fetched)
+        return instance
+
+
+class Mirror(object):
+    """
+    A local copy of the models in a SQLite database. Models are registered
+    with :meth:`register`, stored with :meth:`save` and read back with
+    :meth:`get` and :meth:`query` as instances of the same models.
+
+    """
+
+    def __init__(self, path, ttl=None):
+        """
+        :param path: The path of the SQLite database.
+        :type path: string
+
+        :param ttl: (optional) The number of seconds after which the stored
+                    instances are fetched again when they are read. They
+                    never expire if this is ``None``.
+        :type ttl: int or None
+
+        """
+
+        self.ttl = ttl
+        self.__tables = dict()
+        self.__lock = threading.RLock()
+        self.__db = sqlite3.connect(path, check_same_thread=False)
+
+    def register(self, model, indexes=(), table=None):
+        """
+        Creates the table of the ``model``, if it doesn't exist, with an
+        indexed column for each of the given ``indexes``. Indexes added
+        later are filled from the stored instances.
+
+        :param model: The model class.
+        :type model: :class:`pyresto.core.Model`
+
+        :param indexes: (optional) The dotted paths of the fields to filter
+                        and sort on, such as ``assigned_to.name``.
+        :type indexes: iterable
+
+        :param table: (optional) The name of the table. The full name of the
+                      model class is used if not provided.
+        :type table: string
+
+        """
+
+        if not model._pk:
+            raise ValueError('Models without primary keys cannot be mirrored')
+
+        name = table or '{0}.{1}'.format(model.__module__, model.__name__)
+        schema = _Table(model, name, indexes)
+        with self.__lock, self.__db:
+            self.__db.execute(
+                'CREATE TABLE IF NOT EXISTS {0} ({1}, data TEXT, '
+                'fetched INTEGER, stored REAL, PRIMARY KEY ({2}))'.format(
+                    schema.name, ', '.join(schema.keys),
+                    ', '.join(schema.keys)))
+
+            existing = set(row[1] for row in self.__db.execute(
+                'PRAGMA table_info({0})'.format(schema.name)))
+            added = [path for path in schema.indexes if path not in existing]
+            for path in added:
+                self.__db.execute('ALTER TABLE {0} ADD COLUMN {1}'.format(
+                    schema.name, _quote(path)))
+            if added:
+                self.__fill(schema, added)
+
+            for path in schema.indexes:
+                self.__db.execute(
+                    'CREATE INDEX IF NOT EXISTS {0} ON {1} ({2})'.format(
+                        _quote('{0}:{1}'.format(name, path)), schema.name,
+                        _quote(path)))
+
+        self.__tables[model] = schema
+
+    def __fill(self, schema, paths):
+        rows = self.__db.execute('SELECT rowid, data FROM {0}'.format(
+            schema.name)).fetchall()
+        self.__db.executemany(
+            'UPDATE {0} SET {1} WHERE rowid=?'.format(
+                schema.name, ', '.join(_quote(path) + '=?' for path in paths)),
+            [tuple(_lookup(json.loads(data), path) for path in paths) +
+             (rowid,) for rowid, data in rows])
+
+    def __table(self, model):
+        try:
+            return self.__tables[model]
+        except KeyError:
+            raise KeyError('{0} is not registered'.format(model.__name__))
+
+    def save(self, instances):
+        """
+        Stores the given model ``instances``, replacing the stored ones with
+        the same primary keys. Any iterable, such as the value of a
+        :class:`pyresto.core.Many` relation or the result of
+        :meth:`Model.get_many <pyresto.core.Model.get_many>`, can be given.
+        ``None`` values and the exceptions in place of the instances which
+        failed to be fetched are skipped.
+
+        """
+
+        by_model = dict()
+        for instance in instances:
+            if instance is not None and not isinstance(instance, Exception):
+                by_model.setdefault(instance.__class__, list()).append(
+                    instance)
+
+        with self.__lock, self.__db:
+            for model, members in by_model.iteritems():
+                schema = self.__table(model)
+                self.__db.executemany(
+                    'INSERT OR REPLACE INTO {0} ({1}, data, fetched, stored) '
+                    'VALUES ({2})'.format(
+                        schema.name, ', '.join(schema.columns),
+                        ', '.join('?' * (len(schema.columns) + 3))),
+                    [schema.row(instance) for instance in members])
+
+    def get(self, model, *args, **kwargs):
+        """
+        Returns the stored instance of the ``model`` with the given primary
+        key values. If there is none, or if it is expired, it is fetched
+        with :meth:`Model.get <pyresto.core.Model.get>` and stored. Any
+        keyword arguments are passed to it.
+
+        """
+
+        schema = self.__table(model)
+        rows = self.__select(schema, ' AND '.join(
+            key + '=?' for key in schema.keys), args, fresh=True)
+        if rows:
+            return schema.instance(rows[0])
+
+        instance = model.get(*args, **kwargs)
+        if instance is not None:
+            self.save([instance])
+        return instance
+
+    def query(self, model, filters=None, where=None, params=(),
+              order_by=None, limit=None):
+        """
+        Returns the list of the stored instances of the ``model`` matching
+        the given ``filters`` and ``where`` clause. Expired instances are
+        fetched again and the query is repeated on the updated rows.
+
+        :param filters: (optional) A dictionary of the indexed paths and the
+                        values they should be equal to.
+        :type filters: dict
+
+        :param where: (optional) An SQL expression the rows should satisfy,
+                      referring to the indexed paths as quoted column names,
+                      such as ``"commit.author.date" >= ?``.
+        :type where: string
+
+        :param params: (optional) The parameters of the ``where`` clause.
+        :type params: tuple
+
+        :param order_by: (optional) An SQL ordering, such as
+                         ``"last_change_time" DESC``.
+        :type order_by: string
+
+        :param limit: (optional) The maximum number of instances to return.
+        :type limit: int
+
+        :rtype: list
+
+        """
+
+        schema = self.__table(model)
+        clauses, values = list(), list()
+        for path, value in (filters or dict()).iteritems():
+            if path not in schema.indexes:
+                raise KeyError('{0} is not an index of {1}'.format(
+                    path, model.__name__))
+            clauses.append(_quote(path) + ('=?' if value is not None
+                                           else ' IS ?'))
+            values.append(value)
+        if where:
+            clauses.append('(' + where + ')')
+            values.extend(params)
+
+        condition = ' AND '.join(clauses)
+        suffix = ''
+        if order_by:
+            suffix += ' ORDER BY ' + order_by
+        if limit is not None:
+            suffix += ' LIMIT {0:d}'.format(limit)
+
+        if self.ttl is not None:
+            self.__refresh(schema, condition, values)
+
+        return [schema.instance(row)
+                for row in self.__select(schema, condition, values, suffix)]
+
+    def __select(self, schema, condition, values, suffix='', fresh=False):
+        values = list(values)
+        if fresh and self.ttl is not None:
+            condition = ' AND '.join(filter(None, (condition, 'stored>=?')))
+            values.append(time.time() - self.ttl)
+
+        with self.__lock:
+            return self.__db.execute(
+                'SELECT {0}, data, fetched FROM {1}{2}{3}'.format(
+                    ', '.join(schema.keys), schema.name,
+                    ' WHERE ' + condition if condition else '', suffix),
+                values).fetchall()
+
+    def __refresh(self, schema, condition, values):
+        """
+        Fetches the expired rows matching the ``condition`` again. The rows of
+        the resources which are not found anymore are deleted, and the ones
+        which fail to be fetched for other reasons are kept as they are.
+
+        """
+
+        condition = ' AND '.join(filter(None, (condition, 'stored<?')))
+        with self.__lock:
+            keys = self.__db.execute('SELECT {0} FROM {1} WHERE {2}'.format(
+                ', '.join(schema.keys), schema.name, condition),
+                list(values) + [time.time() - self.ttl]).fetchall()
+        if not keys:
+            return
+
+        found = schema.model._fetch_batch(keys, errors=True)
+        self.save(found.itervalues())
+
+        # the resources which are not found come back as None
+        gone = [key for key in keys if found.get(tuple(key)) is None]
+        with self.__lock, self.__db:
+            self.__db.executemany('DELETE FROM {0} WHERE {1}'.format(
+                schema.name, ' AND '.join(key + '=?' for key in schema.keys)),
+                gone)
@@ -0,0 +1,191 @@
+# coding: utf-8
+
+"""
+pyresto.ratelimit
+~~~~~~~~~~~~~~~~~
+
+This module contains the rate limit aware request scheduler which can be
+plugged into :attr:`Model._scheduler <pyresto.core.Model._scheduler>`. It
+reads the ``X-RateLimit-*`` and ``Retry-After`` headers used by the GitHub
+API, paces the requests so the budget of each credential lasts until it is
+reset and holds the requests back instead of failing them when the budget
+runs out.
+
+"""
+
+import logging
+import threading
+import time
+
+
+__all__ = ('RateBudget', 'RateLimitScheduler')
+
+
+class RateBudget(object):
+    """The rate limit budget of a single credential."""
+
+    def __init__(self):
+        #: The total number of requests allowed in a rate limit window.
+        self.limit = None
+
+        #: The number of requests left in the current window.
+        self.remaining = None
+
+        #: The time the current window ends, as a UNIX timestamp.
+        self.reset = None
+
+        #: The number of requests made with the credential so far.
+        self.used = 0
+
+        #: No requests should be made before this UNIX timestamp.
+        self.blocked_until = 0
+
+        #: The time the last request was scheduled at.
+        self.last_request = 0
+
+    def update(self, response, now=None):
+        """Updates the budget using the headers of the given response."""
+        now = time.time() if now is None else now
+        headers = response.headers
+
+        self.used += 1
+        if 'X-RateLimit-Limit' in headers:
+            self.limit = int(headers['X-RateLimit-Limit'])
+        if 'X-RateLimit-Remaining' in headers:
+            self.remaining = int(headers['X-RateLimit-Remaining'])
+        if 'X-RateLimit-Reset' in headers:
+            self.reset = float(headers['X-RateLimit-Reset'])
+
+        retry_after = headers.get('Retry-After')
+        if retry_after and retry_after.isdigit():
+            self.blocked_until = max(self.blocked_until,
+                                     now + int(retry_after))
+        elif self.remaining == 0 and self.reset:
+            self.blocked_until = max(self.blocked_until, self.reset)
+
+    def delay(self, pace_below=0, now=None):
+        """
+        Returns the number of seconds to wait before making the next request.
+        Requests are spread evenly over the rest of the window once the
+        remaining budget drops below ``pace_below`` of the limit.
+
+        """
+
+        now = time.time() if now is None else now
+        if self.blocked_until > now:
+            return self.blocked_until - now
+
+        if None in (self.remaining, self.reset, self.limit) or \
+           self.reset <= now:
+            return 0
+
+        if self.remaining >= self.limit * pace_below:
+            return 0
+
+        interval = (self.reset - now) / max(self.remaining, 1)
+        return max(0, self.last_request + interval - now)
+
+    def as_dict(self):
+        return dict(limit=self.limit, remaining=self.remaining,
+                    reset=self.reset, used=self.used)
+
+
+class RateLimitScheduler(object):
+    """
+    Schedules the requests of the models using it according to the rate limit
+    budget of the credential used for each request. See
+    :meth:`Model._request <pyresto.core.Model._request>`.
+
+    """
+
+    def __init__(self, pace_below=0.25, max_retries=5, sleep=time.sleep):
+        """
+        :param pace_below: (optional) The fraction of the budget below which
+                           the requests are paced to last until the reset
+                           time. Use ``1`` to always pace and ``0`` to never
+                           pace.
+        :type pace_below: float
+
+        :param max_retries: (optional) The number of times a request rejected
+                            because of the rate limit is queued and retried
+                            before giving up.
+        :type max_retries: int
+
+        """
+
+        self.pace_below = pace_below
+        self.max_retries = max_retries
+        self.__sleep = sleep
+        self.__budgets = dict()
+        self.__lock = threading.Lock()
+
+    def budget(self, auth):
+        """
+        Returns the :class:`RateBudget` for the given credential. Anonymous
+        requests use the budget of ``None``.
+
+        """
+
+        with self.__lock:
+            budget = self.__budgets.get(auth)
+            if budget is None:
+                budget = self.__budgets[auth] = RateBudget()
+
+        return budget
+
+    def acquire(self, auth):
+        """
+        Blocks until a request can be made with the given credential. Auth
+        types tracking their own budgets, such as
+        :class:`pyresto.auth.AuthPool`, provide it through a ``rate_budget``
+        method.
+
+        """
+
+        pooled = getattr(auth, 'rate_budget', None)
+        budget = None if pooled else self.budget(auth)
+        while True:
+            with self.__lock:
+                current = pooled() if pooled else budget
+                delay = current.delay(self.pace_below)
+                if delay <= 0:
+                    current.last_request = time.time()
+                    return
+
+            logging.debug('Rate limit reached, waiting %.2f seconds', delay)
+            self.__sleep(delay)
+
+    def update(self, auth, response):
+        """Records the given response made with the given credential."""
+        if hasattr(auth, 'rate_budget'):  # tracks its own budget
+            return
+
+        budget = self.budget(auth)
+        with self.__lock:
+            budget.update(response)
+
+    def should_retry(self, response, attempt):
+        """
+        Returns ``True`` if the given response is a rejection due to the rate
+        limit and it can be retried after waiting.
+
+        """
+
+        if response.status_code not in (403, 429) or \
+           attempt >= self.max_retries:
+            return False
+
+        headers = response.headers
+        return ('Retry-After' in headers or
+                headers.get('X-RateLimit-Remaining') == '0')
+
+    def usage(self):
+        """
+        Returns a dict of credentials to dicts of their ``limit``,
+        ``remaining``, ``reset`` and ``used`` values.
+
+        """
+
+        with self.__lock:
+            return dict((auth, budget.as_dict())
+                        for auth, budget in self.__budgets.iteritems())
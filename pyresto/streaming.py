@@ -0,0 +1,147 @@
+# coding: utf-8
+
+"""
+pyresto.streaming
+~~~~~~~~~~~~~~~~~
+
+This module contains the incremental JSON reader used to parse the pages of
+models with :attr:`Model._stream <pyresto.core.Model._stream>` enabled. The
+items of a top-level JSON array are decoded one at a time as the response
+body arrives, so only a single item needs to be held in memory instead of the
+whole page.
+
+"""
+
+import codecs
+import json
+
+
+__all__ = ('JSONStream', 'iter_text')
+
+_WHITESPACE = u' \t\n\r'
+_DELIMITERS = _WHITESPACE + u',]'
+
+
+def iter_text(response, chunk_size=64 * 1024):
+    """
+    Yields the body of the streamed ``response`` as unicode chunks, decoded
+    with the encoding of the response or UTF-8.
+
+    """
+
+    decoder = codecs.getincrementaldecoder(response.encoding or 'utf-8')(
+        errors='replace')
+    for chunk in response.iter_content(chunk_size):
+        text = decoder.decode(chunk)
+        if text:
+            yield text
+
+    text = decoder.decode('', final=True)
+    if text:
+        yield text
+
+
+class JSONStream(object):
+    """
+    Reads JSON text from an iterable of unicode ``chunks``. Iterating over
+    the stream yields the items of the top-level array one by one::
+
+        stream = JSONStream(iter_text(response))
+        if stream.peek() == '[':
+            for item in stream:
+                ...
+        else:
+            data = json.loads(stream.read())
+
+    """
+
+    def __init__(self, chunks, decoder=None):
+        self.__chunks = iter(chunks)
+        self.__decoder = decoder if decoder is not None else json.JSONDecoder()
+        self.__buffer = u''
+        self.__pos = 0
+        self.__eof = False
+
+    def __fill(self, size=1):
+        """
+        Reads chunks until at least ``size`` more characters are available
+        after the current position. Returns ``False`` at the end of input.
+
+        """
+
+        pending = [self.__buffer[self.__pos:]]
+        available = len(pending[0])
+        while available < size and not self.__eof:
+            chunk = next(self.__chunks, None)
+            if chunk is None:
+                self.__eof = True
+            else:
+                pending.append(chunk)
+                available += len(chunk)
+
+        self.__buffer = u''.join(pending)
+        self.__pos = 0
+        return available >= size
+
+    def __skip_whitespace(self):
+        """Returns the next non-whitespace character or ``''`` at the end."""
+        while True:
+            buffer, pos = self.__buffer, self.__pos
+            while pos < len(buffer) and buffer[pos] in _WHITESPACE:
+                pos += 1
+            self.__pos = pos
+
+            if pos < len(buffer):
+                return buffer[pos]
+            if not self.__fill():
+                return u''
+
+    def peek(self):
+        """Returns the first non-whitespace character left in the input."""
+        return self.__skip_whitespace()
+
+    def read(self):
+        """Returns the rest of the input as a single string."""
+        self.__fill(float('inf'))
+        text, self.__buffer, self.__pos = self.__buffer[self.__pos:], u'', 0
+        return text
+
+    def __decode(self):
+        self.__skip_whitespace()
+        while True:
+            try:
+                value, end = self.__decoder.raw_decode(self.__buffer,
+                                                       self.__pos)
+            except ValueError:
+                if self.__eof:
+                    raise
+            else:
+                # a number at the end of the buffer may continue in the next
+                # chunk, so a value only counts when a delimiter follows it
+                if self.__eof or (end < len(self.__buffer) and
+                                  self.__buffer[end] in _DELIMITERS):
+                    self.__pos = end
+                    return value
+
+            # at least double the pending text to avoid re-parsing a large
+            # item too many times
+            self.__fill(2 * (len(self.__buffer) - self.__pos) + 1)
+
+    def __expect(self, chars):
+        char = self.__skip_whitespace()
+        if char not in chars or not char:
+            raise ValueError('Expecting one of {0!r}, got {1!r}'.format(
+                chars, char))
+        self.__pos += 1
+        return char
+
+    def __iter__(self):
+        self.__expect(u'[')
+        if self.__skip_whitespace() == u']':
+            self.__pos += 1
+            return
+
+        while True:
+            yield self.__decode()
+            if self.__expect(u',]') == u']':
+                return
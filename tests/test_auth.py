@@ -7,7 +7,9 @@ except ImportError:
     import unittest
 
 from pyresto.core import Model
-from pyresto.auth import AuthList, enable_auth, InvalidAuthTypeException
+from pyresto.auth import (AuthList, enable_auth, InvalidAuthTypeException,
+                          AppQSAuth, HTTPBasicAuth, AuthPool)
+from requests.models import PreparedRequest
 
 
 class MockModel(Model):
@@ -41,3 +43,70 @@ class TestEnableAuth(unittest.TestCase):
 
         with self.assertRaises(InvalidAuthTypeException):
             self.auth('c', arg='baz')
+
+
+def make_request(url='http://api.test/items?page=2'):
+    request = PreparedRequest()
+    request.prepare(method='GET', url=url, hooks=dict())
+    return request
+
+
+def make_response(**headers):
+    return Mock(headers=dict((k, str(v)) for k, v in headers.items()))
+
+
+class TestAuthTypes(unittest.TestCase):
+    def test_query_string(self):
+        auth = AppQSAuth('id', 'secret')
+        request = auth(make_request())
+        self.assertEqual(request.url, 'http://api.test/items?page=2&'
+                                      'client_id=id&client_secret=secret')
+        # re-authenticating on redirects should not repeat the params
+        self.assertEqual(auth(request).url, request.url)
+
+    def test_basic(self):
+        request = HTTPBasicAuth('user', 'pass')(make_request())
+        self.assertTrue(request.headers['Authorization'].startswith('Basic '))
+
+
+class TestAuthPool(unittest.TestCase):
+    def setUp(self):
+        self.credentials = [AppQSAuth('a', 'a'), AppQSAuth('b', 'b')]
+        self.pool = AuthPool(self.credentials)
+
+    def respond(self, request, remaining, limit=10):
+        response = make_response(**{'X-RateLimit-Limit': limit,
+                                    'X-RateLimit-Remaining': remaining,
+                                    'X-RateLimit-Reset': 4000000000})
+        for hook in request.hooks['response']:
+            hook(response)
+
+    def test_spread(self):
+        first = self.pool(make_request())
+        self.respond(first, 9)
+        second = self.pool(make_request())
+        self.assertNotEqual(first.url, second.url)
+        self.respond(second, 3)
+
+        # the first credential has more remaining budget now
+        self.assertIn('client_id=a', self.pool(make_request()).url)
+        self.assertEqual([usage['remaining'] for usage in self.pool.usage()],
+                         [9, 3])
+
+    def test_exhausted(self):
+        self.respond(self.pool(make_request()), 0)
+        self.respond(self.pool(make_request()), 5)
+        for _ in xrange(3):
+            self.assertIn('client_id=b', self.pool(make_request()).url)
+
+        budget = self.pool.rate_budget()
+        self.assertEqual((budget.remaining, budget.limit), (5, 20))
+        self.assertEqual(budget.delay(), 0)
+
+    def test_enable_auth(self):
+        auth = enable_auth(AuthList(pool=AuthPool), MockModel, 'pool')
+        auth(credentials=self.credentials)
+        self.assertIsInstance(MockModel._auth, AuthPool)
+        self.assertEqual(MockModel._auth.credentials,
+                         tuple(self.credentials))
+        auth(None)
@@ -0,0 +1,183 @@
+# coding: utf-8
+
+import shutil
+import tempfile
+
+from mock import Mock, patch
+try:
+    import unittest2 as unittest
+except ImportError:
+    import unittest
+
+from requests.models import Response
+from requests.structures import CaseInsensitiveDict
+
+from pyresto.cache import ResponseCache, SQLiteCache, FileCache
+from pyresto.core import Model
+
+
+def make_response(status_code, content='', **headers):
+    response = Response()
+    response.status_code = status_code
+    response.headers = CaseInsensitiveDict(headers)
+    response.url = 'http://api.test/items'
+    response._content = content
+    response._content_consumed = True
+    return response
+
+
+class MockModel(Model):
+    _pk = 'id'
+    _url_base = 'http://api.test'
+
+
+class TestResponseCache(unittest.TestCase):
+    def test_abstract(self):
+        with self.assertRaises(TypeError):
+            ResponseCache()
+
+
+class CacheTestMixin(object):
+    def test_set_get(self):
+        key = self.cache.make_key('http://api.test/items')
+        self.assertEqual(self.cache.revalidation_headers(key), dict())
+        self.assertIsNone(self.cache.get(key))
+
+        self.cache.set(key, make_response(200, '[1, 2]', ETag='"abc"',
+                                          Link='<http://a>; rel="next"'))
+        self.assertEqual(self.cache.revalidation_headers(key),
+                         {'If-None-Match': '"abc"'})
+
+        response = self.cache.get(key)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), [1, 2])
+        self.assertEqual(response.links['next']['url'], 'http://a')
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+
+    def test_iter_content(self):
+        key = self.cache.make_key('http://api.test/items')
+        self.cache.set(key, make_response(200, '[1, 2]', ETag='"abc"'))
+        self.assertEqual(''.join(self.cache.get(key).iter_content(2)),
+                         '[1, 2]')
+
+    def test_stream(self):
+        session = Mock()
+        session.request.side_effect = lambda *args, **kwargs: make_response(
+            200, '[1, 2]', ETag='"v1"')
+        MockModel._response_cache = self.cache
+        MockModel._get_session = Mock(return_value=session)
+        MockModel._stream = True
+        try:
+            for _ in xrange(2):
+                data, _ = MockModel._rest_call('/items', fetch_all=False)
+                self.assertEqual(list(data), [1, 2])
+        finally:
+            del MockModel._response_cache
+            del MockModel._get_session
+            del MockModel._stream
+
+        # streamed responses are neither revalidated nor stored
+        self.assertNotIn('headers', session.request.call_args[1])
+        self.assertEqual((self.cache.hits, self.cache.misses), (0, 0))
+
+    def test_not_revalidatable(self):
+        key = self.cache.make_key('http://api.test/items')
+        self.cache.set(key, make_response(200, '[]'))
+        self.assertIsNone(self.cache.get(key))
+
+    def test_eviction(self):
+        self.cache.max_size = 200
+        keys = [self.cache.make_key('http://api.test/' + str(i))
+                for i in xrange(3)]
+        for key in keys:
+            self.cache.set(key, make_response(200, '1' * 100,
+                                              ETag='"' + key + '"'))
+
+        self.assertIsNone(self.cache.get(keys[0]))
+        self.assertIsNotNone(self.cache.get(keys[2]))
+
+    def test_replaced_size(self):
+        self.cache.max_size = 400
+        keys = [self.cache.make_key('http://api.test/' + str(i))
+                for i in xrange(2)]
+        for _ in xrange(3):  # replacing an entry doesn't grow the total
+            for key in keys:
+                self.cache.set(key, make_response(200, '1' * 100,
+                                                  ETag='"' + key + '"'))
+
+        self.assertIsNotNone(self.cache.get(keys[0]))
+        self.assertIsNotNone(self.cache.get(keys[1]))
+
+    def test_evicted_before_not_modified(self):
+        session = Mock()
+        session.request.side_effect = [
+            make_response(200, '[1]', ETag='"v1"'),
+            make_response(304),
+            make_response(200, '[2]', ETag='"v2"'),
+        ]
+        MockModel._response_cache = self.cache
+        MockModel._get_session = Mock(return_value=session)
+        try:
+            self.assertEqual(MockModel._rest_call('/items').data, [1])
+            with patch.object(self.cache, 'get', return_value=None):
+                self.assertEqual(MockModel._rest_call('/items').data, [2])
+        finally:
+            del MockModel._response_cache
+            del MockModel._get_session
+
+        headers = session.request.call_args[1].get('headers') or dict()
+        self.assertNotIn('If-None-Match', headers)
+        self.assertEqual(self.cache.revalidation_headers(
+            self.cache.make_key('http://api.test/items')),
+            {'If-None-Match': '"v2"'})
+
+    def test_auth_key(self):
+        auth_a, auth_b = Mock(), Mock()
+        auth_a.token, auth_b.token = 'a', 'b'
+        self.assertNotEqual(self.cache.make_key('/a', auth=auth_a),
+                            self.cache.make_key('/a', auth=auth_b))
+
+    def test_model_revalidation(self):
+        session = Mock()
+        session.request.side_effect = [
+            make_response(200, '[1]', ETag='"v1"'),
+            make_response(304),
+        ]
+        MockModel._response_cache = self.cache
+        MockModel._get_session = Mock(return_value=session)
+        try:
+            self.assertEqual(MockModel._rest_call('/items').data, [1])
+            self.assertEqual(MockModel._rest_call('/items').data, [1])
+        finally:
+            del MockModel._response_cache
+            del MockModel._get_session
+
+        headers = session.request.call_args[1]['headers']
+        self.assertEqual(headers['If-None-Match'], '"v1"')
+
+
+class TestSQLiteCache(CacheTestMixin, unittest.TestCase):
+    def setUp(self):
+        self.cache = SQLiteCache(':memory:', compress=False)
+
+    def test_compression(self):
+        cache = SQLiteCache(':memory:')
+        key = cache.make_key('http://api.test/items')
+        cache.set(key, make_response(200, '[1]', ETag='"v1"'))
+        self.assertEqual(cache.get(key).json(), [1])
+
+
+class TestFileCache(CacheTestMixin, unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.cache = FileCache(self.directory, compress=False)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_no_scan_under_limit(self):
+        self.cache.max_size = 1 << 20
+        key = self.cache.make_key('http://api.test/items')
+        with patch('pyresto.cache.os.listdir', side_effect=AssertionError):
+            self.cache.set(key, make_response(200, '[1]', ETag='"v1"'))
+        self.assertEqual(self.cache.get(key).json(), [1])
@@ -0,0 +1,118 @@
+# coding: utf-8
+
+import os
+import shutil
+import tempfile
+
+try:
+    import unittest2 as unittest
+except ImportError:
+    import unittest
+
+from pyresto.checkpoint import (Checkpoint, CheckpointStore,
+                                SQLiteCheckpointStore, FileCheckpointStore)
+from pyresto.core import LazyList, Model, Many
+
+
+class CheckpointStoreTests(object):
+    def test_store(self):
+        self.assertIsNone(self.store.load('commits'))
+
+        self.store.save('commits', Checkpoint('/many?page=2', 1, 3))
+        self.store.save('commits', Checkpoint('/many?page=3', 2, 0))
+        self.assertEqual(self.store.load('commits'),
+                         Checkpoint('/many?page=3', 2, 0))
+
+        self.store.delete('commits')
+        self.assertIsNone(self.store.load('commits'))
+        self.store.delete('commits')
+
+
+class TestCheckpointStore(unittest.TestCase):
+    def test_abstract(self):
+        with self.assertRaises(TypeError):
+            CheckpointStore()
+
+
+class TestSQLiteCheckpointStore(CheckpointStoreTests, unittest.TestCase):
+    def setUp(self):
+        self.store = SQLiteCheckpointStore(':memory:')
+
+
+class TestFileCheckpointStore(CheckpointStoreTests, unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.store = FileCheckpointStore(os.path.join(self.directory, 'c'))
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+
+class Item(Model):
+    _pk = 'id'
+
+
+class Owner(Model):
+    _pk = 'id'
+    items = Many(Item, '/items?page=1', lazy=True)
+    prefetched = Many(Item, '/items?page=1', lazy=True, prefetch=2)
+
+
+class TestResumable(unittest.TestCase):
+    def setUp(self):
+        self.urls = list()
+
+        def rest_call(cls, url, auth=None, fetch_all=True):
+            self.urls.append(url)
+            page = int(url.rsplit('=', 1)[1])
+            next_url = '/items?page={0}'.format(page + 1) if page < 3 else None
+            return [dict(id=page * 10 + i) for i in xrange(3)], next_url
+
+        Item._rest_call = classmethod(rest_call)
+        self.store = SQLiteCheckpointStore(':memory:')
+
+    def tearDown(self):
+        del Item._rest_call
+
+    def test_resume(self):
+        items = Owner(id=1).items.resumable(self.store, 'items')
+        self.assertIsNone(items.checkpoint)
+        self.assertEqual([next(items).id for _ in xrange(5)],
+                         [10, 11, 12, 20, 21])
+        # the last item isn't consumed until the next one is asked for
+        self.assertEqual(items.checkpoint, Checkpoint('/items?page=2', 1, 1))
+        self.assertEqual(self.store.load('items'),
+                         Checkpoint('/items?page=2', 1, 0))
+
+        items.save()
+        del self.urls[:]
+        resumed = Owner(id=1).items.resumable(self.store, 'items')
+        self.assertEqual([item.id for item in resumed],
+                         [21, 22, 30, 31, 32])
+        self.assertEqual(self.urls, ['/items?page=2', '/items?page=3'])
+        self.assertIsNone(resumed.checkpoint)
+        self.assertIsNone(self.store.load('items'))
+
+    def test_every(self):
+        items = Owner(id=1).prefetched.resumable(self.store, 'items',
+                                                 every=4)
+        self.assertEqual([next(items).id for _ in xrange(6)],
+                         [10, 11, 12, 20, 21, 22])
+        self.assertEqual(self.store.load('items'),
+                         Checkpoint('/items?page=2', 1, 1))
+
+    def test_key_required(self):
+        with self.assertRaises(ValueError):
+            Owner(id=1).items.resumable(self.store)
+        self.assertEqual(self.urls, list())
+
+    def test_checkpoint(self):
+        items = Owner(id=1).items.resumable(
+            checkpoint=Checkpoint('/items?page=3', 2, 2))
+        self.assertEqual([item.id for item in items], [32])
+
+    def test_not_resumable(self):
+        items = LazyList(lambda item: item, lambda: ([1, 2], None))
+        self.assertEqual(list(items.resumable()), [1, 2])
+        with self.assertRaises(ValueError):
+            items.resumable(checkpoint=Checkpoint('/items?page=3', 2, 2))
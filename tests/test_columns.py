@@ -0,0 +1,90 @@
+# coding: utf-8
+
+import array
+import math
+
+from mock import Mock
+try:
+    import unittest2 as unittest
+except ImportError:
+    import unittest
+
+from pyresto import columns
+from pyresto.columns import to_columns
+from pyresto.core import Model, WrappedList
+
+
+class Commit(Model):
+    _pk = 'sha'
+
+
+class TestToColumns(unittest.TestCase):
+    def setUp(self):
+        self.numpy = columns.numpy
+        self.items = [
+            dict(sha='a', stats=dict(total=3, ratio=0.5), merged=True,
+                 parents=[dict(sha='p')]),
+            dict(sha='b', stats=dict(total=5, ratio=1), merged=False,
+                 parents=[]),
+        ]
+
+    def tearDown(self):
+        columns.numpy = self.numpy
+
+    def test_paths(self):
+        columns.numpy = None
+        result = to_columns(self.items, ['sha', 'stats.total', 'stats.ratio',
+                                         'merged', 'parents.0.sha', 'none'])
+        self.assertEqual(result.keys(), ['sha', 'stats.total', 'stats.ratio',
+                                         'merged', 'parents.0.sha', 'none'])
+        self.assertEqual(result['sha'], ['a', 'b'])
+        self.assertEqual(result['stats.total'], array.array('l', [3, 5]))
+        self.assertEqual(result['stats.ratio'], array.array('d', [0.5, 1]))
+        self.assertEqual(result['merged'], array.array('b', [1, 0]))
+        self.assertEqual(result['parents.0.sha'], ['p', None])
+        self.assertTrue(all(math.isnan(value) for value in result['none']))
+
+    def test_missing_numbers(self):
+        columns.numpy = None
+        self.items.append(dict(sha='c'))
+        total = to_columns(self.items, ['stats.total'])['stats.total']
+        self.assertEqual(total.typecode, 'd')
+        self.assertEqual(list(total[:2]), [3, 5])
+        self.assertTrue(math.isnan(total[2]))
+
+    def test_overflow(self):
+        columns.numpy = None
+        self.assertEqual(to_columns([dict(n=2 ** 70)], ['n'])['n'],
+                         [2 ** 70])
+
+    def test_models(self):
+        columns.numpy = None
+        commits = [Commit(**item) for item in self.items]
+        self.assertEqual(to_columns(commits, ['sha', 'stats.total']),
+                         dict(sha=['a', 'b'],
+                              **{'stats.total': array.array('l', [3, 5])}))
+
+    def test_models_not_fetched(self):
+        columns.numpy = None
+        rest_call = Commit._rest_call = Mock()
+        try:
+            commits = WrappedList(self.items, lambda data: Commit(**data))
+            commits[0]  # wraps the first item only
+            result = commits.to_columns(['sha', 'stats.total', 'extra',
+                                         'sha.extra'])
+        finally:
+            del Commit._rest_call
+
+        self.assertFalse(rest_call.called)
+        self.assertEqual(result['stats.total'], array.array('l', [3, 5]))
+        for path in ('extra', 'sha.extra'):
+            self.assertTrue(all(map(math.isnan, result[path])))
+
+    @unittest.skipIf(columns.numpy is None, 'NumPy is not installed')
+    def test_numpy(self):
+        numpy = columns.numpy
+        result = to_columns(self.items, ['sha', 'stats.total', 'parents'])
+        self.assertEqual(result['stats.total'].dtype, numpy.int64)
+        self.assertEqual(result['sha'].dtype, object)
+        self.assertEqual(result['parents'].shape, (2,))
+        self.assertEqual(list(result['parents']), [[dict(sha='p')], []])
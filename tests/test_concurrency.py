@@ -0,0 +1,123 @@
+# coding: utf-8
+
+try:
+    import unittest2 as unittest
+except ImportError:
+    import unittest
+
+import threading
+
+from pyresto.concurrency import (Executor, Future, SingleFlight,
+                                 TimeoutError, gather, map_concurrently)
+
+
+class TestMapConcurrently(unittest.TestCase):
+    def test_order(self):
+        self.assertEqual(map_concurrently(lambda x: x * 2, xrange(50), 4),
+                         range(0, 100, 2))
+
+    def test_sequential(self):
+        self.assertEqual(map_concurrently(lambda x: x, [1, 2], 1), [1, 2])
+
+    def test_error(self):
+        def func(x):
+            if x == 7:
+                raise ValueError(x)
+            return x
+
+        with self.assertRaises(ValueError):
+            map_concurrently(func, xrange(20), 4)
+
+
+class TestExecutor(unittest.TestCase):
+    def test_submit(self):
+        executor = Executor(max_workers=2)
+        futures = [executor.submit(pow, i, 2) for i in xrange(10)]
+        self.assertEqual(gather(futures), [i ** 2 for i in xrange(10)])
+        self.assertTrue(all(future.done() for future in futures))
+
+    def test_bounded(self):
+        executor = Executor(max_workers=2)
+        release = threading.Event()
+        running = list()
+
+        def task():
+            running.append(True)
+            release.wait()
+
+        futures = [executor.submit(task) for _ in xrange(4)]
+        with self.assertRaises(TimeoutError):
+            futures[-1].result(0.1)
+        self.assertEqual(len(running), 2)
+
+        release.set()
+        gather(futures)
+        self.assertEqual(len(running), 4)
+
+    def test_error(self):
+        future = Executor().submit(int, 'x')
+        self.assertIsInstance(future.exception(), ValueError)
+        with self.assertRaises(ValueError):
+            future.result()
+
+
+class TestFuture(unittest.TestCase):
+    def test_callbacks(self):
+        future = Future()
+        results = list()
+        future.add_done_callback(lambda f: results.append(f.result()))
+        future.set_result(5)
+        future.add_done_callback(lambda f: results.append(f.result()))
+        self.assertEqual(results, [5, 5])
+
+
+class TestSingleFlight(unittest.TestCase):
+    def setUp(self):
+        self.flight = SingleFlight()
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self.calls = list()
+
+    def call(self, value):
+        self.calls.append(value)
+        self.started.set()
+        self.release.wait(5)
+        if isinstance(value, Exception):
+            raise value
+        return value
+
+    def run_waiters(self, key, value, count):
+        executor = Executor(max_workers=count + 1)
+        leader = executor.submit(self.flight.do, key, self.call, value)
+        self.started.wait(5)
+
+        futures = [executor.submit(self.flight.do, key, self.call, value)
+                   for _ in xrange(count)]
+        while self.flight.coalesced < count:
+            threading.Event().wait(0.01)
+
+        self.release.set()
+        return leader, futures
+
+    def test_coalesced(self):
+        leader, futures = self.run_waiters('a', 5, 3)
+        self.assertEqual(leader.result(5), (5, True))
+        self.assertEqual(gather(futures), [(5, True)] * 3)
+        self.assertEqual(self.calls, [5])
+        self.assertEqual(self.flight.coalesced, 3)
+
+        # the next call runs again once the result is known
+        self.assertEqual(self.flight.do('a', self.call, 6), (6, False))
+
+    def test_error(self):
+        error = ValueError()
+        leader, futures = self.run_waiters('a', error, 2)
+        self.assertEqual([future.exception(5) for future in
+                          [leader] + futures], [error] * 3)
+        self.assertEqual(self.calls, [error])
+
+    def test_keys(self):
+        self.release.set()
+        self.assertEqual(self.flight.do('a', self.call, 1), (1, False))
+        self.assertEqual(self.flight.do('b', self.call, 2), (2, False))
+        self.assertEqual(self.flight.coalesced, 0)
@@ -1,12 +1,28 @@
 # coding: utf-8
 
-from mock import Mock
+import collections
+import copy
+import gc
+import json
+import threading
+import time
+import urlparse
+import warnings
+import weakref
+
+from mock import Mock, patch
 try:
     import unittest2 as unittest
 except ImportError:
     import unittest
 
-from pyresto.core import Model, Many, WrappedList, LazyList
+from pyresto.concurrency import Executor, SingleFlight, gather
+from pyresto.core import (Model, Many, Foreign, WrappedList, LazyList,
+                          PagedList, SessionPool, IdentityMap, RelationCache,
+                          RelationGroup, Delta,
+                          ImplicitFetchDetector, ImplicitFetchException,
+                          ImplicitFetchWarning, Projection,
+                          ServerResponseException, InvalidRestMethodException)
 
 
 class MockModel(Model):
@@ -25,6 +41,196 @@ class TestModelBase(unittest.TestCase):
             IdlessModel()
 
 
+class TestSlottedModel(unittest.TestCase):
+    def setUp(self):
+        class Commit(Model):
+            _pk = 'sha'
+            _path = '/commits/{sha}'
+            _fields = dict(sha='a', message='m', parents=[], author=None,
+                           get=None)
+
+        Commit.author = Foreign(MockModel, '__author', embedded=True)
+        Commit._rest_call = Mock(return_value=(dict(
+            sha='a', message='m', parents=[], files=[1]), None))
+        self.Commit = Commit
+
+    def test_slots(self):
+        self.assertEqual(set(self.Commit.__slots__) -
+                         set(self.Commit._field_slots),
+                         set(['_fetched', '_loaded_fields', '_pyresto_owner',
+                              '_pk_prefix', '_Model__pk_vals',
+                              '_Model__footprint',
+                              'author']))
+        self.assertEqual(self.Commit._field_slots,
+                         frozenset(['sha', 'message', 'parents']))
+        self.assertIn('get', self.Commit._fields)
+
+        commit = self.Commit(sha='a', message='m')
+        self.assertEqual(commit.__dict__, dict())
+        self.assertEqual((commit.sha, commit.message), ('a', 'm'))
+        self.assertFalse(commit._fetched)
+        self.assertEqual(commit._current_path, '/commits/a')
+
+    def test_overflow(self):
+        commit = self.Commit(sha='a', author=dict(id=1), extra=1)
+        self.assertEqual(commit.__dict__, {'__author': dict(id=1),
+                                           'extra': 1})
+        self.assertEqual(commit.author.id, 1)
+        self.assertEqual(commit.extra, 1)
+        self.assertEqual(commit._as_dict(), dict(sha='a', extra=1,
+                                                 author=dict(id=1)))
+
+    def test_lazy_fetch(self):
+        commit = self.Commit(sha='a')
+        self.assertEqual(commit.parents, list())
+        self.assertEqual(commit.files, [1])
+        self.assertTrue(commit._fetched)
+        with self.assertRaises(AttributeError):
+            commit.missing
+        self.assertEqual(self.Commit._rest_call.call_count, 1)
+
+    def test_subclass(self):
+        class Merge(self.Commit):
+            _fields = ('sha', 'merged_by')
+
+        self.assertEqual(Merge.__slots__, ('merged_by',))
+        self.assertEqual(Merge._field_slots,
+                         frozenset(['sha', 'message', 'parents',
+                                    'merged_by']))
+        merge = Merge(sha='a', merged_by='b')
+        self.assertEqual((merge.sha, merge.merged_by), ('a', 'b'))
+        self.assertEqual(merge.__dict__, dict())
+
+
+class TestSessionPool(unittest.TestCase):
+    def test_for_base(self):
+        pool = SessionPool.for_base('http://pool.test')
+        self.assertIs(SessionPool.for_base('http://pool.test'), pool)
+        self.assertIsNot(SessionPool.for_base('http://other.test'), pool)
+
+    def test_session_per_thread(self):
+        pool = SessionPool(keep_alive=False)
+        session = pool.session
+        self.assertIs(pool.session, session)
+        self.assertEqual(session.headers['Connection'], 'close')
+
+        sessions = list()
+        thread = threading.Thread(target=lambda: sessions.append(pool.session))
+        thread.start()
+        thread.join()
+        self.assertIsNot(sessions[0], session)
+        self.assertIs(sessions[0].get_adapter('https://a'),
+                      session.get_adapter('https://a'))
+
+
+class TestRelationCache(unittest.TestCase):
+    def test_weak_owners(self):
+        cache = RelationCache()
+        owner = MockModel(id=1)
+        cache[owner] = 'value'
+        self.assertIn(owner, cache)
+        self.assertEqual(cache[owner], 'value')
+
+        del owner
+        gc.collect()
+        self.assertEqual(len(cache), 0)
+
+    def test_weak_relation_owners(self):
+        class Owner(Model):
+            _pk = 'id'
+            items = Many(MockModel, '/items')
+            lazy_items = Many(MockModel, '/items', lazy=True)
+            parent = Foreign(MockModel, 'parent_data', embedded=True)
+
+        rest_call = Mock(return_value=([dict(id=1)], None))
+        MockModel._rest_call = rest_call
+        try:
+            owner = Owner(id=1, parent_data=dict(id=2))
+            items, lazy_items = owner.items, owner.lazy_items
+            parent = owner.parent
+            self.assertEqual(items[0]._pk_vals, (1,))
+            self.assertEqual(list(lazy_items)[0].id, 1)
+            self.assertEqual(parent._pyresto_owner.id, 1)
+            caches = [Owner.__dict__[name]._cache
+                      for name in ('items', 'lazy_items', 'parent')]
+            self.assertEqual(map(len, caches), [1, 1, 1])
+
+            owner_ref = weakref.ref(owner)
+            del owner
+            gc.collect()
+            self.assertIsNone(owner_ref())
+            self.assertEqual(map(len, caches), [0, 0, 0])
+
+            # the related models outlive their owners
+            self.assertEqual(items[0].id, 1)
+            self.assertEqual(parent._pk_vals, (2,))
+        finally:
+            del MockModel._rest_call
+
+    def test_collected_owner_keys(self):
+        class Commit(Model):
+            _pk = ('repo_name', 'sha')
+            _path = '/repos/{repo_name}/commits/{sha}'
+
+        class Repo(Model):
+            _pk = 'full_name'
+            commits = Many(Commit, '/repos/{full_name}/commits')
+
+        Commit._rest_call = Mock(return_value=([dict(sha='abc')], None))
+        commits = Repo(full_name='octo/hello').commits
+        gc.collect()
+        self.assertEqual(list(commits)[0]._current_path,
+                         '/repos/octo/hello/commits/abc')
+
+    def test_lru(self):
+        cache = RelationCache(maxsize=2)
+        owners = [MockModel(id=i) for i in xrange(3)]
+        cache[owners[0]] = 0
+        cache[owners[1]] = 1
+        cache.get(owners[0])  # owner 1 is the least recently used now
+        cache[owners[2]] = 2
+
+        self.assertEqual(len(cache), 2)
+        self.assertNotIn(owners[1], cache)
+        self.assertEqual(cache[owners[0]], 0)
+
+    def test_ttl(self):
+        cache = RelationCache(ttl=0.05)
+        owner = MockModel(id=1)
+        cache[owner] = None
+        self.assertIn(owner, cache)
+        time.sleep(0.1)
+        self.assertNotIn(owner, cache)
+
+    def test_global_defaults(self):
+        RelationCache.maxsize = 1
+        try:
+            self.assertEqual(RelationCache().maxsize, 1)
+            self.assertEqual(RelationCache(maxsize=5).maxsize, 5)
+        finally:
+            RelationCache.maxsize = None
+
+    def test_invalidate(self):
+        class Owner(Model):
+            _pk = 'id'
+            items = Many(MockModel, '/items')
+
+        rest_call = Mock(return_value=([dict(id=1)], None))
+        MockModel._rest_call = rest_call
+        try:
+            owner = Owner(id=1)
+            self.assertIs(owner.items, owner.items)
+            self.assertEqual(rest_call.call_count, 1)
+
+            owner._invalidate()
+            owner.items
+            owner._invalidate('items')
+            owner.items
+            self.assertEqual(rest_call.call_count, 3)
+        finally:
+            del MockModel._rest_call
+
+
 class TestWrappedList(unittest.TestCase):
     def setUp(self):
         self.wrapper = Mock(side_effect=lambda d: d if isinstance(d, MockModel)
@@ -75,6 +281,12 @@ class TestWrappedList(unittest.TestCase):
         # the line blow implicitly checks Model.__eq__
         self.assertIn(MockModel(**self.list[1]), self.instance)
 
+    def test_to_columns(self):
+        a = self.instance[0]  # the cached model is read as well
+        self.assertEqual(list(self.instance.to_columns(['id'])['id']),
+                         [1, 2])
+        self.assertEqual(self.wrapper.call_count, 1)
+
 
 class TestLazyList(unittest.TestCase):
     def setUp(self):
@@ -90,6 +302,54 @@ class TestLazyList(unittest.TestCase):
             for item, orig in zip(self.instance, self.list):
                 self.assertEqual(item.id, orig['id'])
 
+    def test_to_columns(self):
+        self.assertEqual(list(self.instance.to_columns(['id'])['id']),
+                         [1, 2])
+        self.assertFalse(self.wrapper.called)
+
+
+class TestLazyListPrefetch(unittest.TestCase):
+    def setUp(self):
+        self.wrapper = lambda d: MockModel(**d)
+        self.fetched = list()
+
+        def make_fetcher(page, last):
+            def fetcher():
+                self.fetched.append(page)
+                next_fetcher = (make_fetcher(page + 1, last) if page < last
+                                else None)
+                return [dict(id=page)], next_fetcher
+            return fetcher
+
+        self.make_fetcher = make_fetcher
+
+    def test_iterator(self):
+        instance = LazyList(self.wrapper, self.make_fetcher(0, 9), prefetch=2)
+        for i in xrange(2):
+            self.assertEqual([item.id for item in instance], range(10))
+
+    def test_early_stop(self):
+        instance = LazyList(self.wrapper, self.make_fetcher(0, 999),
+                            prefetch=2)
+        iterator = iter(instance)
+        self.assertEqual(next(iterator).id, 0)
+        iterator.close()
+
+        time.sleep(0.3)
+        count = len(self.fetched)
+        time.sleep(0.3)
+        self.assertEqual(len(self.fetched), count)
+        # one page consumed, 2 buffered and one waiting to be buffered
+        self.assertLessEqual(count, 4)
+
+    def test_error(self):
+        def fetcher():
+            raise ServerResponseException()
+
+        instance = LazyList(self.wrapper, fetcher, prefetch=1)
+        with self.assertRaises(ServerResponseException):
+            list(instance)
+
 
 class TestManyLazy(unittest.TestCase):
     @classmethod
@@ -141,15 +401,19 @@ class TestManyList(unittest.TestCase):
                                    preprocessor=cls.preprocessor)
 
     def setUp(self):
+        self.calls = list()
+
         @classmethod
         def rest_call_mock(cls, url, method='GET', fetch_all=True, **kwargs):
             self.assertEqual(method, 'GET')
-            self.assertTrue(fetch_all)
+            self.assertFalse(fetch_all)
+            self.calls.append(url)
             if url == '/many':
                 return self.list[:1], '/many?i=1'
             else:
                 return self.list[1:], None
 
+        self.preprocessor.reset_mock()
         MockModel._rest_call = rest_call_mock
         self.instance = MockModel(id=13)
 
@@ -161,7 +425,91 @@ class TestManyList(unittest.TestCase):
             self.assertEqual(item.id, orig['id'])
             self.assertIsInstance(item, MockModel)
 
-        self.assertEqual(self.preprocessor.call_count, 1)
+        self.assertEqual(self.preprocessor.call_count, 2)
+        self.assertEqual(len(self.instance.list_many), 2)
+        self.assertEqual(self.calls, ['/many', '/many?i=1'])
+
+    def test_on_demand(self):
+        items = self.instance.list_many
+        self.assertIsInstance(items, PagedList)
+        self.assertEqual(items[0].id, 1)
+        self.assertEqual(items[:1], [items[0]])
+        self.assertEqual(self.calls, ['/many'])
+
+        self.assertEqual(items[1].id, 2)
+        self.assertEqual([item.id for item in items[:10]], [1, 2])
+        with self.assertRaises(IndexError):
+            items[2]
+        self.assertEqual(self.calls, ['/many', '/many?i=1'])
+
+    def test_known_pages(self):
+        class PagedResult(Result):
+            page_urls = None
+
+        pages = dict(('/many?page={0}'.format(page),
+                      [dict(id=i) for i in xrange(page * 3 - 2,
+                                                  min(page * 3, 7) + 1)])
+                     for page in xrange(1, 4))
+
+        @classmethod
+        def rest_call_mock(cls, url, method='GET', fetch_all=True, **kwargs):
+            self.calls.append(url)
+            if url != '/many':
+                return pages[url], None
+            result = PagedResult(pages['/many?page=1'], '/many?page=2')
+            result.page_urls = ['/many?page=2', '/many?page=3']
+            return result
+
+        MockModel._rest_call = rest_call_mock
+        items = self.instance.list_many
+        self.assertEqual(len(items), 7)
+        self.assertEqual(items[-1].id, 7)
+        self.assertEqual(self.calls, ['/many', '/many?page=3'])
+        self.assertEqual(items._loaded_pages, 2)
+
+        self.assertEqual(items[4].id, 5)
+        self.assertEqual([item.id for item in items[-3:]], [5, 6, 7])
+        self.assertEqual(self.calls, ['/many', '/many?page=3',
+                                      '/many?page=2'])
+        with self.assertRaises(IndexError):
+            items[7]
+
+    def test_iterate_known_pages(self):
+        lock = threading.Lock()
+        active, peak, fetched = [0], [0], list()
+
+        def make_fetcher(page):
+            def fetcher():
+                with lock:
+                    active[0] += 1
+                    peak[0] = max(peak[0], active[0])
+                time.sleep(0.02)
+                with lock:
+                    active[0] -= 1
+                    fetched.append(page)
+                return [dict(id=page)], None
+            return fetcher
+
+        items = PagedList(lambda data: MockModel(**data), [dict(id=0)], None,
+                          [make_fetcher(page) for page in xrange(1, 6)],
+                          workers=3)
+        self.assertEqual([item.id for item in items], range(6))
+        self.assertEqual(sorted(fetched), range(1, 6))
+        self.assertEqual(peak[0], 3)  # the pages are read ahead at once
+
+        # breaking out early only reads ahead the first window
+        items = PagedList(lambda data: MockModel(**data), [dict(id=0)], None,
+                          [make_fetcher(page) for page in xrange(1, 6)],
+                          workers=3)
+        del fetched[:]
+        for item in items:
+            if item.id == 1:
+                break
+        self.assertEqual(sorted(fetched), [1, 2, 3])
+
+    def test_to_columns(self):
+        self.assertEqual(list(self.instance.list_many.to_columns(['id'])[
+            'id']), [1, 2])
 
     def tearDown(self):
         del MockModel._rest_call
@@ -171,9 +519,641 @@ class TestManyList(unittest.TestCase):
         del MockModel.list_many
 
 
-class TestForeign(unittest.TestCase):
-    pass
+class TestManySync(unittest.TestCase):
+    def setUp(self):
+        class Commit(Model):
+            _pk = 'sha'
+
+        class Repo(Model):
+            _pk = 'name'
+            commits = Many(Commit, '/repos/{name}/commits', delta=Delta(
+                'since', 'commit.date', newest_first=True))
+            plain = Many(Commit, '/repos/{name}/commits')
+
+        self.remote = [dict(sha='b', commit=dict(date='2012-01-02')),
+                       dict(sha='a', commit=dict(date='2012-01-01'))]
+
+        def rest_call(url, auth=None):
+            since = dict(urlparse.parse_qsl(url.partition('?')[2])).get(
+                'since', '')
+            return Result([item for item in self.remote
+                           if item['commit']['date'] >= since], None)
+
+        self.rest_call = Commit._rest_call = Mock(side_effect=rest_call)
+        self.repo = Repo(name='pyresto')
+
+    def url(self):
+        return self.rest_call.call_args[1]['url']
+
+    def test_sync(self):
+        commits = self.repo._sync('commits')
+        self.assertEqual([commit.sha for commit in commits], ['b', 'a'])
+        self.assertEqual(self.url(), '/repos/pyresto/commits')
+        self.assertIs(self.repo.commits, commits)
+
+        self.remote[0] = dict(sha='b', commit=dict(date='2012-01-03'))
+        self.remote.insert(0, dict(sha='c', commit=dict(date='2012-01-04')))
+        commits = self.repo._sync('commits')
+        self.assertEqual(self.url(), '/repos/pyresto/commits?since=2012-01-02')
+        self.assertEqual([(commit.sha, commit.commit['date'])
+                          for commit in commits],
+                         [('c', '2012-01-04'), ('b', '2012-01-03'),
+                          ('a', '2012-01-01')])
+
+        commits = self.repo._sync('commits')
+        self.assertEqual(self.url(), '/repos/pyresto/commits?since=2012-01-04')
+        self.assertEqual(len(commits), 3)
+
+    def test_store(self):
+        store = dict()
+        self.repo._sync('commits', store)
+        self.assertEqual(store.keys(), ['/repos/pyresto/commits'])
+        self.assertEqual(store['/repos/pyresto/commits'][0], '2012-01-02')
+
+    def test_no_delta(self):
+        with self.assertRaises(ValueError):
+            self.repo._sync('plain')
+
+    def test_bugzilla(self):
+        from pyresto.apis.bugzilla import Service
+
+        bugzilla = Service('test', 'http://bugzilla.test/')
+        rest_call = bugzilla.Comment._rest_call = Mock(return_value=Result(
+            dict(comments=[dict(id=1, creation_time='2012-01-01')]), None))
+        try:
+            bug = bugzilla.Bug(id=7)
+            self.assertEqual(len(bug._sync('comments')), 1)
+            bug._sync('comments')
+        finally:
+            del bugzilla.Comment._rest_call
+
+        # only the comment endpoint accepts new_since
+        self.assertEqual(rest_call.call_args[1]['url'],
+                         'bug/7/comment?new_since=2012-01-01')
+
+        # but reading the fields still loads them together with the group
+        rest_call = Mock(return_value=Result(dict(
+            comments=[dict(id=1)], history=[dict(change_time='t')]), None))
+        bugzilla.Bug._many_fields.declare('comments', 'history')
+        with patch.object(bugzilla.Bug, '_rest_call', rest_call):
+            bug = bugzilla.Bug(id=8)
+            self.assertEqual((len(bug.comments), len(bug.history)), (1, 1))
+        rest_call.assert_called_once_with(
+            url='bug/8?include_fields=comments,history', auth=None)
+
+    def test_merge_without_key(self):
+        delta = Delta('new_since', 'time')
+        items, mark = delta.merge([dict(time=1, a=1)],
+                                  [dict(time=1, a=1), dict(time=2, a=2)])
+        self.assertEqual(items, [dict(time=1, a=1), dict(time=2, a=2)])
+        self.assertEqual(mark, 2)
+
+
+class TestForeignPrefetch(unittest.TestCase):
+    def setUp(self):
+        class Parent(Model):
+            _pk = 'id'
+
+        class Child(Model):
+            _pk = 'id'
+            parent = Foreign(Parent, 'parent_id')
+
+        self.Parent, self.Child = Parent, Child
+        self.children = WrappedList([dict(id=i, parent_id=i % 3)
+                                     for i in xrange(10)],
+                                    lambda d: Child(**d))
+
+    def test_concurrent(self):
+        get = Mock(side_effect=lambda pid, auth: self.Parent(id=pid))
+        self.Parent.get = get
+
+        self.children.prefetch('parent')
+        self.assertEqual(get.call_count, 3)
+        for child in self.children[:]:
+            self.assertEqual(child.parent.id, child.parent_id)
+        self.assertEqual(get.call_count, 3)
+
+    def test_batch_path(self):
+        self.Parent._batch_path = '/parents?ids={ids}'
+        rest_call = Mock(return_value=Mock(data=[dict(id=1), dict(id=2)]))
+        self.Parent._rest_call = rest_call
+
+        self.children.prefetch('parent')
+        rest_call.assert_called_once_with(url='/parents?ids=0,1,2',
+                                          auth=None)
+        children = self.children[:]
+        self.assertIsNone(children[0].parent)
+        self.assertEqual(children[1].parent.id, 1)
+        self.assertTrue(children[1].parent._fetched)
+        self.assertIs(children[1].parent, children[4].parent)
+
+    def test_invalid_relation(self):
+        with self.assertRaises(AttributeError):
+            self.children.prefetch('id')
 
 
 class TestModel(unittest.TestCase):
     pass
+
+
+class TestModelGetMany(unittest.TestCase):
+    def setUp(self):
+        class Bug(Model):
+            _pk = 'id'
+            _url_base = 'http://api.test'
+
+        self.Bug = Bug
+
+    def test_concurrent(self):
+        def get(bug_id, auth):
+            if bug_id in (3, 4):
+                error = ServerResponseException()
+                error.status_code = 500 if bug_id == 3 else 404
+                raise error
+            return self.Bug(id=bug_id)
+
+        self.Bug.get = Mock(side_effect=get)
+        bugs = self.Bug.get_many([5, 3, (1,), 4, 5])
+        self.assertEqual([bug.id for bug in bugs[::4]], [5, 5])
+        self.assertIsInstance(bugs[1], ServerResponseException)
+        self.assertEqual(bugs[2].id, 1)
+        self.assertIsNone(bugs[3])  # not found, as with a batch path
+        self.assertEqual(self.Bug.get.call_count, 4)
+
+    def test_batch_chunks(self):
+        self.Bug._batch_path = '/bug?id={ids}'
+        self.Bug._batch_max_url_length = len('http://api.test/bug?id=') + 9
+
+        def rest_call(url, auth):
+            ids = [int(bug_id) for bug_id in url.split('=')[1].split(',')]
+            if 13 in ids:
+                raise ServerResponseException()
+            return Result([dict(id=bug_id) for bug_id in ids
+                           if bug_id != 12], None)
+
+        self.Bug._rest_call = Mock(side_effect=rest_call)
+        keys = range(10, 17)
+        bugs = self.Bug.get_many(keys)
+
+        urls = sorted(call[1]['url'] for call in
+                      self.Bug._rest_call.call_args_list)
+        self.assertEqual(urls, ['/bug?id=10,11,12', '/bug?id=13,14,15',
+                                '/bug?id=16'])
+        self.assertEqual([bugs[0].id, bugs[1].id, bugs[6].id], [10, 11, 16])
+        self.assertIsNone(bugs[2])
+        for bug in bugs[3:6]:
+            self.assertIsInstance(bug, ServerResponseException)
+
+    def test_identity_map(self):
+        self.Bug.get = Mock(side_effect=lambda bug_id, auth: self.Bug(
+            id=bug_id, _fetched=True)._identified(dict(), fetched=True))
+        with IdentityMap():
+            first = self.Bug.get_many([1, 2])
+            self.assertEqual(self.Bug.get_many([2, 1]), first[::-1])
+            self.assertIs(self.Bug.get_many([1])[0], first[0])
+
+        self.assertEqual(self.Bug.get.call_count, 2)
+
+
+class TestIdentityMap(unittest.TestCase):
+    def setUp(self):
+        class Parent(Model):
+            _pk = 'id'
+
+        class Child(Model):
+            _pk = 'id'
+            parent = Foreign(Parent, embedded=True)
+
+        Parent.children = Many(Child, '/children')
+        self.Parent, self.Child = Parent, Child
+        self.rest_call = Mock(side_effect=lambda url, auth: Mock(
+            data=dict(id=int(url.rsplit('/', 1)[1]), name='full')))
+        Parent._rest_call = self.rest_call
+        Child._rest_call = Mock(return_value=(
+            [dict(id=1, parent=dict(id=5)), dict(id=2, parent=dict(id=5))],
+            None))
+
+    def test_inactive(self):
+        self.assertIsNone(IdentityMap.current())
+        self.assertIsNot(self.Parent.get(1), self.Parent.get(1))
+
+    def test_get(self):
+        with IdentityMap() as identity_map:
+            self.assertIs(IdentityMap.current(), identity_map)
+            parent = self.Parent.get(1)
+            self.assertIs(self.Parent.get(1), parent)
+            self.assertEqual(self.rest_call.call_count, 1)
+            self.assertEqual(len(identity_map), 1)
+
+        self.assertIsNone(IdentityMap.current())
+
+    def test_relations(self):
+        with IdentityMap():
+            children = self.Parent(id=9).children
+            child = children[0]
+            parent = child.parent
+            self.assertIs(children[1].parent, parent)
+            self.assertFalse(parent._fetched)
+
+            # the stub is upgraded in place
+            self.assertIs(self.Parent.get(5), parent)
+            self.assertTrue(parent._fetched)
+            self.assertEqual(parent.name, 'full')
+            self.assertIs(self.Parent.get(5), parent)
+            self.assertEqual(self.rest_call.call_count, 1)
+
+    def test_unidentifiable(self):
+        class Change(Model):
+            _pk = ()
+
+        self.Parent.changes = Many(Change, '/changes')
+        Change._rest_call = Mock(return_value=([dict(who='a')], None))
+        self.Child._rest_call = Mock(return_value=([dict(name='b')], None))
+        with IdentityMap() as identity_map:
+            change, = self.Parent(id=9).changes
+            child, = self.Parent(id=9).children
+            self.assertEqual((change.who, child.name), ('a', 'b'))
+            self.assertEqual(len(identity_map), 0)
+
+        self.assertFalse(self.rest_call.called)
+
+    def test_bugzilla_history(self):
+        from pyresto.apis.bugzilla import Service
+
+        bugzilla = Service('test', 'http://bugzilla.test/')
+        rest_call = Mock(return_value=Result(
+            dict(history=[dict(change_time='2012-01-01', changes=[])]), None))
+        with patch.object(bugzilla.BugzillaModel, '_rest_call', rest_call):
+            with IdentityMap():
+                history = list(bugzilla.Bug(id=7).history)
+
+        self.assertEqual(history[0].change_time, '2012-01-01')
+        self.assertEqual(rest_call.call_count, 1)
+
+
+class TestImplicitFetchDetector(unittest.TestCase):
+    def setUp(self):
+        class Commit(Model):
+            _pk = 'sha'
+            _path = '/commits/{sha}'
+
+        Commit._rest_call = Mock(side_effect=lambda url, auth: (
+            dict(sha=url.rsplit('/', 1)[1], stats='+1 -1'), None))
+        self.Commit = Commit
+
+    def read_stats(self, count):
+        return [self.Commit(sha=str(i)).stats for i in xrange(count)]
+
+    def test_inactive(self):
+        self.assertEqual(ImplicitFetchDetector.active(), list())
+        self.assertEqual(len(self.read_stats(3)), 3)
+
+    def test_report(self):
+        with ImplicitFetchDetector() as detector:
+            self.read_stats(3)
+            self.Commit(sha='x', stats='').stats  # loaded, no fetch
+
+        self.assertEqual(len(detector), 3)
+        group, = detector.report()
+        self.assertEqual((group['model'], group['attribute'], group['count']),
+                         (self.Commit, 'stats', 3))
+        site, = group['sites']
+        self.assertIn('test_core.py', site)
+        self.assertIn('read_stats', site)
+
+        detector.clear()
+        self.assertEqual(detector.report(), list())
+
+    def test_warn(self):
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter('always')
+            with ImplicitFetchDetector(threshold=2):
+                self.read_stats(5)
+
+        warning, = caught
+        self.assertIs(warning.category, ImplicitFetchWarning)
+        self.assertIn('Commit.stats', str(warning.message))
+
+    def test_raise(self):
+        with ImplicitFetchDetector(threshold=2, action='raise') as detector:
+            with self.assertRaises(ImplicitFetchException):
+                self.read_stats(5)
+
+            # every later fetch is refused too, not only the first one
+            for _ in xrange(3):
+                with self.assertRaises(ImplicitFetchException):
+                    self.read_stats(1)
+
+        self.assertEqual(len(detector), 2)
+        self.assertEqual(self.Commit._rest_call.call_count, 2)
+
+    def test_nested(self):
+        with ImplicitFetchDetector() as outer:
+            self.read_stats(1)
+            with ImplicitFetchDetector() as inner:
+                self.assertEqual(ImplicitFetchDetector.active(),
+                                 [outer, inner])
+                self.read_stats(2)
+
+        self.assertEqual((len(outer), len(inner)), (3, 2))
+
+
+Result = collections.namedtuple('Result', 'data continuation_url')
+
+
+class TestProjection(unittest.TestCase):
+    def setUp(self):
+        class Bug(Model):
+            _pk = 'id'
+            _path = '/bug/{id}?include_fields=_all'
+            _projection_param = 'include_fields'
+            _batch_path = '/bug?id={ids}'
+            _batch_parser = staticmethod(lambda data: data)
+
+        full = dict(status='NEW', priority='P1', summary='s', history=[1])
+
+        def rest_call(url, auth):
+            path, query = url.split('?')
+            query = dict(pair.split('=') for pair in query.split('&'))
+            fields = query['include_fields'].replace('%2C', ',').split(',')
+            ids = ([path.rsplit('/', 1)[1]] if 'id' not in query
+                   else query['id'].replace('%2C', ',').split(','))
+            items = [dict((field, int(bug_id) if field == 'id' else
+                           full.get(field)) for field in
+                          (full.keys() + ['id'] if fields == ['_all']
+                           else fields))
+                     for bug_id in ids]
+            return Result(items if 'id' in query else items[0], None)
+
+        self.rest_call = Mock(side_effect=rest_call)
+        Bug._rest_call = self.rest_call
+        self.Bug = Bug
+
+    def url(self):
+        return self.rest_call.call_args[1]['url']
+
+    def test_project(self):
+        self.assertEqual(self.Bug._project('/bug/1?include_fields=_all&a=b',
+                                           ['status']),
+                         '/bug/1?a=b&include_fields=id%2Cstatus')
+        self.assertIsNone(MockModel._project('/mockmodel/1', ['status']))
+
+    def test_get_only(self):
+        bug = self.Bug.get(1, only=('status', 'priority'))
+        self.assertEqual(self.url(), '/bug/1?include_fields=id%2Cpriority'
+                                     '%2Cstatus')
+        self.assertEqual((bug.status, bug.priority), ('NEW', 'P1'))
+        self.assertEqual(bug._loaded_fields,
+                         frozenset(['id', 'status', 'priority']))
+        self.assertEqual(self.rest_call.call_count, 1)
+
+        # a missing field is fetched narrowly, only once
+        self.assertEqual(bug.summary, 's')
+        self.assertEqual(self.url(), '/bug/1?include_fields=id%2Csummary')
+        self.assertEqual(bug.summary, 's')
+        self.assertEqual(self.rest_call.call_count, 2)
+
+        with self.assertRaises(AttributeError):
+            bug.__deepcopy__
+        self.assertEqual(self.rest_call.call_count, 2)
+
+    def test_scope(self):
+        with Projection('status'):
+            self.assertEqual(Projection.current().fields,
+                             frozenset(['status']))
+            bug = self.Bug.get(1)
+            self.assertEqual(self.url(), '/bug/1?include_fields=id%2Cstatus')
+
+            stub = self.Bug(id=2)
+            self.assertEqual(stub.priority, 'P1')
+            self.assertEqual(self.url(),
+                             '/bug/2?include_fields=id%2Cpriority%2Cstatus')
+            self.assertEqual(stub.status, 'NEW')
+            self.assertEqual(self.rest_call.call_count, 2)
+
+        self.assertIsNone(Projection.current())
+        self.assertEqual(self.Bug.get(1).summary, 's')
+        self.assertEqual(self.url(), '/bug/1?include_fields=_all')
+
+    def test_batch(self):
+        found = self.Bug._fetch_batch([(1,), (2,)], only=('status',))
+        self.assertEqual(self.url(),
+                         '/bug?id=1%2C2&include_fields=id%2Cstatus')
+        self.assertEqual(found[(2,)].status, 'NEW')
+        self.assertEqual(found[(2,)]._loaded_fields,
+                         frozenset(['id', 'status']))
+
+    def test_identity_map(self):
+        with IdentityMap():
+            bug = self.Bug.get(1, only=('status',))
+            self.assertIs(self.Bug.get(1, only=('status',)), bug)
+            self.assertEqual(self.rest_call.call_count, 1)
+
+            # a full fetch upgrades the projected instance in place
+            self.assertIs(self.Bug.get(1), bug)
+            self.assertEqual(self.rest_call.call_count, 2)
+            self.assertIsNone(bug._loaded_fields)
+            self.assertEqual(bug.summary, 's')
+            self.assertEqual(self.rest_call.call_count, 2)
+
+
+class TestRelationGroup(unittest.TestCase):
+    def setUp(self):
+        group = RelationGroup('/bug/{id}?include_fields={fields}')
+
+        class Bug(Model):
+            _pk = 'id'
+
+        for name in ('cc', 'comments', 'history'):
+            setattr(Bug, name, group.add(name, Many(
+                MockModel, '/bug/{id}?include_fields=' + name,
+                preprocessor=lambda data, name=name: data[name])))
+
+        def rest_call(url, auth):
+            fields = url.split('=')[-1].split(',')
+            return Result(dict((field, [dict(id=1), dict(id=2)])
+                               for field in fields), None)
+
+        self.rest_call = Mock(side_effect=rest_call)
+        Bug._rest_call = self.rest_call
+        self.Bug, self.group = Bug, group
+
+    def url(self):
+        return self.rest_call.call_args[1]['url']
+
+    def test_used_fields(self):
+        first = self.Bug(id=1)
+        self.assertEqual(len(first.cc), 2)
+        self.assertEqual(self.url(), '/bug/1?include_fields=cc')
+        self.assertEqual(first.comments[1].id, 2)
+        self.assertEqual(self.url(), '/bug/1?include_fields=comments')
+
+        second = self.Bug(id=2)
+        self.assertEqual(len(second.comments), 2)
+        self.assertEqual(self.url(), '/bug/2?include_fields=cc,comments')
+        self.assertEqual(len(second.cc), 2)
+        self.assertEqual(self.rest_call.call_count, 3)
+
+    def test_declare(self):
+        self.group.declare('cc', 'history')
+        bug = self.Bug(id=3)
+        bug.comments
+        self.assertEqual(self.url(),
+                         '/bug/3?include_fields=cc,comments,history')
+        self.assertIs(bug.cc, bug.cc)
+        bug.history
+        self.assertEqual(self.rest_call.call_count, 1)
+
+        with self.assertRaises(KeyError):
+            self.group.declare('flags')
+
+
+class TestModelAsync(unittest.TestCase):
+    def setUp(self):
+        self.rest_call = Mock(side_effect=lambda url, auth: Mock(
+            data=dict(id=int(url.rsplit('/', 1)[1]))))
+        MockModel._rest_call = self.rest_call
+
+    def test_aget(self):
+        futures = [MockModel.aget(i) for i in xrange(5)]
+        instances = gather(futures)
+        self.assertEqual([instance.id for instance in instances], range(5))
+        self.assertEqual(self.rest_call.call_count, 5)
+
+    def test_identity_map(self):
+        with IdentityMap():
+            instance = MockModel.get(1)
+            self.assertIs(MockModel.aget(1).result(), instance)
+        self.assertEqual(self.rest_call.call_count, 1)
+
+    def test_aload(self):
+        class Owner(Model):
+            _pk = 'id'
+            item = Foreign(MockModel, 'item_id')
+
+        owner = Owner(id=1, item_id=3)
+        self.assertEqual(owner._aload('item').result().id, 3)
+        self.assertIs(owner.item, owner._aload('item').result())
+
+    def tearDown(self):
+        del MockModel._rest_call
+
+
+class TestModelRestCall(unittest.TestCase):
+    def setUp(self):
+        self.pages = dict()
+
+        def send_mock(method, url, **kwargs):
+            data, links = self.pages[url]
+            return Mock(status_code=200, text=json.dumps(data), links=links,
+                        url=url)
+
+        self.send = Mock(side_effect=send_mock)
+        MockModel._send = self.send
+        MockModel._url_base = 'http://api.test'
+
+    def make_pages(self, count, last_link=True):
+        url = 'http://api.test/many?per_page=1&page={0}'
+        for i in xrange(1, count + 1):
+            links = dict()
+            if i < count:
+                links['next'] = dict(url=url.format(i + 1))
+                if last_link:
+                    links['last'] = dict(url=url.format(count))
+            self.pages[url.format(i)] = ([dict(id=i)], links)
+
+    def test_single_page(self):
+        self.make_pages(1)
+        data, next_url = MockModel._rest_call('/many?per_page=1&page=1')
+        self.assertEqual(data, [dict(id=1)])
+        self.assertIsNone(next_url)
+
+    def test_no_fetch_all(self):
+        self.make_pages(3)
+        data, next_url = MockModel._rest_call('/many?per_page=1&page=1',
+                                              fetch_all=False)
+        self.assertEqual(data, [dict(id=1)])
+        self.assertEqual(next_url, 'http://api.test/many?per_page=1&page=2')
+
+    def test_paged(self):
+        self.make_pages(3)
+        result = MockModel._rest_call('/many?per_page=1&page=1',
+                                      fetch_all=False, paged=True)
+        self.assertEqual(result.page_urls,
+                         ['http://api.test/many?per_page=1&page=2',
+                          'http://api.test/many?per_page=1&page=3'])
+        self.assertNotIn('paged', self.send.call_args[1])
+        self.assertIsNone(MockModel._rest_call('/many?per_page=1&page=1',
+                                               fetch_all=False).page_urls)
+
+    def test_fetch_all_last_link(self):
+        self.make_pages(7)
+        data = MockModel._rest_call('/many?per_page=1&page=1').data
+        self.assertEqual(data, [dict(id=i) for i in xrange(1, 8)])
+        self.assertEqual(self.send.call_count, 7)
+
+    def test_fetch_all_sequential(self):
+        self.make_pages(5, last_link=False)
+        data = MockModel._rest_call('/many?per_page=1&page=1').data
+        self.assertEqual(data, [dict(id=i) for i in xrange(1, 6)])
+        self.assertEqual(self.send.call_count, 5)
+
+    def test_error(self):
+        MockModel._send = Mock(return_value=Mock(status_code=404, text=''))
+        with self.assertRaises(ServerResponseException):
+            MockModel._rest_call('/missing')
+
+    def test_invalid_method(self):
+        with self.assertRaises(InvalidRestMethodException):
+            MockModel._rest_call('/many', method='FOO')
+
+    def test_single_flight(self):
+        self.make_pages(1)
+        url = '/many?per_page=1&page=1'
+        MockModel._single_flight = flight = SingleFlight()
+        started, release = threading.Event(), threading.Event()
+        send = self.send.side_effect
+
+        def blocking_send(method, url, **kwargs):
+            started.set()
+            release.wait(5)
+            return send(method, url, **kwargs)
+
+        def modify():  # as Model.__update_data does with the results
+            data = MockModel._rest_call(url).data
+            data[0].clear()
+            return data
+
+        deepcopy = copy.deepcopy
+
+        def slow_deepcopy(value):  # lets the leader modify its result first
+            time.sleep(0.05)
+            return deepcopy(value)
+
+        self.send.side_effect = blocking_send
+        executor = Executor(max_workers=4)
+        leader = executor.submit(modify)
+        started.wait(5)
+        waiters = [executor.submit(MockModel._rest_call, url)
+                   for _ in xrange(2)]
+        while flight.coalesced < 2:
+            time.sleep(0.01)
+        with patch('pyresto.core.copy', Mock(deepcopy=slow_deepcopy)):
+            release.set()
+            results = [future.result(5).data for future in waiters]
+            self.assertEqual(leader.result(5), [dict()])
+
+        self.assertEqual(results, [[dict(id=1)]] * 2)
+        self.assertIsNot(results[0], results[1])
+        self.assertEqual(self.send.call_count, 1)
+
+        # other methods and different arguments are never coalesced
+        MockModel._rest_call(url, method='POST')
+        MockModel._rest_call(url, params=dict(a=[1]))
+        self.assertEqual(self.send.call_count, 3)
+
+    def tearDown(self):
+        del MockModel._send
+        del MockModel._url_base
+        if '_single_flight' in MockModel.__dict__:
+            del MockModel._single_flight
@@ -0,0 +1,55 @@
+# coding: utf-8
+
+import json
+
+try:
+    import unittest2 as unittest
+except ImportError:
+    import unittest
+
+from pyresto.decoders import BACKENDS, JSONDecoder
+from pyresto.streaming import JSONStream
+
+
+class TestJSONDecoder(unittest.TestCase):
+    def setUp(self):
+        self.data = [dict(id=i, login=u'user{0}'.format(i % 2),
+                          bio=u'x' * 50, owner=dict(login=u'user0'))
+                     for i in xrange(4)]
+        self.text = json.dumps(self.data)
+
+    def test_backends(self):
+        self.assertIn('json', BACKENDS)
+        with self.assertRaises(ValueError):
+            JSONDecoder(backend='nope')
+
+    def test_decode(self):
+        for backend in BACKENDS:
+            self.assertEqual(JSONDecoder(backend)(self.text), self.data)
+
+    def test_interning(self):
+        decoder = JSONDecoder()
+        first, second = decoder(self.text)[::2]
+
+        key = lambda item, name: [k for k in item if k == name][0]
+        self.assertIs(key(first, 'login'), key(second, 'login'))
+        self.assertIs(first['login'], second['login'])
+        self.assertIs(first['login'], first['owner']['login'])
+        self.assertIsNot(first['bio'], second['bio'])  # too long
+
+    def test_keys_only(self):
+        decoder = JSONDecoder(intern_values=False)
+        first, second = decoder(self.text)[::2]
+        self.assertIsNot(first['login'], second['login'])
+        self.assertEqual(len(decoder), 4)
+
+    def test_max_strings(self):
+        decoder = JSONDecoder(max_strings=2)
+        self.assertEqual(decoder(self.text), self.data)
+        self.assertEqual(len(decoder), 2)
+
+    def test_stream(self):
+        decoder = JSONDecoder()
+        items = list(JSONStream([self.text], decoder))
+        self.assertEqual(items, self.data)
+        self.assertIs(items[0]['owner']['login'], items[2]['login'])
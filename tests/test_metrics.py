@@ -0,0 +1,167 @@
+# coding: utf-8
+
+import datetime
+import json
+
+from mock import Mock
+try:
+    import unittest2 as unittest
+except ImportError:
+    import unittest
+
+from pyresto import metrics
+from pyresto.core import Model, Many, ServerResponseException
+from pyresto.metrics import Histogram, MetricsAggregator, RequestEvent
+
+
+class MeteredModel(Model):
+    _pk = 'id'
+    _url_base = 'http://api.test'
+    _path = '/metered/{id}'
+
+
+class MeteredParent(Model):
+    _pk = 'id'
+    _url_base = 'http://api.test'
+    children = Many(MeteredModel, '/parents/{id}/children?page=1', lazy=True)
+
+
+def make_response(url, data, status_code=200, links=None, from_cache=False):
+    text = json.dumps(data)
+    return Mock(status_code=status_code, text=text, content=text, url=url,
+                links=links or dict(), request=Mock(method='GET'),
+                elapsed=datetime.timedelta(milliseconds=5),
+                from_cache=from_cache)
+
+
+def make_event(**values):
+    defaults = dict(model=MeteredModel, template='/metered/{id}', url='',
+                    method='GET', status=200, bytes=10, ttfb=0.01,
+                    parse_time=0.001, page=0, cache_hit=False)
+    defaults.update(values)
+    return RequestEvent(**defaults)
+
+
+class TestHistogram(unittest.TestCase):
+    def test_empty(self):
+        self.assertIsNone(Histogram().percentile(50))
+
+    def test_percentile(self):
+        histogram = Histogram()
+        for _ in xrange(98):
+            histogram.observe(0.0015)
+        histogram.observe(0.5)
+        histogram.observe(0.7)
+
+        self.assertEqual(histogram.count, 100)
+        self.assertEqual(histogram.percentile(50), 0.002)
+        self.assertEqual(histogram.percentile(99), 0.512)
+        self.assertEqual(histogram.percentile(100), 1.024)
+
+    def test_overflow(self):
+        histogram = Histogram()
+        histogram.observe(10 ** 6)
+        self.assertEqual(histogram.percentile(50), float('inf'))
+
+
+class TestMetricsAggregator(unittest.TestCase):
+    def test_summary(self):
+        aggregator = MetricsAggregator()
+        aggregator(make_event())
+        aggregator(make_event(cache_hit=True, bytes=0))
+        aggregator(make_event(status=404, parse_time=None))
+        aggregator(make_event(template='/other'))
+
+        summary = aggregator.summary()
+        self.assertEqual(len(summary), 2)
+        row = summary[0]
+        self.assertEqual(row['template'], '/metered/{id}')
+        self.assertEqual(row['model'], 'MeteredModel')
+        self.assertEqual((row['requests'], row['errors'], row['cache_hits'],
+                          row['bytes']), (3, 1, 1, 20))
+        self.assertEqual(row['ttfb_p50'], 0.016)
+
+        aggregator.reset()
+        self.assertEqual(aggregator.summary(), list())
+
+
+class TestInstrumentation(unittest.TestCase):
+    def setUp(self):
+        self.events = list()
+        metrics.add_sink(self.events.append)
+
+    def tearDown(self):
+        metrics.remove_sink(self.events.append)
+        if '_send' in MeteredModel.__dict__:
+            del MeteredModel._send
+
+    def test_get(self):
+        url = 'http://api.test/metered/1'
+        MeteredModel._send = Mock(return_value=make_response(
+            url, dict(id=1), from_cache=True))
+        MeteredModel.get(1)
+
+        event, = self.events
+        self.assertEqual(event.model, MeteredModel)
+        self.assertEqual(event.template, '/metered/{id}')
+        self.assertEqual((event.url, event.method, event.status, event.page),
+                         (url, 'GET', 200, 0))
+        self.assertEqual(event.bytes, len('{"id": 1}'))
+        self.assertEqual(event.ttfb, 0.005)
+        self.assertGreaterEqual(event.parse_time, 0)
+        self.assertTrue(event.cache_hit)
+
+    def test_error(self):
+        MeteredModel._send = Mock(return_value=make_response(
+            'http://api.test/metered/2', dict(), status_code=500))
+        with self.assertRaises(ServerResponseException):
+            MeteredModel.get(2)
+
+        event, = self.events
+        self.assertEqual(event.status, 500)
+        self.assertIsNone(event.parse_time)
+
+    def test_pages(self):
+        url = 'http://api.test/parents/1/children?page={0}'
+        responses = dict(
+            (url.format(i), make_response(url.format(i), [dict(id=i)], links=(
+                dict(next=dict(url=url.format(i + 1))) if i < 3 else None)))
+            for i in xrange(1, 4))
+        MeteredModel._send = Mock(
+            side_effect=lambda method, page_url, **kw: responses[page_url])
+
+        self.assertEqual(len(list(MeteredParent(id=1).children)), 3)
+        self.assertEqual([event.page for event in self.events], [0, 1, 2])
+        self.assertEqual(set(event.template for event in self.events),
+                         set(['/parents/{id}/children?page=1']))
+
+    def test_concurrent_pages(self):
+        url = 'http://api.test/metered?page={0}'
+        responses = dict(
+            (url.format(i), make_response(url.format(i), [dict(id=i)], links=(
+                dict(next=dict(url=url.format(i + 1)),
+                     last=dict(url=url.format(4))) if i < 4 else None)))
+            for i in xrange(1, 5))
+        MeteredModel._send = Mock(
+            side_effect=lambda method, page_url, **kw: responses[page_url])
+
+        with metrics.labels(template='/metered?page={page}'):
+            data = MeteredModel._rest_call(url.format(1)).data
+
+        self.assertEqual(len(data), 4)
+        self.assertEqual(sorted(event.page for event in self.events),
+                         [0, 1, 2, 3])
+        # the pages fetched on the worker threads keep the labels too
+        self.assertEqual(set(event.template for event in self.events),
+                         set(['/metered?page={page}']))
+
+    def test_no_sinks(self):
+        metrics.remove_sink(self.events.append)
+        try:
+            MeteredModel._send = Mock(return_value=make_response(
+                'http://api.test/metered/3', dict(id=3)))
+            MeteredModel.get(3)
+        finally:
+            metrics.add_sink(self.events.append)
+
+        self.assertEqual(self.events, list())
@@ -0,0 +1,150 @@
+# coding: utf-8
+
+import collections
+import time
+
+from mock import Mock, patch
+try:
+    import unittest2 as unittest
+except ImportError:
+    import unittest
+
+from pyresto.core import Foreign, Model, ServerResponseException
+from pyresto.mirror import Mirror
+
+
+Result = collections.namedtuple('Result', 'data continuation_url')
+
+
+class User(Model):
+    _pk = 'name'
+
+
+class Bug(Model):
+    _pk = 'id'
+    _path = '/bug/{id}'
+    _batch_path = '/bug?id={ids}'
+    _batch_parser = staticmethod(lambda data: data)
+
+    assigned_to = Foreign(User, '__assigned_to', embedded=True)
+
+
+class TestMirror(unittest.TestCase):
+    def setUp(self):
+        self.bugs = dict(
+            (i, dict(id=i, status='NEW' if i % 2 else 'FIXED',
+                     assigned_to=dict(name='dev{0}'.format(i % 3)),
+                     priority=i % 5))
+            for i in xrange(1, 11))
+
+        def rest_call(url, auth=None):
+            if url.startswith('/bug?id='):
+                ids = url.split('=', 1)[1].replace('%2C', ',').split(',')
+                return Result([self.bugs[int(i)] for i in ids
+                               if int(i) in self.bugs], None)
+            return Result(self.bugs.get(int(url.rsplit('/', 1)[1])), None)
+
+        self.rest_call = Bug._rest_call = Mock(side_effect=rest_call)
+        self.mirror = Mirror(':memory:')
+        self.mirror.register(Bug, indexes=('status', 'assigned_to.name'))
+        self.mirror.save(Bug.get(i) for i in xrange(1, 11))
+        self.rest_call.reset_mock()
+
+    def test_query(self):
+        bugs = self.mirror.query(Bug, {'status': 'NEW',
+                                       'assigned_to.name': 'dev1'},
+                                 order_by='"pk:id"')
+        self.assertEqual([bug.id for bug in bugs], [1, 7])
+        self.assertIsInstance(bugs[0], Bug)
+        self.assertTrue(bugs[0]._fetched)
+        self.assertEqual(bugs[0].assigned_to.name, 'dev1')
+        self.assertEqual(bugs[0].priority, 1)
+
+        bugs = self.mirror.query(Bug, where='"pk:id" > ?', params=(7,),
+                                 order_by='"pk:id" DESC', limit=2)
+        self.assertEqual([bug.id for bug in bugs], [10, 9])
+        self.assertFalse(self.rest_call.called)
+
+        with self.assertRaises(KeyError):
+            self.mirror.query(Bug, {'priority': 1})
+
+    def test_get(self):
+        self.assertEqual(self.mirror.get(Bug, 3).status, 'NEW')
+        self.assertFalse(self.rest_call.called)
+
+        self.bugs[11] = dict(id=11, status='NEW')
+        self.assertEqual(self.mirror.get(Bug, 11).status, 'NEW')
+        self.assertEqual(self.rest_call.call_count, 1)
+        self.assertEqual(self.mirror.get(Bug, 11).id, 11)
+        self.assertEqual(self.rest_call.call_count, 1)
+
+    def test_stale(self):
+        self.mirror.ttl = 60
+        self.bugs[1]['status'] = 'FIXED'
+        del self.bugs[3]
+        later = time.time() + 61
+        with patch('pyresto.mirror.time', Mock(time=lambda: later)):
+            bugs = self.mirror.query(Bug, {'status': 'NEW'})
+            self.assertIsNone(self.mirror.get(Bug, 3))
+
+        self.assertEqual(sorted(bug.id for bug in bugs), [5, 7, 9])
+        self.assertEqual(self.rest_call.call_count, 2)  # a batch and a get
+
+    def test_stale_errors(self):
+        def error(status_code):
+            exception = ServerResponseException()
+            exception.status_code = status_code
+            return exception
+
+        errors = {3: error(404), 5: error(500)}
+        side_effect = self.rest_call.side_effect
+
+        def rest_call(url, auth=None):
+            bug_id = int(url.rsplit('/', 1)[1])
+            if bug_id in errors:
+                raise errors[bug_id]
+            return side_effect(url, auth)
+
+        self.rest_call.side_effect = rest_call
+        self.mirror.ttl = 60
+        later = time.time() + 61
+        with patch.object(Bug, '_batch_path', None):  # a get per stale row
+            with patch('pyresto.mirror.time', Mock(time=lambda: later)):
+                bugs = self.mirror.query(Bug, {'status': 'NEW'})
+
+        # the missing bug is dropped while the failed one is still served
+        self.assertEqual(sorted(bug.id for bug in bugs), [1, 5, 7, 9])
+        self.assertEqual(self.rest_call.call_count, 5)
+
+    def test_save_errors(self):
+        self.bugs[3]['status'] = 'FIXED'
+        self.bugs[11] = dict(id=11, status='NEW')
+        side_effect = self.rest_call.side_effect
+
+        def rest_call(url, auth=None):
+            if url.endswith('/3'):
+                raise ServerResponseException()
+            return side_effect(url, auth)
+
+        self.rest_call.side_effect = rest_call
+        with patch.object(Bug, '_batch_path', None):  # a get per key
+            bugs = Bug.get_many([3, 11, 12])
+        self.assertIsInstance(bugs[0], ServerResponseException)
+        self.assertIsNone(bugs[2])
+
+        # the failed and the missing bugs leave the stored ones alone
+        self.mirror.save(bugs)
+        self.assertEqual(self.mirror.get(Bug, 3).status, 'NEW')
+        self.assertEqual(self.mirror.get(Bug, 11).status, 'NEW')
+        self.assertEqual(self.rest_call.call_count, 3)
+
+    def test_new_index(self):
+        self.mirror.register(Bug, indexes=('status', 'priority'))
+        bugs = self.mirror.query(Bug, {'priority': 4})
+        self.assertEqual(sorted(bug.id for bug in bugs), [4, 9])
+
+    def test_unregistered(self):
+        with self.assertRaises(KeyError):
+            self.mirror.query(User)
+        with self.assertRaises(ValueError):
+            self.mirror.register(type('NoKey', (Model,), dict(_pk=())))
@@ -0,0 +1,82 @@
+# coding: utf-8
+
+from mock import Mock
+try:
+    import unittest2 as unittest
+except ImportError:
+    import unittest
+
+from pyresto.core import Model
+from pyresto.ratelimit import RateBudget, RateLimitScheduler
+
+
+def make_response(status_code=200, **headers):
+    headers = dict((k.replace('_', '-'), str(v)) for k, v in headers.items())
+    return Mock(status_code=status_code, headers=headers)
+
+
+class TestRateBudget(unittest.TestCase):
+    def test_update(self):
+        budget = RateBudget()
+        budget.update(make_response(X_RateLimit_Limit=10,
+                                    X_RateLimit_Remaining=9,
+                                    X_RateLimit_Reset=1000), now=0)
+        self.assertEqual(budget.as_dict(), dict(limit=10, remaining=9,
+                                                reset=1000, used=1))
+        self.assertEqual(budget.delay(now=0), 0)
+
+    def test_exhausted(self):
+        budget = RateBudget()
+        budget.update(make_response(403, X_RateLimit_Limit=10,
+                                    X_RateLimit_Remaining=0,
+                                    X_RateLimit_Reset=100), now=0)
+        self.assertEqual(budget.delay(now=40), 60)
+        self.assertEqual(budget.delay(now=100), 0)
+
+    def test_retry_after(self):
+        budget = RateBudget()
+        budget.update(make_response(429, Retry_After=30), now=10)
+        self.assertEqual(budget.delay(now=20), 20)
+
+    def test_pacing(self):
+        budget = RateBudget()
+        budget.update(make_response(X_RateLimit_Limit=100,
+                                    X_RateLimit_Remaining=10,
+                                    X_RateLimit_Reset=100), now=0)
+        budget.last_request = 0
+        self.assertEqual(budget.delay(pace_below=0.5, now=0), 10)
+        self.assertEqual(budget.delay(pace_below=0.05, now=0), 0)
+
+
+class TestRateLimitScheduler(unittest.TestCase):
+    def test_retry(self):
+        sleep = Mock()
+        scheduler = RateLimitScheduler(sleep=sleep)
+        rejected = make_response(403, X_RateLimit_Limit=10,
+                                 X_RateLimit_Remaining=0, X_RateLimit_Reset=1)
+        session = Mock()
+        session.request.side_effect = [rejected, make_response(200)]
+
+        class MockModel(Model):
+            _pk = 'id'
+            _scheduler = scheduler
+            _get_session = Mock(return_value=session)
+
+        response = MockModel._request('GET', 'http://api.test/a', auth=None)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(session.request.call_count, 2)
+        self.assertEqual(scheduler.usage()[None]['used'], 2)
+
+    def test_should_retry(self):
+        scheduler = RateLimitScheduler(max_retries=1)
+        self.assertFalse(scheduler.should_retry(make_response(403), 0))
+        limited = make_response(403, X_RateLimit_Remaining=0)
+        self.assertTrue(scheduler.should_retry(limited, 0))
+        self.assertFalse(scheduler.should_retry(limited, 1))
+
+    def test_budget_per_auth(self):
+        scheduler = RateLimitScheduler()
+        auth = object()
+        scheduler.update(auth, make_response(X_RateLimit_Remaining=5))
+        self.assertEqual(scheduler.budget(auth).remaining, 5)
+        self.assertIsNone(scheduler.budget(None).remaining)
@@ -0,0 +1,103 @@
+# coding: utf-8
+
+import json
+
+from mock import Mock
+try:
+    import unittest2 as unittest
+except ImportError:
+    import unittest
+
+from pyresto.core import Model, Many
+from pyresto.streaming import JSONStream, iter_text
+
+
+def chunked(text, size):
+    return [text[i:i + size] for i in xrange(0, len(text), size)]
+
+
+class TestJSONStream(unittest.TestCase):
+    def setUp(self):
+        self.data = ([dict(id=i, text=u'\xe7' * i) for i in xrange(20)] +
+                     [1, 234, 5.5, None, True, u'x', [], dict()])
+        self.text = json.dumps(self.data, indent=1)
+
+    def test_items(self):
+        for size in (1, 2, 3, 7, 64, len(self.text)):
+            self.assertEqual(list(JSONStream(chunked(self.text, size))),
+                             self.data)
+
+    def test_lazy(self):
+        chunks = iter(chunked(self.text, 10))
+        items = iter(JSONStream(chunks))
+        self.assertEqual(next(items), self.data[0])
+        self.assertTrue(next(chunks, None))  # not read to the end
+
+    def test_empty(self):
+        self.assertEqual(list(JSONStream([' [', ' ', '] '])), list())
+
+    def test_not_array(self):
+        stream = JSONStream([' {"a"', ': 1}'])
+        self.assertEqual(stream.peek(), '{')
+        self.assertEqual(json.loads(stream.read()), dict(a=1))
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            list(JSONStream(['[1 2]']))
+        with self.assertRaises(ValueError):
+            list(JSONStream(['[1, {"a": ']))
+
+    def test_iter_text(self):
+        body = u'["\xe7\xe7"]'.encode('utf8')
+        response = Mock(encoding=None, iter_content=Mock(
+            return_value=iter(chunked(body, 1))))
+        self.assertEqual(u''.join(iter_text(response)), u'["\xe7\xe7"]')
+
+
+class StreamedModel(Model):
+    _pk = 'id'
+    _url_base = 'http://api.test'
+    _stream = True
+
+
+class StreamedOwner(Model):
+    _pk = 'id'
+    _url_base = 'http://api.test'
+    items = Many(StreamedModel, '/owners/{id}/items', lazy=True)
+
+
+class TestStreamedPages(unittest.TestCase):
+    def setUp(self):
+        def send(method, url, **kwargs):
+            body = json.dumps([dict(id=i) for i in xrange(3)])
+            if url.endswith('/1'):
+                body = json.dumps(dict(id=1))
+            return Mock(status_code=200, url=url, links=dict(), encoding=None,
+                        text=body, iter_content=Mock(
+                            return_value=iter(chunked(body, 4))))
+
+        self.send = Mock(side_effect=send)
+        StreamedModel._send = self.send
+
+    def tearDown(self):
+        del StreamedModel._send
+
+    def test_lazy_many(self):
+        items = StreamedOwner(id=1).items
+        self.assertEqual([item.id for item in items], [0, 1, 2])
+        self.assertTrue(self.send.call_args[1]['stream'])
+
+        data = StreamedModel._rest_call('/owners/1/items',
+                                        fetch_all=False).data
+        self.assertFalse(isinstance(data, list))
+        self.assertEqual(list(data), [dict(id=i) for i in xrange(3)])
+
+    def test_not_array(self):
+        data = StreamedModel._rest_call('/streamedmodel/1',
+                                        fetch_all=False).data
+        self.assertEqual(data, dict(id=1))
+
+    def test_fetch_all(self):
+        data = StreamedModel._rest_call('/owners/1/items').data
+        self.assertEqual(data, [dict(id=i) for i in xrange(3)])
+        self.assertNotIn('stream', self.send.call_args[1])